@@ -6,11 +6,13 @@
 
 MUSIC_FOLDER="${1:-music}"
 FORCE_REGENERATE="${2:-false}"
+OPTIMIZE_PDFS="${3:-false}"
 
 echo "🎵 ChordPro PDF Generator"
 echo "========================"
 echo "Music folder: $MUSIC_FOLDER"
 echo "Force regenerate: $FORCE_REGENERATE"
+echo "Optimize PDFs: $OPTIMIZE_PDFS"
 echo ""
 
 # ChordPro command arguments - use environment variable if available, fallback to defaults
@@ -54,6 +56,22 @@ ERRORS=0
 echo "📁 Found $TOTAL_FILES ChordPro files"
 echo ""
 
+# Render the songs chordpro_pdf.py supports in-process and in parallel first;
+# the loop below then only starts Perl for the ones it left behind. Custom
+# CHORDPRO_PARAMS keep every song on Perl, since the Python renderer only
+# knows the default layout above.
+PYTHON_MARKER=""
+if [ -z "$CHORDPRO_PARAMS" ] && python3 -c "import fpdf" 2>/dev/null; then
+    PYTHON_MARKER=$(mktemp)
+    PYTHON_ARGS=()
+    if [ "$FORCE_REGENERATE" = "true" ]; then
+        PYTHON_ARGS+=("--force")
+    fi
+    echo "🐍 Rendering supported songs in-process..."
+    python3 "$(dirname "$0")/../../chordpro_pdf.py" "${PYTHON_ARGS[@]}" "$MUSIC_FOLDER" || echo "⚠ In-process rendering reported errors (Perl will retry them)"
+    echo ""
+fi
+
 # Process each file
 while IFS= read -r chopro_file; do
     if [ -z "$chopro_file" ]; then
@@ -63,6 +81,13 @@ while IFS= read -r chopro_file; do
     # Generate PDF path
     pdf_file="${chopro_file%.*}.pdf"
 
+    # Already written by the in-process renderer
+    if [ -n "$PYTHON_MARKER" ] && [ "$pdf_file" -nt "$PYTHON_MARKER" ]; then
+        GENERATED=$((GENERATED + 1))
+        PROCESSED=$((PROCESSED + 1))
+        continue
+    fi
+
     # Check if PDF needs to be generated
     if [ "$FORCE_REGENERATE" = "true" ] || [ ! -f "$pdf_file" ] || [ "$chopro_file" -nt "$pdf_file" ]; then
         echo "📄 Processing: $(basename "$chopro_file")"
@@ -89,6 +114,10 @@ while IFS= read -r chopro_file; do
     PROCESSED=$((PROCESSED + 1))
 done <<< "$CHOPRO_FILES"
 
+if [ -n "$PYTHON_MARKER" ]; then
+    rm -f "$PYTHON_MARKER"
+fi
+
 echo ""
 echo "📊 Summary:"
 echo "  Total files: $TOTAL_FILES"
@@ -102,5 +131,13 @@ if [ $ERRORS -gt 0 ]; then
     echo "⚠ $ERRORS files failed to process (but continuing)"
 fi
 
+# Optional post-render stage: linearize and recompress new PDFs (files already
+# listed in pdf-optimized.json are only hashed)
+if [ "$OPTIMIZE_PDFS" = "true" ] && [ $GENERATED -gt 0 ]; then
+    echo ""
+    echo "🗜️ Optimizing PDFs..."
+    python3 "$(dirname "$0")/../../optimize_pdfs.py" "$MUSIC_FOLDER" || echo "⚠ PDF optimization failed (continuing)"
+fi
+
 echo ""
 echo "🎉 Done!"
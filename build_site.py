@@ -3,15 +3,47 @@
 
 from __future__ import annotations
 
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import json
 import os
 import stat
 import shutil
 import subprocess
+import sys
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import ModuleType
+from typing import Callable
+
+from pdf_dedupe import canonical_pdfs
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency: pip install brotli
+    brotli = None
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 
+# The archive generator that ships with the repo; build_site imports it
+# rather than relying on an externally installed genlist command.
+GENLIST_INPUT = "music/scripts/GenList.py"
+GENLIST_SCRIPT = SCRIPT_DIR / GENLIST_INPUT
+
+# Input keys from the last successful run of each generation step.
+STAMP_FILE = SCRIPT_DIR / ".build_site_stamp.json"
+STAMP_VERSION = 1
+
 # Directories that contain content intended for deployment.
 PUBLISHABLE_ROOT_DIRS = {
     "amy",
@@ -48,6 +80,29 @@ PUBLISHABLE_EXTENSIONS = {
     ".config",
 }
 
+# Text files of at least PRECOMPRESS_MIN_BYTES get .gz (and .br) siblings in
+# _site for servers that serve precompressed files. The source hash each set
+# of siblings was made from is kept in PRECOMPRESS_CACHE_FILE.
+PRECOMPRESS_EXTENSIONS = {
+    ".html",
+    ".htm",
+    ".css",
+    ".js",
+    ".json",
+    ".xml",
+    ".txt",
+    ".svg",
+    ".chopro",
+    ".cho",
+    ".chordpro",
+}
+PRECOMPRESS_MIN_BYTES = 1024
+PRECOMPRESS_CACHE_FILE = SCRIPT_DIR / ".build_site_compressed.json"
+PRECOMPRESS_CACHE_VERSION = 1
+
+# Linux ioctl that clones file extents (btrfs, XFS, bcachefs, ...).
+FICLONE = 0x40049409
+
 SKIP_DIR_NAMES = {
     ".git",
     ".github",
@@ -76,7 +131,7 @@ def ignore_unpublishable(_directory: str, names: list[str]) -> set[str]:
                 ignored.add(name)
             continue
 
-        if not is_publishable_file(candidate):
+        if name.startswith(".") or not is_publishable_file(candidate):
             ignored.add(name)
 
     return ignored
@@ -87,73 +142,714 @@ def _remove_readonly(func, path, _excinfo) -> None:
     func(path)
 
 
-def run_command(command: list[str], description: str) -> None:
-    print(f"\n==> {description}")
-    print(" ".join(command))
-    subprocess.run(command, cwd=SCRIPT_DIR, check=True)
-
-
-def copy_site_tree() -> None:
+def iter_publishable_files() -> dict[str, Path]:
+    """Map each publishable file's site-relative POSIX path to its source."""
+    files: dict[str, Path] = {}
+    pending: list[tuple[str, str]] = []
+
+    with os.scandir(SCRIPT_DIR) as entries:
+        for entry in entries:
+            if entry.name in SKIP_DIR_NAMES or entry.name.startswith("."):
+                continue
+            if entry.is_dir():
+                if entry.name in PUBLISHABLE_ROOT_DIRS:
+                    pending.append((entry.path, entry.name))
+            elif entry.is_file() and is_publishable_file(Path(entry.name)):
+                files[entry.name] = Path(entry.path)
+
+    while pending:
+        directory, relative = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                child = f"{relative}/{entry.name}"
+                if entry.is_dir():
+                    if entry.name not in SKIP_DIR_NAMES:
+                        pending.append((entry.path, child))
+                elif entry.is_file() and is_publishable_file(Path(entry.name)):
+                    files[child] = Path(entry.path)
+
+    return files
+
+
+def iter_site_files(site_dir: Path) -> tuple[set[str], list[Path]]:
+    """Return the relative files and the directories currently under site_dir."""
+    files: set[str] = set()
+    directories: list[Path] = []
+    pending: list[tuple[str, str]] = [(str(site_dir), "")]
+
+    while pending:
+        directory, relative = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                child = f"{relative}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(Path(entry.path))
+                    pending.append((entry.path, f"{child}/"))
+                else:
+                    files.add(child)
+
+    return files, directories
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_unchanged(
+    source: Path,
+    source_stat: os.stat_result,
+    destination: Path,
+    destination_stat: os.stat_result,
+    checksum: bool,
+) -> bool:
+    if (source_stat.st_dev, source_stat.st_ino) == (
+        destination_stat.st_dev,
+        destination_stat.st_ino,
+    ):
+        return True
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if checksum:
+        return file_digest(source) == file_digest(destination)
+    # Whole-second comparison, like rsync, so filesystems with coarse
+    # timestamps do not force a recopy on every build.
+    return int(source_stat.st_mtime) == int(destination_stat.st_mtime)
+
+
+def remove_file(path: Path) -> None:
+    try:
+        path.unlink()
+    except PermissionError:
+        os.chmod(path, stat.S_IWRITE)
+        path.unlink()
+
+
+def reflink_file(source: Path, destination: Path) -> bool:
+    """Clone source into destination via FICLONE; False if unsupported."""
+    if fcntl is None:
+        return False
+    with source.open("rb") as src, destination.open("wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            ok = False
+        else:
+            ok = True
+    if ok:
+        shutil.copystat(source, destination)
+    else:
+        destination.unlink()
+    return ok
+
+
+def publish_file(source: Path, destination: Path, mode: str) -> str:
+    """Place source at destination using mode, falling back to a copy.
+
+    Returns the method actually used: "linked", "reflinked" or "copied".
+    """
+    if mode == "hardlink":
+        try:
+            os.link(source, destination)
+            return "linked"
+        except OSError:
+            pass
+    elif mode == "reflink" and reflink_file(source, destination):
+        return "reflinked"
+
+    shutil.copy2(source, destination)
+    return "copied"
+
+
+def compressed_suffixes() -> list[str]:
+    return [".gz", ".br"] if brotli is not None else [".gz"]
+
+
+def load_precompress_cache() -> dict[str, dict]:
+    try:
+        with PRECOMPRESS_CACHE_FILE.open(encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != PRECOMPRESS_CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_precompress_cache(files: dict[str, dict]) -> None:
+    temp_path = PRECOMPRESS_CACHE_FILE.with_name(PRECOMPRESS_CACHE_FILE.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        json.dump(
+            {"version": PRECOMPRESS_CACHE_VERSION, "files": files},
+            handle,
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+    os.replace(temp_path, PRECOMPRESS_CACHE_FILE)
+
+
+def precompress_file(
+    source: Path,
+    destination: Path,
+    suffixes: list[str],
+    entry: dict | None,
+) -> tuple[dict, bool]:
+    """Write compressed siblings of destination unless entry shows they are current.
+
+    Returns the cache entry for source and whether anything was compressed.
+    A sibling that would not be smaller than the file itself is not written.
+    """
+    info = source.stat()
+    current = (
+        entry is not None
+        and entry["formats"] == suffixes
+        and all(
+            destination.with_name(destination.name + suffix).exists()
+            for suffix in entry["written"]
+        )
+    )
+    if current and (entry["size"], entry["mtime_ns"]) == (info.st_size, info.st_mtime_ns):
+        return entry, False
+
+    digest = file_digest(source)
+    fresh = {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "hash": digest}
+    if current and entry["hash"] == digest:
+        return {**entry, **fresh}, False
+
+    data = source.read_bytes()
+    written = []
+    for suffix in suffixes:
+        sibling = destination.with_name(destination.name + suffix)
+        if suffix == ".gz":
+            packed = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            packed = brotli.compress(data, quality=11)
+        if len(packed) >= len(data):
+            if sibling.exists():
+                remove_file(sibling)
+            continue
+        temp_path = sibling.with_name(sibling.name + ".tmp")
+        temp_path.write_bytes(packed)
+        os.replace(temp_path, sibling)
+        written.append(suffix)
+    return {**fresh, "formats": suffixes, "written": written}, True
+
+
+def precompress_site(site_dir: Path, sources: dict[str, Path]) -> tuple[set[str], int]:
+    """Refresh compressed siblings of the text files in _site, in parallel.
+
+    Returns the site-relative paths of every sibling that should be kept and
+    the number of files that were compressed again.
+    """
+    suffixes = compressed_suffixes()
+    cached = load_precompress_cache()
+    candidates = {
+        relative: source
+        for relative, source in sources.items()
+        if Path(relative).suffix.lower() in PRECOMPRESS_EXTENSIONS
+        and source.stat().st_size >= PRECOMPRESS_MIN_BYTES
+    }
+
+    with ThreadPoolExecutor() as pool:
+        results = pool.map(
+            lambda relative: precompress_file(
+                candidates[relative], site_dir / relative, suffixes, cached.get(relative)
+            ),
+            candidates,
+        )
+        entries = {}
+        compressed = 0
+        for relative, (entry, changed) in zip(candidates, results):
+            entries[relative] = entry
+            compressed += changed
+
+    if entries != cached:
+        save_precompress_cache(entries)
+    siblings = {
+        f"{relative}{suffix}" for relative, entry in entries.items() for suffix in entry["written"]
+    }
+    return siblings, compressed
+
+
+@dataclass
+class BuildStep:
+    """One generation command plus the files it reads and writes.
+
+    inputs are glob patterns relative to SCRIPT_DIR; after names the steps
+    that must finish first. When entry_point is set the step runs in this
+    process as entry_point(command[1:]) instead of as a subprocess.
+    """
+
+    name: str
+    description: str
+    command: list[str]
+    inputs: list[str]
+    outputs: list[str] = field(default_factory=list)
+    after: list[str] = field(default_factory=list)
+    entry_point: Callable[[list[str]], int] | None = None
+
+
+def load_stamps() -> dict[str, str]:
+    try:
+        with STAMP_FILE.open(encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != STAMP_VERSION:
+        return {}
+    return data.get("steps", {})
+
+
+def save_stamps(stamps: dict[str, str]) -> None:
+    temp_path = STAMP_FILE.with_name(STAMP_FILE.name + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        json.dump({"version": STAMP_VERSION, "steps": stamps}, handle, indent=2)
+    os.replace(temp_path, STAMP_FILE)
+
+
+def step_key(step: BuildStep) -> str:
+    """Hash the command plus the path, size and mtime of every input file."""
+    digest = hashlib.sha1("\0".join(step.command).encode("utf-8"))
+    seen: set[Path] = set()
+    for pattern in step.inputs:
+        for path in SCRIPT_DIR.glob(pattern):
+            if path in seen or not path.is_file():
+                continue
+            seen.add(path)
+    for path in sorted(seen):
+        info = path.stat()
+        relative = path.relative_to(SCRIPT_DIR).as_posix()
+        entry = f"{relative}\0{info.st_size}\0{info.st_mtime_ns}\n"
+        digest.update(entry.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_genlist() -> ModuleType:
+    spec = importlib.util.spec_from_file_location("GenList", GENLIST_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_genlist(argv: list[str]) -> int:
+    return load_genlist().main(argv)
+
+
+def run_step(step: BuildStep) -> str:
+    """Run a step with its output captured so parallel logs stay readable.
+
+    In-process steps print directly, so their output is not captured.
+    """
+    if step.entry_point is not None:
+        try:
+            returncode = step.entry_point(step.command[1:])
+        except SystemExit as error:
+            returncode = error.code
+        except Exception:
+            # Fail this step like a crashed subprocess, so the other running
+            # steps still finish and record their stamps
+            traceback.print_exc()
+            returncode = 1
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, step.command)
+        return ""
+
+    result = subprocess.run(
+        step.command,
+        cwd=SCRIPT_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, step.command, output=result.stdout
+        )
+    return result.stdout
+
+
+def run_steps(
+    steps: list[BuildStep],
+    jobs: int | None = None,
+    force: bool = False,
+) -> None:
+    """Run steps concurrently in dependency order, skipping up-to-date ones.
+
+    A step is up to date when its input key matches the stamp recorded after
+    its last successful run and all of its outputs still exist.
+    """
+    by_name = {step.name: step for step in steps}
+    for step in steps:
+        unknown = [name for name in step.after if name not in by_name]
+        if unknown:
+            raise ValueError(f"Step {step.name!r} waits on unknown steps: {unknown}")
+
+    stamps = {} if force else load_stamps()
+    pending = {step.name: set(step.after) for step in steps}
+    failed: list[str] = []
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+
+        while pending or running:
+            ready = [name for name, waits in pending.items() if not waits]
+            while ready and not failed:
+                name = ready.pop(0)
+                del pending[name]
+                step = by_name[name]
+                outputs_exist = all((SCRIPT_DIR / out).exists() for out in step.outputs)
+                if outputs_exist and stamps.get(name) == step_key(step):
+                    print(f"\n==> {step.description} (up to date, skipped)")
+                    for other, waits in pending.items():
+                        if name in waits:
+                            waits.discard(name)
+                            if not waits:
+                                ready.append(other)
+                    continue
+                print(f"\n==> {step.description} (started)")
+                print(" ".join(step.command))
+                running[pool.submit(run_step, step)] = step
+
+            if not running:
+                if pending and not failed:
+                    raise ValueError(f"Dependency cycle among steps: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                print(f"\n==> {step.description} (finished)")
+                try:
+                    output = future.result()
+                except subprocess.CalledProcessError as error:
+                    if error.output:
+                        print(error.output, end="")
+                    print(f"❌ {step.name} failed with exit code {error.returncode}")
+                    failed.append(step.name)
+                    continue
+                if output:
+                    print(output, end="")
+                # Re-key after the run so a step that rewrites its own
+                # inputs (urltxt) is not considered stale next time.
+                stamps[step.name] = step_key(step)
+                save_stamps(stamps)
+                for waits in pending.values():
+                    waits.discard(step.name)
+
+    if failed:
+        raise SystemExit(f"Build steps failed: {', '.join(failed)}")
+
+
+def copy_site_tree(
+    clean: bool = False,
+    checksum: bool = False,
+    link_threshold: int | None = None,
+    mode: str = "copy",
+    precompress: bool = True,
+) -> None:
+    """Sync the publishable tree into _site, touching only what changed.
+
+    Files are compared by size and modification time (or by content hash
+    when checksum is set). mode picks how changed files are placed: "copy",
+    "hardlink" or "reflink", each falling back to a copy when the
+    filesystem refuses. In copy mode, files at or above link_threshold
+    bytes are still hardlinked. PDFs that are byte-identical to another
+    published PDF are hardlinked to its copy in _site whatever the mode.
+    With precompress, text files also get .gz (and .br) siblings.
+    """
     site_dir = SCRIPT_DIR / "_site"
-    if site_dir.exists():
+    if clean and site_dir.exists():
         shutil.rmtree(site_dir, onexc=_remove_readonly)
-    site_dir.mkdir()
-
-    for entry in SCRIPT_DIR.iterdir():
-        if entry.name in SKIP_DIR_NAMES:
-            continue
-
-        if entry.is_dir() and entry.name not in PUBLISHABLE_ROOT_DIRS:
+    site_dir.mkdir(exist_ok=True)
+
+    sources = iter_publishable_files()
+    duplicates = {
+        relative: canonical
+        for relative, canonical in canonical_pdfs(SCRIPT_DIR).items()
+        if relative in sources and canonical in sources
+    }
+    existing, directories = iter_site_files(site_dir)
+    counts = {"copied": 0, "linked": 0, "reflinked": 0}
+    unchanged = deleted = deduplicated = 0
+
+    for relative, source in sources.items():
+        if relative in duplicates:
             continue
-
-        if entry.is_file() and not is_publishable_file(entry):
-            continue
-
-        destination = site_dir / entry.name
-        if entry.is_dir():
-            shutil.copytree(entry, destination, ignore=ignore_unpublishable)
+        destination = site_dir / relative
+        source_stat = source.stat()
+
+        if relative in existing:
+            destination_stat = destination.stat()
+            # An unchanged copy left by an earlier copy-mode build is still
+            # swapped for a link so the footprint shrinks on the next run.
+            relink = (
+                mode == "hardlink"
+                and source_stat.st_dev == destination_stat.st_dev
+                and source_stat.st_ino != destination_stat.st_ino
+            )
+            if not relink and is_unchanged(
+                source, source_stat, destination, destination_stat, checksum
+            ):
+                unchanged += 1
+                continue
+            # Never write through an old hardlink into the source tree.
+            remove_file(destination)
         else:
-            shutil.copy2(entry, destination)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+
+        file_mode = mode
+        if (
+            mode == "copy"
+            and link_threshold is not None
+            and source_stat.st_size >= link_threshold
+        ):
+            file_mode = "hardlink"
+        counts[publish_file(source, destination, file_mode)] += 1
+
+    # Duplicates go after every canonical copy is in place.
+    for relative, canonical in duplicates.items():
+        destination = site_dir / relative
+        target = site_dir / canonical
+        if relative in existing:
+            destination_stat = destination.stat()
+            target_stat = target.stat()
+            if (destination_stat.st_dev, destination_stat.st_ino) == (
+                target_stat.st_dev,
+                target_stat.st_ino,
+            ):
+                unchanged += 1
+                continue
+            remove_file(destination)
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            os.link(target, destination)
+            deduplicated += 1
+        except OSError:
+            counts[publish_file(sources[relative], destination, mode)] += 1
+
+    siblings: set[str] = set()
+    compressed = 0
+    if precompress:
+        siblings, compressed = precompress_site(site_dir, sources)
+
+    for relative in existing - sources.keys() - siblings:
+        remove_file(site_dir / relative)
+        deleted += 1
+
+    # Deepest directories first so emptied parents can be removed too.
+    for directory in sorted(directories, key=lambda p: len(p.parts), reverse=True):
+        try:
+            directory.rmdir()
+        except OSError:
+            pass
 
     print(f"\n==> Prepared site output in {site_dir}")
-
-
-def main() -> int:
-    run_command(
-        [
-            "genlist",
-            "music",
-            "ukulele-song-archive.html",
-            "--intro",
-            "--no-genPDF",
-            "--no-html",
-        ],
-        "Generate ukulele-song-archive.html",
+    print(
+        f"    {counts['copied']} copied, {counts['linked']} linked, "
+        f"{counts['reflinked']} reflinked, {deduplicated} deduplicated, "
+        f"{unchanged} unchanged, {deleted} deleted"
     )
-
-    run_command(
-        [
-            "genlist",
-            "music/XmasSongbook",
-            "xmas-songbook.html",
-            "--intro",
-            "--no-genPDF",
-            "--no-html",
-        ],
-        "Generate xmas-songbook.html",
+    if precompress:
+        print(
+            f"    {len(siblings)} precompressed siblings "
+            f"({', '.join(compressed_suffixes())}); {compressed} files recompressed"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Delete _site before syncing instead of updating it in place",
     )
-
-    run_command(
-        ["python", "create_urltxt_files.py"],
-        "Generate or update .urltxt files",
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="Compare files by content hash instead of size and mtime",
     )
-
-    run_command(
-        ["python", "generate_sitemap.py"],
-        "Generate sitemap.xml",
+    parser.add_argument(
+        "--link-threshold",
+        type=float,
+        metavar="MB",
+        help="Hardlink files of at least this many megabytes instead of copying",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run every generation step even if its inputs are unchanged",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="Maximum number of generation steps to run at once",
     )
+    parser.add_argument(
+        "--publish-mode",
+        choices=("copy", "hardlink", "reflink"),
+        default="copy",
+        help=(
+            "How changed files are placed in _site; hardlink and reflink "
+            "fall back to copying across devices or unsupported filesystems"
+        ),
+    )
+    parser.add_argument(
+        "--no-precompress",
+        dest="precompress",
+        action="store_false",
+        help="Do not write .gz/.br siblings of text files in _site",
+    )
+    return parser.parse_args()
+
+
+def build_steps() -> list[BuildStep]:
+    return [
+        BuildStep(
+            name="difficulty",
+            description="Score song difficulty",
+            command=[
+                sys.executable,
+                "find_easy_songs.py",
+                "--path",
+                "music",
+                "--no-markers",
+                "--difficulty",
+                "song-difficulty.json",
+            ],
+            inputs=["find_easy_songs.py", "chordpro_parser.py", "music/**/*.chopro", "music/**/*.cho"],
+            outputs=["song-difficulty.json"],
+        ),
+        BuildStep(
+            name="urltxt",
+            description="Generate or update .urltxt files",
+            command=[sys.executable, "create_urltxt_files.py"],
+            inputs=[
+                "create_urltxt_files.py",
+                "chordpro_parser.py",
+                "music/scripts/VideoIndex History.html",
+                "music/ChordPro/**/*.chopro",
+                "music/ChordPro/**/*.urltxt",
+            ],
+        ),
+        BuildStep(
+            name="previews",
+            description="Render PDF preview images",
+            command=[sys.executable, "pdf_previews.py", "--prune"],
+            inputs=["pdf_previews.py", "pdf_dedupe.py", "music/**/*.pdf"],
+            outputs=["assets/previews"],
+        ),
+        BuildStep(
+            name="archive",
+            description="Generate ukulele-song-archive.html",
+            command=[
+                "GenList.py",
+                "music",
+                "ukulele-song-archive.html",
+                "--intro",
+                "--no-genPDF",
+                "--no-html",
+            ],
+            inputs=[
+                GENLIST_INPUT,
+                "pdf_dedupe.py",
+                "pdf_previews.py",
+                "HTMLheader.txt",
+                "music/**/*",
+                "assets/previews/*.webp",
+                "song-difficulty.json",
+            ],
+            outputs=["ukulele-song-archive.html"],
+            entry_point=run_genlist,
+            after=["difficulty", "urltxt", "previews"],
+        ),
+        BuildStep(
+            name="xmas",
+            description="Generate xmas-songbook.html",
+            command=[
+                "GenList.py",
+                "music/XmasSongbook",
+                "xmas-songbook.html",
+                "--intro",
+                "--no-genPDF",
+                "--no-html",
+            ],
+            inputs=[
+                GENLIST_INPUT,
+                "pdf_dedupe.py",
+                "pdf_previews.py",
+                "HTMLheader.txt",
+                "music/XmasSongbook/**/*",
+                "assets/previews/*.webp",
+                "song-difficulty.json",
+            ],
+            outputs=["xmas-songbook.html"],
+            entry_point=run_genlist,
+            after=["difficulty", "previews"],
+        ),
+        BuildStep(
+            name="images",
+            description="Generate responsive image variants",
+            command=[sys.executable, "responsive_images.py", "--prune"],
+            inputs=[
+                "responsive_images.py",
+                "*.html",
+                "amy/**/*.html",
+                "includes/**/*.html",
+                "music/scripts/*.html",
+                "*.png",
+                "*.jpg",
+                "*.webp",
+                "assets/*",
+            ],
+            outputs=["assets/responsive"],
+            after=["archive", "xmas"],
+        ),
+        BuildStep(
+            name="sitemap",
+            description="Generate sitemap.xml",
+            command=[sys.executable, "generate_sitemap.py"],
+            inputs=[
+                "generate_sitemap.py",
+                "pdf_dedupe.py",
+                "*.html",
+                "amy/**/*.html",
+                "includes/**/*.html",
+                "music/**/*",
+            ],
+            outputs=["sitemap.xml"],
+            after=["archive", "xmas", "urltxt", "images"],
+        ),
+    ]
+
 
-    copy_site_tree()
+def main() -> int:
+    args = parse_args()
+    # In-process steps such as GenList resolve paths against the cwd.
+    os.chdir(SCRIPT_DIR)
+
+    run_steps(build_steps(), jobs=args.jobs, force=args.force)
+
+    link_threshold = None
+    if args.link_threshold is not None:
+        link_threshold = int(args.link_threshold * 1024 * 1024)
+
+    copy_site_tree(
+        clean=args.clean,
+        checksum=args.checksum,
+        link_threshold=link_threshold,
+        mode=args.publish_mode,
+        precompress=args.precompress,
+    )
     return 0
 
 
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""Shared ChordPro parser with an on-disk cache of parsed songs.
+
+A song is parsed once into a compact SongAST: one kind code and one text
+per source line, the directives and sections with their line numbers, and
+every [chord] as parallel arrays of (chord, line, column) offsets into the
+chord-free lyric text. find_easy_songs.py, create_urltxt_files.py and
+chordpro_pdf.py all read songs through this module.
+
+Parsed songs are kept in .chordpro_ast_cache.json keyed by the SHA-1 of
+the file contents, so a song is only parsed again after it changes.
+Running the module directly parses a folder and refreshes the cache.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CACHE_FILE = ".chordpro_ast_cache.json"
+CACHE_VERSION = 1
+# Entries no tool has asked for in this many days are dropped on save.
+CACHE_MAX_AGE_DAYS = 30
+CHORDPRO_EXTENSIONS = {".chopro", ".cho"}
+
+DIRECTIVE_PATTERN = re.compile(r"^\{\s*([A-Za-z_-]+)(?:\s*:\s*|\s+|(?=\s*\}))(.*?)\s*\}\s*$")
+CHORD_PATTERN = re.compile(r"\[([^\]]*)\]")
+
+DIRECTIVE_ALIASES = {
+    "t": "title",
+    "st": "subtitle",
+    "c": "comment",
+    "ci": "comment_italic",
+    "cb": "comment_box",
+    "soc": "start_of_chorus",
+    "eoc": "end_of_chorus",
+    "sov": "start_of_verse",
+    "eov": "end_of_verse",
+    "sob": "start_of_bridge",
+    "eob": "end_of_bridge",
+    "sot": "start_of_tab",
+    "eot": "end_of_tab",
+    "sog": "start_of_grid",
+    "eog": "end_of_grid",
+    "np": "new_page",
+    "textcolor": "textcolour",
+}
+
+# One code per source line in SongAST.kinds.
+LYRICS = "l"
+EMPTY = "e"
+DIRECTIVE = "d"
+REMARK = "#"
+TAB = "t"
+UNPARSED = "?"  # starts with "{" but is not a well-formed directive
+
+
+@dataclass
+class SongAST:
+    """Parsed structure of one ChordPro song.
+
+    lines[i] is the source line without its [chord] markup for lyric lines
+    and the raw line otherwise. chord_index, chord_line and chord_column
+    are parallel arrays: chord k is chords[chord_index[k]], placed before
+    column chord_column[k] of lines[chord_line[k]].
+    """
+
+    kinds: str = ""
+    lines: list[str] = field(default_factory=list)
+    directives: list[tuple[int, str, str]] = field(default_factory=list)
+    sections: list[tuple[str, int, int]] = field(default_factory=list)
+    chords: list[str] = field(default_factory=list)
+    chord_index: array = field(default_factory=lambda: array("H"))
+    chord_line: array = field(default_factory=lambda: array("I"))
+    chord_column: array = field(default_factory=lambda: array("I"))
+
+    def values(self, name: str) -> list[str]:
+        """Values of every directive with this (canonical) name, in order."""
+        return [value for _, directive, value in self.directives if directive == name]
+
+    @property
+    def title(self) -> str | None:
+        titles = self.values("title")
+        return titles[0] if titles else None
+
+    def chord_names(self) -> list[str]:
+        """Every chord occurrence in song order."""
+        return [self.chords[index] for index in self.chord_index]
+
+    def line_chords(self) -> dict[int, list[tuple[str, int]]]:
+        """Map line number -> [(chord, column), ...] for lines that carry chords."""
+        placed: dict[int, list[tuple[str, int]]] = {}
+        for index, line, column in zip(self.chord_index, self.chord_line, self.chord_column):
+            placed.setdefault(line, []).append((self.chords[index], column))
+        return placed
+
+    def to_json(self) -> dict:
+        return {
+            "kinds": self.kinds,
+            "lines": self.lines,
+            "directives": self.directives,
+            "sections": self.sections,
+            "chords": self.chords,
+            "chord_index": self.chord_index.tolist(),
+            "chord_line": self.chord_line.tolist(),
+            "chord_column": self.chord_column.tolist(),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> SongAST:
+        return cls(
+            kinds=data["kinds"],
+            lines=data["lines"],
+            directives=[tuple(entry) for entry in data["directives"]],
+            sections=[tuple(entry) for entry in data["sections"]],
+            chords=data["chords"],
+            chord_index=array("H", data["chord_index"]),
+            chord_line=array("I", data["chord_line"]),
+            chord_column=array("I", data["chord_column"]),
+        )
+
+
+def parse_text(text: str) -> SongAST:
+    """Parse ChordPro source into a SongAST. Never raises on odd input."""
+    song = SongAST()
+    kinds = []
+    chord_numbers: dict[str, int] = {}
+    open_sections: dict[str, int] = {}
+    tab = False
+
+    for number, line in enumerate(text.lstrip("\ufeff").splitlines()):
+        stripped = line.strip()
+
+        if stripped.startswith("#"):
+            kinds.append(REMARK)
+            song.lines.append(line)
+            continue
+
+        match = DIRECTIVE_PATTERN.match(stripped) if stripped.startswith("{") else None
+        if match:
+            name = match.group(1).lower()
+            name = DIRECTIVE_ALIASES.get(name, name)
+            song.directives.append((number, name, (match.group(2) or "").strip()))
+            if name.startswith("start_of_"):
+                open_sections.setdefault(name[len("start_of_"):], number)
+            elif name.startswith("end_of_"):
+                kind = name[len("end_of_"):]
+                if kind in open_sections:
+                    song.sections.append((kind, open_sections.pop(kind), number))
+            tab = "tab" in open_sections
+            kinds.append(DIRECTIVE)
+            song.lines.append(line)
+            continue
+
+        if stripped.startswith("{"):
+            kinds.append(UNPARSED)
+            song.lines.append(line)
+        elif tab:
+            kinds.append(TAB)
+            song.lines.append(line)
+        elif not stripped:
+            kinds.append(EMPTY)
+            song.lines.append(line)
+        else:
+            kinds.append(LYRICS)
+            pieces = []
+            position = 0
+            column = 0
+            for chord_match in CHORD_PATTERN.finditer(line):
+                piece = line[position:chord_match.start()]
+                pieces.append(piece)
+                column += len(piece)
+                chord = chord_match.group(1).strip()
+                if chord not in chord_numbers:
+                    chord_numbers[chord] = len(song.chords)
+                    song.chords.append(chord)
+                song.chord_index.append(chord_numbers[chord])
+                song.chord_line.append(number)
+                song.chord_column.append(column)
+                position = chord_match.end()
+            pieces.append(line[position:])
+            song.lines.append("".join(pieces))
+
+    # Sections left open run to the end of the song.
+    for kind, start in open_sections.items():
+        song.sections.append((kind, start, len(kinds) - 1))
+    song.sections.sort(key=lambda section: section[1])
+    song.kinds = "".join(kinds)
+    return song
+
+
+def parse_file(path: Path) -> SongAST:
+    """Parse a UTF-8 ChordPro file without the cache."""
+    return parse_text(Path(path).read_text(encoding="utf-8"))
+
+
+class ParseCache:
+    """Content-hash -> SongAST cache shared by every tool that reads songs.
+
+    The cache file is only read once a song is actually requested, so a
+    tool whose own results are already cached never pays for it. save()
+    holds a lock file while it merges with whatever another tool wrote in
+    the meantime, then drops entries that have not been used for
+    CACHE_MAX_AGE_DAYS.
+    """
+
+    def __init__(self, path: Path | None = SCRIPT_DIR / CACHE_FILE) -> None:
+        self.path = path
+        self.today = int(time.time() // 86400)
+        self._entries: dict[str, dict] | None = None
+        self._parsed: dict[str, SongAST] = {}
+        self._touched: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(raw: bytes) -> str:
+        return hashlib.sha1(raw).hexdigest()
+
+    def _load(self) -> dict[str, dict]:
+        if self.path is None:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != CACHE_VERSION:
+            return {}
+        return data.get("songs", {})
+
+    def parse_bytes(self, raw: bytes, digest: str | None = None) -> SongAST:
+        """Parse UTF-8 file contents, reusing the cached AST for known content.
+
+        Raises UnicodeDecodeError for files that are not UTF-8.
+        """
+        digest = digest or self.digest(raw)
+        if digest in self._parsed:
+            return self._parsed[digest]
+        if self._entries is None:
+            self._entries = self._load()
+
+        entry = self._entries.get(digest)
+        if entry is not None:
+            song = SongAST.from_json(entry["ast"])
+            self.hits += 1
+            if entry.get("used") != self.today:
+                self._touched.add(digest)
+        else:
+            song = parse_text(raw.decode("utf-8"))
+            self._entries[digest] = {"ast": song.to_json()}
+            self._touched.add(digest)
+            self.misses += 1
+        self._parsed[digest] = song
+        return song
+
+    def parse_file(self, path: Path) -> SongAST:
+        with open(path, "rb") as f:
+            return self.parse_bytes(f.read())
+
+    def save(self) -> None:
+        """Write new or re-used entries back to disk (atomic; no-op if unchanged)."""
+        if self.path is None or not self._touched:
+            return
+        try:
+            with open(self.path.with_name(self.path.name + ".lock"), "w") as lock:
+                # Tools running side by side (see build_site.py) take turns,
+                # so neither drops the entries the other just wrote
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                self._merge_and_write()
+        except OSError as e:
+            print(f"⚠️ Could not write {self.path}: {e}", file=sys.stderr)
+        self._touched.clear()
+
+    def _merge_and_write(self) -> None:
+        entries = self._load()
+        for digest in self._touched:
+            entry = entries.get(digest) or self._entries[digest]
+            entry["used"] = self.today
+            entries[digest] = entry
+        entries = {
+            digest: entry
+            for digest, entry in entries.items()
+            if self.today - entry.get("used", self.today) <= CACHE_MAX_AGE_DAYS
+        }
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "songs": entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+def find_chordpro_files(paths: list[Path]) -> list[Path]:
+    """ChordPro files named directly or found under the given folders, sorted."""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(p for p in path.rglob("*") if p.suffix.lower() in CHORDPRO_EXTENSIONS)
+        elif path.suffix.lower() in CHORDPRO_EXTENSIONS:
+            files.append(path)
+    return sorted(files)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", type=Path, default=[SCRIPT_DIR / "music"],
+                        help="ChordPro files or folders to parse (default: music)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Parse every file and leave {CACHE_FILE} untouched")
+    args = parser.parse_args()
+
+    cache = ParseCache(None if args.no_cache else SCRIPT_DIR / CACHE_FILE)
+    files = find_chordpro_files(args.paths)
+    errors = 0
+    chords = 0
+    for path in files:
+        try:
+            chords += len(cache.parse_file(path).chord_index)
+        except (OSError, UnicodeDecodeError) as e:
+            errors += 1
+            print(f"  ❌ {path}: {e}")
+    cache.save()
+
+    print(f"📊 {len(files)} songs, {chords} chords placed; "
+          f"{cache.hits} cached, {cache.misses} parsed, {errors} errors")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,717 @@
+#!/usr/bin/env python3
+"""Render ChordPro songs to PDF in-process with fpdf2.
+
+This is a fast path for the subset of ChordPro the archive actually uses:
+{title}/{t}, {subtitle}/{st}, inline [chord] lyrics, {textcolour},
+comments, chorus/verse/tab blocks, {define} and ukulele chord diagrams on
+top. The layout follows the --define settings GenList.py and
+.github/scripts/generate-pdfs.sh pass to the Perl chordpro tool, which
+remains the reference renderer: songs that use anything outside the
+subset are reported as unsupported and, with --fallback, handed to it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from chordpro_parser import (
+    DIRECTIVE,
+    EMPTY,
+    LYRICS,
+    REMARK,
+    TAB,
+    ParseCache,
+    SongAST,
+    find_chordpro_files,
+    parse_text,
+)
+from fix_encoding import CHAR_NAMES, REPLACEMENTS
+
+try:
+    from fpdf import FPDF
+except ImportError:  # optional dependency: pip install fpdf2
+    FPDF = None
+
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Mirrors the --define list used with the Perl renderer (values in points).
+PAGE_SETTINGS = {
+    "margintop": 70,
+    "marginbottom": 0,
+    "marginleft": 20,
+    "marginright": 20,
+    "headspace": 50,
+    "footspace": 10,
+    "head_first_only": True,
+}
+
+# Perl chordpro arguments used when a song falls back to the reference tool.
+PERL_CHORDPRO_COMMAND = [
+    "chordpro",
+    "--config=Ukulele",
+    "--config=Ukulele-ly",
+    "--define=pdf:diagrams:show=top",
+    "--define=settings:inline-chords=true",
+    "--define=pdf:margintop=70",
+    "--define=pdf:marginbottom=0",
+    "--define=pdf:marginleft=20",
+    "--define=pdf:marginright=20",
+    "--define=pdf:headspace=50",
+    "--define=pdf:footspace=10",
+    "--define=pdf:head-first-only=true",
+    "--define=pdf:fonts:chord:color=red",
+    "--text-font=helvetica",
+    "--chord-font=helvetica",
+]
+
+TITLE_FONT = ("Times", "B", 14)
+SUBTITLE_FONT = ("Times", "", 12)
+TEXT_FONT = ("Helvetica", "", 12)
+CHORD_FONT = ("Helvetica", "", 12)
+COMMENT_FONT = ("Helvetica", "", 12)
+TAB_FONT = ("Courier", "", 10)
+LINE_SPACING = 1.2
+CHORD_COLOR = (255, 0, 0)
+COMMENT_BACKGROUND = (229, 229, 229)
+CHORUS_INDENT = 12
+
+NAMED_COLORS = {
+    "black": (0, 0, 0),
+    "blue": (0, 0, 255),
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "grey": (128, 128, 128),
+    "gray": (128, 128, 128),
+    "purple": (128, 0, 128),
+    "orange": (255, 165, 0),
+}
+
+# "{name: value}", "{name value}" and "{name}" are all accepted by chordpro.
+CHORD_NAME_PATTERN = re.compile(r"^([A-G])([#b]?)([^/]*)(?:/([A-G][#b]?))?$")
+
+# Typographic punctuation the standard PDF fonts cannot encode, mapped the same
+# way fix_encoding.py normalizes it in the source files.
+TYPOGRAPHIC_TABLE = str.maketrans({char: REPLACEMENTS[char] for char in CHAR_NAMES})
+
+# Metadata that the reference layout does not print.
+IGNORED_DIRECTIVES = {
+    "key",
+    "time",
+    "tempo",
+    "duration",
+    "book",
+    "keywords",
+    "artist",
+    "composer",
+    "lyricist",
+    "meta",
+    "year",
+    "album",
+    "copyright",
+    "capo",
+    "pitch",
+}
+
+SUPPORTED_DIRECTIVES = IGNORED_DIRECTIVES | {
+    "title",
+    "subtitle",
+    "comment",
+    "comment_italic",
+    "comment_box",
+    "start_of_chorus",
+    "end_of_chorus",
+    "start_of_verse",
+    "end_of_verse",
+    "start_of_tab",
+    "end_of_tab",
+    "new_page",
+    "textcolour",
+    "define",
+}
+
+NOTE_PITCHES = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
+
+# Intervals per chord quality; a perfect fifth is optional on four strings.
+CHORD_QUALITIES = {
+    "": (0, 4, 7),
+    "maj": (0, 4, 7),
+    "m": (0, 3, 7),
+    "min": (0, 3, 7),
+    "7": (0, 4, 7, 10),
+    "m7": (0, 3, 7, 10),
+    "min7": (0, 3, 7, 10),
+    "maj7": (0, 4, 7, 11),
+    "M7": (0, 4, 7, 11),
+    "6": (0, 4, 7, 9),
+    "m6": (0, 3, 7, 9),
+    "9": (0, 4, 10, 2),
+    "add9": (0, 4, 7, 2),
+    "sus": (0, 5, 7),
+    "sus4": (0, 5, 7),
+    "sus2": (0, 2, 7),
+    "7sus4": (0, 5, 7, 10),
+    "dim": (0, 3, 6),
+    "dim7": (0, 3, 6, 9),
+    "m7b5": (0, 3, 6, 10),
+    "aug": (0, 4, 8),
+    "+": (0, 4, 8),
+    "5": (0, 7),
+}
+
+# Standard GCEA fingerings for the chords most songs use; anything else is
+# voiced by find_voicing().
+COMMON_SHAPES = {
+    "C": (0, 0, 0, 3), "C7": (0, 0, 0, 1), "Cm": (0, 3, 3, 3), "Cmaj7": (0, 0, 0, 2),
+    "Cm7": (3, 3, 3, 3), "C6": (0, 0, 0, 0),
+    "D": (2, 2, 2, 0), "D7": (2, 2, 2, 3), "Dm": (2, 2, 1, 0), "Dm7": (2, 2, 1, 3),
+    "E": (1, 4, 0, 2), "E7": (1, 2, 0, 2), "Em": (0, 4, 3, 2), "Em7": (0, 2, 0, 2),
+    "F": (2, 0, 1, 0), "F7": (2, 3, 1, 3), "Fm": (1, 0, 1, 3), "Fmaj7": (2, 4, 1, 3),
+    "G": (0, 2, 3, 2), "G7": (0, 2, 1, 2), "Gm": (0, 2, 3, 1), "Gmaj7": (0, 2, 2, 2),
+    "Gm7": (0, 2, 1, 1), "G6": (0, 2, 0, 2),
+    "A": (2, 1, 0, 0), "A7": (0, 1, 0, 0), "Am": (2, 0, 0, 0), "Am7": (0, 0, 0, 0),
+    "Amaj7": (1, 1, 0, 0),
+    "B": (4, 3, 2, 2), "B7": (2, 3, 2, 2), "Bm": (4, 2, 2, 2), "Bm7": (2, 2, 2, 2),
+    "Bb": (3, 2, 1, 1), "Bb7": (1, 2, 1, 1), "Bbm": (3, 1, 1, 1),
+    "Eb": (0, 3, 3, 1), "F#m": (2, 1, 2, 0), "C#m": (1, 1, 0, 4),
+}
+
+UKULELE_STRINGS = (7, 0, 4, 9)  # G C E A
+DIAGRAM_FRETS = 4
+
+
+class UnsupportedSong(Exception):
+    """The song uses ChordPro features outside what this renderer handles."""
+
+
+@dataclass
+class Segment:
+    chord: str | None
+    text: str
+
+
+@dataclass
+class SongLine:
+    kind: str  # "lyrics", "comment", "comment_italic", "comment_box", "tab", "empty", "new_page"
+    segments: list[Segment] = field(default_factory=list)
+    text: str = ""
+    color: tuple[int, int, int] | None = None
+    chorus: bool = False
+
+
+@dataclass
+class Song:
+    title: str = ""
+    subtitles: list[str] = field(default_factory=list)
+    lines: list[SongLine] = field(default_factory=list)
+    chords: list[str] = field(default_factory=list)
+    defines: dict[str, tuple[int, tuple[int | None, ...]]] = field(default_factory=dict)
+
+
+def parse_color(value: str | None) -> tuple[int, int, int] | None:
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in NAMED_COLORS:
+        return NAMED_COLORS[value]
+    if re.fullmatch(r"#[0-9a-f]{6}", value):
+        return tuple(int(value[i:i + 2], 16) for i in (1, 3, 5))
+    raise UnsupportedSong(f"colour {value!r}")
+
+
+def parse_define(value: str) -> tuple[str, int, tuple[int | None, ...]]:
+    """Parse '{define: Name [base-fret N] frets a b c d [fingers ...]}'."""
+    words = value.split()
+    if "frets" not in words:
+        raise UnsupportedSong(f"define without frets: {value!r}")
+    name = words[0]
+    base_fret = 1
+    if "base-fret" in words:
+        position = words.index("base-fret") + 1
+        if position >= len(words) or not words[position].isdigit():
+            raise UnsupportedSong(f"define without a base-fret number: {value!r}")
+        base_fret = int(words[position])
+    start = words.index("frets") + 1
+    frets = []
+    for word in words[start:start + len(UKULELE_STRINGS)]:
+        if word.lower() in ("x", "-1", "n"):
+            frets.append(None)
+        elif word.isdigit():
+            frets.append(int(word))
+        else:
+            raise UnsupportedSong(f"define with fret {word!r}: {value!r}")
+    if len(frets) != len(UKULELE_STRINGS):
+        raise UnsupportedSong(f"define for {len(frets)} strings: {value!r}")
+    return name, base_fret, tuple(frets)
+
+
+def line_segments(text: str, placed: list[tuple[str, int]]) -> list[Segment]:
+    """Split chord-free lyric text at the columns its chords were placed."""
+    if not placed:
+        return [Segment(None, text)]
+    segments = []
+    if placed[0][1] > 0:
+        segments.append(Segment(None, text[:placed[0][1]]))
+    ends = [column for _, column in placed[1:]] + [len(text)]
+    for (chord, column), end in zip(placed, ends):
+        segments.append(Segment(chord, text[column:end]))
+    return segments
+
+
+def build_song(ast: SongAST) -> Song:
+    """Lay out a parsed song, raising UnsupportedSong outside the subset."""
+    song = Song()
+    color = None
+    chorus = False
+    seen_chords: set[str] = set()
+    directives = {number: (name, value) for number, name, value in ast.directives}
+    placed = ast.line_chords()
+
+    for number, (kind, line) in enumerate(zip(ast.kinds, ast.lines)):
+        if kind == REMARK:
+            continue
+
+        if kind == DIRECTIVE:
+            name, value = directives[number]
+            if name not in SUPPORTED_DIRECTIVES:
+                raise UnsupportedSong(f"directive {{{name}}}")
+            if name in IGNORED_DIRECTIVES:
+                continue
+            value = value.translate(TYPOGRAPHIC_TABLE)
+            if name == "title":
+                if song.title:
+                    raise UnsupportedSong("more than one title")
+                song.title = value
+            elif name == "subtitle":
+                song.subtitles.append(value)
+            elif name in ("comment", "comment_italic", "comment_box"):
+                song.lines.append(SongLine(kind=name, text=value, chorus=chorus))
+            elif name == "start_of_chorus":
+                chorus = True
+            elif name == "end_of_chorus":
+                chorus = False
+            elif name == "new_page":
+                song.lines.append(SongLine(kind="new_page"))
+            elif name == "textcolour":
+                color = parse_color(value)
+            elif name == "define":
+                chord_name, base_fret, frets = parse_define(value)
+                song.defines[chord_name] = (base_fret, frets)
+            continue
+
+        if kind == TAB:
+            song.lines.append(SongLine(kind="tab", text=line.rstrip().translate(TYPOGRAPHIC_TABLE), chorus=chorus))
+        elif kind == EMPTY:
+            song.lines.append(SongLine(kind="empty", chorus=chorus))
+        elif kind == LYRICS:
+            segments = line_segments(line, placed.get(number, []))
+            segments[-1].text = segments[-1].text.rstrip()
+            for segment in segments:
+                segment.text = segment.text.translate(TYPOGRAPHIC_TABLE)
+                if segment.chord:
+                    segment.chord = segment.chord.translate(TYPOGRAPHIC_TABLE)
+            song.lines.append(SongLine(kind="lyrics", segments=segments, color=color, chorus=chorus))
+            for segment in segments:
+                if segment.chord and segment.chord not in seen_chords:
+                    seen_chords.add(segment.chord)
+                    song.chords.append(segment.chord)
+        else:
+            raise UnsupportedSong(f"unparsed directive line {line.strip()!r}")
+
+    # Text in the standard PDF fonts must be Latin-1; leave anything else to Perl.
+    texts = [song.title, *song.subtitles, *song.chords]
+    for song_line in song.lines:
+        texts.append(song_line.text)
+        texts.extend(segment.text for segment in song_line.segments)
+    try:
+        "".join(texts).encode("latin-1")
+    except UnicodeEncodeError as error:
+        raise UnsupportedSong(f"non Latin-1 character {error.object[error.start]!r}") from None
+
+    return song
+
+
+def parse_song(text: str) -> Song:
+    """Parse ChordPro source, raising UnsupportedSong outside the subset."""
+    return build_song(parse_text(text))
+
+
+def chord_tones(name: str) -> tuple[int, tuple[int, ...]] | None:
+    """Return (root pitch class, intervals) for a chord name, or None."""
+    match = CHORD_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    letter, accidental, quality, _bass = match.groups()
+    if quality not in CHORD_QUALITIES:
+        return None
+    root = NOTE_PITCHES[letter] + {"#": 1, "b": -1, "": 0}[accidental]
+    return root % 12, CHORD_QUALITIES[quality]
+
+
+def find_voicing(root: int, intervals: tuple[int, ...]) -> tuple[int, ...] | None:
+    """Pick the lowest, most compact GCEA fingering that covers the chord."""
+    tones = {(root + interval) % 12 for interval in intervals}
+    required = {(root + interval) % 12 for interval in intervals if len(intervals) < 4 or interval != 7}
+    best = None
+    best_cost = None
+
+    def search(string_index: int, frets: list[int]) -> None:
+        nonlocal best, best_cost
+        if string_index == len(UKULELE_STRINGS):
+            played = {(UKULELE_STRINGS[i] + fret) % 12 for i, fret in enumerate(frets)}
+            if not required <= played:
+                return
+            fretted = [fret for fret in frets if fret]
+            span = (max(fretted) - min(fretted)) if fretted else 0
+            if span >= DIAGRAM_FRETS:
+                return
+            cost = max(frets) * 4 + sum(frets) + span
+            if best_cost is None or cost < best_cost:
+                best, best_cost = tuple(frets), cost
+            return
+        for fret in range(0, 10):
+            if (UKULELE_STRINGS[string_index] + fret) % 12 in tones:
+                search(string_index + 1, frets + [fret])
+
+    search(0, [])
+    return best
+
+
+def chord_shape(name: str, defines: dict) -> tuple[int, tuple[int | None, ...]] | None:
+    """Return (base fret, frets relative to it) for a diagram, or None."""
+    if name in defines:
+        return defines[name]
+
+    tones = chord_tones(name)
+    if tones is None:
+        return None
+    root, intervals = tones
+
+    frets = None
+    for shape_name, shape in COMMON_SHAPES.items():
+        shape_tones = chord_tones(shape_name)
+        if shape_tones == (root, intervals):
+            frets = shape
+            break
+    if frets is None:
+        frets = find_voicing(root, intervals)
+    if frets is None:
+        return None
+
+    if max(frets) <= DIAGRAM_FRETS:
+        return 1, frets
+    base_fret = min(fret for fret in frets if fret)
+    return base_fret, tuple(fret - base_fret + 1 if fret else fret for fret in frets)
+
+
+class SongPDF(FPDF if FPDF is not None else object):
+    def __init__(self) -> None:
+        super().__init__(unit="pt", format="A4")
+        self.set_auto_page_break(False)
+        self.set_margins(PAGE_SETTINGS["marginleft"], PAGE_SETTINGS["margintop"], PAGE_SETTINGS["marginright"])
+
+    def use_font(self, spec: tuple[str, str, int]) -> float:
+        family, style, size = spec
+        self.set_font(family, style, size)
+        return size * LINE_SPACING
+
+    def body_top(self) -> float:
+        if self.page_no() == 1 or not PAGE_SETTINGS["head_first_only"]:
+            return PAGE_SETTINGS["margintop"]
+        return PAGE_SETTINGS["margintop"] - PAGE_SETTINGS["headspace"]
+
+    def body_bottom(self) -> float:
+        return self.h - PAGE_SETTINGS["marginbottom"] - PAGE_SETTINGS["footspace"]
+
+    def ensure_space(self, height: float) -> None:
+        if self.y + height > self.body_bottom():
+            self.add_page()
+            self.set_y(self.body_top())
+
+
+def draw_diagram(pdf: SongPDF, x: float, y: float, name: str, shape) -> None:
+    base_fret, frets = shape
+    cell = 9
+    width = cell * (len(UKULELE_STRINGS) - 1)
+
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font("Helvetica", "", 10)
+    pdf.text(x + width / 2 - pdf.get_string_width(name) / 2, y + 8, name)
+
+    top = y + 14
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_line_width(1.5 if base_fret == 1 else 0.5)
+    pdf.line(x, top, x + width, top)
+    pdf.set_line_width(0.5)
+    for fret in range(1, DIAGRAM_FRETS + 1):
+        pdf.line(x, top + fret * cell, x + width, top + fret * cell)
+    for string in range(len(UKULELE_STRINGS)):
+        pdf.line(x + string * cell, top, x + string * cell, top + DIAGRAM_FRETS * cell)
+    if base_fret > 1:
+        pdf.set_font("Helvetica", "", 7)
+        pdf.text(x - 9, top + cell * 0.75, str(base_fret))
+
+    pdf.set_fill_color(0, 0, 0)
+    for string, fret in enumerate(frets):
+        cx = x + string * cell
+        if fret is None:
+            pdf.set_font("Helvetica", "", 7)
+            pdf.text(cx - 2, top - 2, "x")
+        elif fret > 0:
+            radius = cell * 0.35
+            pdf.ellipse(cx - radius, top + (fret - 0.5) * cell - radius, 2 * radius, 2 * radius, "F")
+
+
+def render_song(song: Song, output: Path) -> None:
+    if FPDF is None:
+        raise RuntimeError("fpdf2 is not installed (pip install fpdf2)")
+
+    pdf = SongPDF()
+    pdf.add_page()
+    left = PAGE_SETTINGS["marginleft"]
+    right = pdf.w - PAGE_SETTINGS["marginright"]
+
+    # Title and subtitles sit in the head space above the body on page one.
+    pdf.set_y(PAGE_SETTINGS["margintop"] - PAGE_SETTINGS["headspace"])
+    pdf.set_text_color(0, 0, 0)
+    for text, font in [(song.title, TITLE_FONT)] + [(s, SUBTITLE_FONT) for s in song.subtitles]:
+        if not text:
+            continue
+        height = pdf.use_font(font)
+        pdf.text((pdf.w - pdf.get_string_width(text)) / 2, pdf.y + font[2], text)
+        pdf.set_y(pdf.y + height)
+    pdf.set_y(max(pdf.y, PAGE_SETTINGS["margintop"]))
+
+    # Chord diagrams on top, wrapping across the body width.
+    shapes = [(name, chord_shape(name, song.defines)) for name in song.chords]
+    shapes = [(name, shape) for name, shape in shapes if shape]
+    if shapes:
+        step = 48
+        x = left + 10
+        for name, shape in shapes:
+            if x + step > right:
+                x = left + 10
+                pdf.set_y(pdf.y + 62)
+            draw_diagram(pdf, x, pdf.y, name, shape)
+            x += step
+        pdf.set_y(pdf.y + 68)
+
+    for line in song.lines:
+        indent = left + (CHORUS_INDENT if line.chorus else 0)
+
+        if line.kind == "new_page":
+            pdf.add_page()
+            pdf.set_y(pdf.body_top())
+            continue
+
+        if line.kind == "empty":
+            height = pdf.use_font(TEXT_FONT)
+            pdf.ensure_space(height)
+            pdf.set_y(pdf.y + height)
+            continue
+
+        if line.kind == "tab":
+            height = pdf.use_font(TAB_FONT)
+            pdf.ensure_space(height)
+            pdf.set_text_color(0, 0, 0)
+            pdf.text(indent, pdf.y + TAB_FONT[2], line.text)
+            pdf.set_y(pdf.y + height)
+            continue
+
+        if line.kind.startswith("comment"):
+            style = "I" if line.kind == "comment_italic" else ""
+            height = pdf.use_font((COMMENT_FONT[0], style, COMMENT_FONT[2]))
+            pdf.ensure_space(height)
+            width = pdf.get_string_width(line.text) + 4
+            if line.kind == "comment_box":
+                pdf.set_draw_color(0, 0, 0)
+                pdf.rect(indent, pdf.y, width, height, "D")
+            else:
+                pdf.set_fill_color(*COMMENT_BACKGROUND)
+                pdf.rect(indent, pdf.y, width, height, "F")
+            pdf.set_text_color(0, 0, 0)
+            pdf.text(indent + 2, pdf.y + COMMENT_FONT[2], line.text)
+            pdf.set_y(pdf.y + height)
+            continue
+
+        # Lyrics with inline chords: "[C]" in the chord colour, text in the
+        # current {textcolour}, wrapping at the right margin.
+        height = pdf.use_font(TEXT_FONT)
+        pdf.ensure_space(height)
+        x = indent
+        if line.chorus:
+            pdf.set_draw_color(0, 0, 0)
+            pdf.line(left + 4, pdf.y, left + 4, pdf.y + height)
+        for segment in line.segments:
+            pieces = []
+            if segment.chord is not None:
+                pieces.append((f"[{segment.chord}]", CHORD_FONT, CHORD_COLOR))
+            if segment.text:
+                pieces.append((segment.text, TEXT_FONT, line.color or (0, 0, 0)))
+            for text, font, color in pieces:
+                pdf.use_font(font)
+                width = pdf.get_string_width(text)
+                if x + width > right and x > indent:
+                    pdf.set_y(pdf.y + height)
+                    pdf.ensure_space(height)
+                    x = indent
+                    text = text.lstrip()
+                    width = pdf.get_string_width(text)
+                pdf.set_text_color(*color)
+                pdf.text(x, pdf.y + font[2], text)
+                x += width
+        pdf.set_y(pdf.y + height)
+
+    pdf.set_title(song.title)
+    temp_path = output.with_name(output.name + ".tmp")
+    pdf.output(str(temp_path))
+    os.replace(temp_path, output)
+
+
+def render_with_perl(source: Path, output: Path) -> bool:
+    try:
+        subprocess.run(
+            PERL_CHORDPRO_COMMAND + [f"--output={output}", str(source)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return output.exists()
+
+
+def render_file(
+    source: Path,
+    output: Path | None = None,
+    fallback: bool = False,
+    ast: SongAST | None = None,
+) -> tuple[str, str]:
+    """Render one ChordPro file, or its already parsed ast; return (status, detail).
+
+    status is "rendered", "fallback", "unsupported" or "error".
+    """
+    if output is None:
+        output = source.with_suffix(".pdf")
+    try:
+        if ast is None:
+            ast = parse_text(source.read_text(encoding="utf-8"))
+        render_song(build_song(ast), output)
+        return "rendered", ""
+    except UnsupportedSong as error:
+        if fallback and render_with_perl(source, output):
+            return "fallback", str(error)
+        return "unsupported", str(error)
+    except (OSError, UnicodeDecodeError, RuntimeError, ValueError) as error:
+        return "error", str(error)
+
+
+def needs_render(source: Path, output: Path, force: bool) -> bool:
+    if force or not output.exists():
+        return True
+    return source.stat().st_mtime > output.stat().st_mtime
+
+
+def render_many(
+    files: list[Path],
+    force: bool = False,
+    fallback: bool = False,
+    jobs: int | None = None,
+    cache: ParseCache | None = None,
+) -> dict[str, list[tuple[Path, str]]]:
+    """Render out-of-date files in a process pool and group them by status.
+
+    Songs are parsed in this process through the shared parse cache and
+    the workers only lay out and write the PDFs.
+    """
+    results: dict[str, list[tuple[Path, str]]] = {
+        "rendered": [], "fallback": [], "unsupported": [], "error": [], "skipped": [],
+    }
+    if cache is None:
+        cache = ParseCache()
+    todo = []
+    asts = []
+    for source in files:
+        if not needs_render(source, source.with_suffix(".pdf"), force):
+            results["skipped"].append((source, ""))
+            continue
+        try:
+            asts.append(cache.parse_file(source))
+        except (OSError, UnicodeDecodeError) as error:
+            results["error"].append((source, str(error)))
+            continue
+        todo.append(source)
+    cache.save()
+
+    if len(todo) <= 1 or jobs == 1:
+        outcomes = (render_file(source, None, fallback, ast) for source, ast in zip(todo, asts))
+        for source, (status, detail) in zip(todo, outcomes):
+            results[status].append((source, detail))
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        outcomes = pool.map(render_file, todo, [None] * len(todo), [fallback] * len(todo), asts, chunksize=8)
+        for source, (status, detail) in zip(todo, outcomes):
+            results[status].append((source, detail))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", type=Path, default=[SCRIPT_DIR / "music"],
+                        help="ChordPro files or folders to render (default: music)")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render even when the PDF is newer than the ChordPro file")
+    parser.add_argument("--fallback", action="store_true",
+                        help="Render unsupported songs with the Perl chordpro tool")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report which songs this renderer supports; write nothing")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    files = find_chordpro_files(args.paths)
+    if args.check:
+        cache = ParseCache()
+        unsupported = 0
+        for source in files:
+            try:
+                build_song(cache.parse_file(source))
+            except (UnsupportedSong, UnicodeDecodeError) as error:
+                unsupported += 1
+                print(f"  ⚠ {source}: {error}")
+        cache.save()
+        print(f"\n{len(files) - unsupported} of {len(files)} songs supported by the in-process renderer")
+        return 0
+
+    if FPDF is None:
+        print("❌ fpdf2 is not installed (pip install fpdf2)", file=sys.stderr)
+        return 1
+
+    results = render_many(files, args.force, args.fallback, args.jobs)
+    for source, _ in results["rendered"]:
+        print(f"  ✓ {source.with_suffix('.pdf')}")
+    for source, detail in results["fallback"]:
+        print(f"  ↪ {source.with_suffix('.pdf')} (Perl chordpro: {detail})")
+    for source, detail in results["unsupported"]:
+        print(f"  ⚠ {source}: unsupported ({detail})")
+    for source, detail in results["error"]:
+        print(f"  ❌ {source}: {detail}")
+
+    print(
+        f"\n📊 {len(results['rendered'])} rendered, {len(results['fallback'])} via Perl, "
+        f"{len(results['unsupported'])} unsupported, {len(results['error'])} errors, "
+        f"{len(results['skipped'])} up to date"
+    )
+    return 1 if results["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,8 @@ from bs4 import BeautifulSoup
 import datetime
 from urllib.parse import unquote
 
+from chordpro_parser import ParseCache
+
 def get_all_songs():
     """Find all ChordPro files in the music directory"""
     chopro_dir = Path("music/ChordPro")
@@ -124,19 +126,16 @@ def clean_song_title(title):
     # Convert to lowercase for comparison
     return title.lower()
 
-def extract_title_from_chopro(chopro_file):
+def extract_title_from_chopro(chopro_file, parse_cache=None):
     """Extract song title from ChordPro file"""
     try:
-        with open(chopro_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except:
+        song = (parse_cache or ParseCache(None)).parse_file(chopro_file)
+    except (OSError, UnicodeDecodeError):
         return None
     
-    # Look for {title:} or {t:} directive
-    title_match = re.search(r'\{(?:title|t):\s*([^}]+)\}', content, re.IGNORECASE)
-    if title_match:
-        title = title_match.group(1).strip()
-        return clean_song_title(title)
+    # Use the first {title:} or {t:} directive
+    if song.title:
+        return clean_song_title(song.title)
     
     # Fallback to filename
     return clean_song_title(chopro_file.stem)
@@ -224,8 +223,9 @@ def main():
     # title_key -> list of dicts {chopro_file, date_obj, date_str, youtube_url}
     title_candidates = {}
 
+    parse_cache = ParseCache()
     for chopro_file in all_songs:
-        song_title = extract_title_from_chopro(chopro_file)
+        song_title = extract_title_from_chopro(chopro_file, parse_cache)
         if not song_title:
             not_found_count += 1
             continue
@@ -266,6 +266,8 @@ def main():
             'youtube_url': youtube_url
         })
 
+    parse_cache.save()
+
     # Decide best candidate per title
     def candidate_sort_key(c):
         # Higher date first (descending).
@@ -4,27 +4,34 @@ Script to extract song data from index.html tables and format it like Music Link
 """
 
 import re
-from bs4 import BeautifulSoup
-import urllib.parse
-
-
-def _find_following_table(heading_tag):
-    """Find the first <table> that follows a heading, before the next heading."""
-    node = heading_tag
-    while True:
-        node = node.find_next_sibling()
-        if node is None:
-            return None
-        if getattr(node, 'name', None) == 'table':
-            return node
-        if getattr(node, 'name', None) in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
-            return None
-
-def extract_pdf_url(td_element):
+
+from html_tables import extract_tables
+
+PRACTICE_TABLE_ID = 'practice-songs-table'
+SUBMITTED_TABLE_ID = 'submitted-songs-table'
+
+# The open mic tables aren't currently tagged with a stable id; locate them via the heading.
+# Example in index.html: <h2>Practice for February 21 Open Mic</h2> followed by a <table>.
+OPEN_MIC_HEADING = re.compile(r'^Practice\s+for\s+.*\bOpen\s+Mic\b', re.IGNORECASE)
+PDF_LINK = re.compile(r'\.pdf')
+
+
+def find_song_tables(html_content):
+    """Parse the page once and return (practice, open_mic_tables, submitted)."""
+    tables = extract_tables(
+        html_content,
+        (PRACTICE_TABLE_ID, SUBMITTED_TABLE_ID),
+        OPEN_MIC_HEADING,
+    )
+    by_id = {table.table_id: table for table in tables if table.table_id}
+    open_mic = [table for table in tables if table.heading]
+    return by_id.get(PRACTICE_TABLE_ID), open_mic, by_id.get(SUBMITTED_TABLE_ID)
+
+def extract_pdf_url(cell):
     """Extract the first PDF URL from a table cell"""
-    pdf_links = td_element.find_all('a', href=re.compile(r'\.pdf'))
+    pdf_links = [href for href in cell.links if PDF_LINK.search(href)]
     if pdf_links:
-        href = pdf_links[0].get('href')
+        href = pdf_links[0]
         # Handle relative URLs
         if href.startswith('music/'):
             return f"https://tuesdayukes.org/{href}"
@@ -34,17 +41,15 @@ def extract_pdf_url(td_element):
             return f"https://tuesdayukes.org/music/{href}"
     return None
 
-def extract_practice_songs(soup):
+def extract_practice_songs(practice_table):
     """Extract songs from the practice-songs-table"""
     songs = []
-    practice_table = soup.find('table', id='practice-songs-table')
 
     if practice_table:
-        rows = practice_table.find_all('tr')[1:]  # Skip header row
-        for row in rows:
-            cells = row.find_all('td')
+        rows = practice_table.rows[1:]  # Skip header row
+        for cells in rows:
             if len(cells) >= 2:
-                title = cells[0].get_text(strip=True)
+                title = cells[0].text
                 pdf_url = extract_pdf_url(cells[1])
                 if title and pdf_url:
                     songs.append({
@@ -55,18 +60,16 @@ def extract_practice_songs(soup):
 
     return songs
 
-def extract_submitted_songs(soup):
+def extract_submitted_songs(submitted_table):
     """Extract songs from the submitted-songs-table"""
     songs = []
-    submitted_table = soup.find('table', id='submitted-songs-table')
 
     if submitted_table:
-        rows = submitted_table.find_all('tr')[1:]  # Skip header row
-        for row in rows:
-            cells = row.find_all('td')
+        rows = submitted_table.rows[1:]  # Skip header row
+        for cells in rows:
             if len(cells) >= 3:
-                submitter = cells[0].get_text(strip=True)
-                title = cells[1].get_text(strip=True)
+                submitter = cells[0].text
+                title = cells[1].text
                 pdf_url = extract_pdf_url(cells[2])
                 if title and pdf_url and submitter:
                     songs.append({
@@ -78,28 +81,15 @@ def extract_submitted_songs(soup):
     return songs
 
 
-def extract_open_mic_practice_songs(soup):
+def extract_open_mic_practice_songs(open_mic_tables):
     """Extract songs from the "Practice for ... Open Mic" table(s)."""
     songs = []
 
-    # These tables aren't currently tagged with a stable id; locate them via the heading.
-    # Example in index.html: <h2>Practice for February 21 Open Mic</h2> followed by a <table>.
-    for heading in soup.find_all(['h2', 'h3']):
-        heading_text = heading.get_text(strip=True)
-        if not heading_text:
-            continue
-        if not re.search(r'^Practice\s+for\s+.*\bOpen\s+Mic\b', heading_text, flags=re.IGNORECASE):
-            continue
-
-        table = _find_following_table(heading)
-        if not table:
-            continue
-
-        for row in table.find_all('tr'):
-            cells = row.find_all('td')
+    for table in open_mic_tables:
+        for cells in table.rows:
             if len(cells) < 2:
                 continue
-            title = cells[0].get_text(strip=True)
+            title = cells[0].text
             pdf_url = extract_pdf_url(cells[1])
             if title and pdf_url:
                 songs.append({
@@ -126,13 +116,13 @@ def main():
         print(f"Error reading index.html: {e}")
         return
 
-    # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
+    # Parse HTML once for all three kinds of table
+    practice_table, open_mic_tables, submitted_table = find_song_tables(html_content)
 
-    # Extract songs from both tables
-    practice_songs = extract_practice_songs(soup)
-    open_mic_practice_songs = extract_open_mic_practice_songs(soup)
-    submitted_songs = extract_submitted_songs(soup)
+    # Extract songs from the tables
+    practice_songs = extract_practice_songs(practice_table)
+    open_mic_practice_songs = extract_open_mic_practice_songs(open_mic_tables)
+    submitted_songs = extract_submitted_songs(submitted_table)
 
     # Combine all songs
     all_songs = practice_songs + open_mic_practice_songs + submitted_songs
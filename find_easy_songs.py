@@ -1,45 +1,216 @@
 #!/usr/bin/env python3
 """
 Script to find ChordPro files with 3 or fewer unique chords and create .easy marker files
+
+Chord sets are cached by file content hash in .easy_songs_cache.json, so only
+new or edited ChordPro files are re-analyzed on later runs. Songs are read
+through the shared chordpro_parser module and its parse cache. Use --reconcile to
+also remove stale .easy markers from songs that no longer meet the threshold.
 """
 
 import re
 import os
+import sys
+import json
+import hashlib
+import argparse
 from pathlib import Path
 
-def extract_chords_from_chopro(file_path):
+from chordpro_parser import ParseCache, parse_text
+
+CACHE_FILE = ".easy_songs_cache.json"
+CACHE_VERSION = 3
+DEFAULT_THRESHOLD = 3
+DEFAULT_DIFFICULTY_FILE = "song-difficulty.json"
+
+# Split a chord name into root and the rest (e.g. "C#m7" -> "C#", "m7")
+CHORD_ROOT_PATTERN = re.compile(r'^([A-G][#b]?)(.*)$')
+
+# Ukulele (GCEA) shapes that need a barre or an awkward stretch. Chords are
+# reduced to root plus major/minor before lookup, so "Bb7" and "Bbmaj7" count
+# as Bb shapes. This is a heuristic, not a fingering database.
+HARD_UKULELE_SHAPES = {
+    'E', 'Eb', 'D#', 'Ebm', 'D#m',
+    'B', 'Bm', 'Bb', 'A#', 'Bbm', 'A#m',
+    'C#', 'Db', 'C#m', 'Dbm',
+    'F#', 'Gb',
+    'G#', 'Ab', 'G#m', 'Abm',
+    'Cm', 'Fm',
+}
+
+# Weights for the difficulty score. Override with --weights path/to/weights.json
+DEFAULT_DIFFICULTY_WEIGHTS = {
+    'chords': 0.5,            # per unique chord
+    'hard_shapes': 1.0,       # per unique barre/stretch shape
+    'changes_per_line': 0.75, # per average chord change on lines with chords
+}
+MIN_DIFFICULTY = 1
+MAX_DIFFICULTY = 10
+
+def is_chord_token(chord):
+    """Return True if the bracketed text looks like a chord name"""
+    # Skip if it's likely not a chord (contains spaces, common non-chord patterns)
+    if ' ' in chord or len(chord) == 0:
+        return False
+        
+    # Skip common ChordPro directives that might be in brackets
+    if chord.lower() in ['t:', 'st:', 'c:', 'comment:', 'title:', 'subtitle:']:
+        return False
+    
+    return True
+
+def analyze_song(song):
+    """
+    Analyze a parsed song for the easy-song check and difficulty scoring.
+    Returns a JSON-serializable dict with the sorted unique chords, the number
+    of lines that carry chords and the number of chord changes on those lines.
+    Only chords placed in lyric lines count (not ones quoted in comments or tabs).
+    """
+    chord_lines = 0
+    changes = 0
+    previous = None
+    
+    for placed in song.line_chords().values():
+        line_chords = [chord for chord, _ in placed if is_chord_token(chord)]
+        if not line_chords:
+            continue
+        
+        chord_lines += 1
+        for chord in line_chords:
+            if chord != previous:
+                changes += 1
+                previous = chord
+    
+    return {
+        'chords': sorted(chord for chord in song.chords if is_chord_token(chord)),
+        'chord_lines': chord_lines,
+        'changes': changes,
+    }
+
+def analyze_chopro_text(content):
+    """Analyze ChordPro text (see analyze_song)"""
+    return analyze_song(parse_text(content))
+
+def extract_chords_from_chopro(file_path, parse_cache=None):
     """
     Extract unique chords from a ChordPro file
     Returns a set of unique chord names
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        song = (parse_cache or ParseCache(None)).parse_file(file_path)
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
         return set()
     
-    # Find all chord patterns in square brackets
-    chord_pattern = r'\[([^\]]+)\]'
-    matches = re.findall(chord_pattern, content)
+    return set(analyze_song(song)['chords'])
+
+def load_cache(cache_path):
+    """Load the content hash -> analysis cache, or an empty cache if missing/stale"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
     
-    # Clean up chord names and filter out non-chord content
-    chords = set()
-    for match in matches:
-        chord = match.strip()
-        
-        # Skip if it's likely not a chord (contains spaces, common non-chord patterns)
-        if ' ' in chord or len(chord) == 0:
-            continue
-            
-        # Skip common ChordPro directives that might be in brackets
-        if chord.lower() in ['t:', 'st:', 'c:', 'comment:', 'title:', 'subtitle:']:
+    if data.get('version') != CACHE_VERSION:
+        return {}
+    return data.get('songs', {})
+
+def save_cache(cache_path, cache):
+    """Persist the analysis cache (written to a temp file first so a crash can't corrupt it)"""
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'songs': cache}, f, sort_keys=True)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Warning: could not write cache {cache_path}: {e}")
+
+def get_analysis_cached(chopro_file, cache, used_hashes, parse_cache):
+    """
+    Return (analysis, from_cache) for a ChordPro file.
+    The file is hashed on every run, but only parsed (or its parsed form loaded
+    from the shared parse cache) when its content hash isn't already in the cache.
+    """
+    with open(chopro_file, 'rb') as f:
+        raw = f.read()
+    
+    digest = hashlib.sha1(raw).hexdigest()
+    used_hashes.add(digest)
+    if digest in cache:
+        return cache[digest], True
+    
+    try:
+        song = parse_cache.parse_bytes(raw, digest)
+    except UnicodeDecodeError as e:
+        print(f"Error reading {chopro_file}: {e}")
+        return analyze_chopro_text(''), False
+    
+    analysis = analyze_song(song)
+    cache[digest] = analysis
+    return analysis, False
+
+def is_easy(chords, threshold):
+    """A song is easy when it has at least one chord and no more than threshold"""
+    return 0 < len(chords) <= threshold
+
+def count_hard_shapes(chords):
+    """Count unique chords whose ukulele shape needs a barre or stretch"""
+    shapes = set()
+    for chord in chords:
+        match = CHORD_ROOT_PATTERN.match(chord.split('/')[0])
+        if not match:
             continue
-            
-        # Add to chord set
-        chords.add(chord)
+        root, rest = match.groups()
+        minor = rest.startswith('m') and not rest.startswith('maj')
+        shapes.add(root + ('m' if minor else ''))
+    return len(shapes & HARD_UKULELE_SHAPES)
+
+def difficulty_score(analysis, weights):
+    """
+    Combine chord count, hard shapes and chord changes per line into an
+    integer score between MIN_DIFFICULTY and MAX_DIFFICULTY
+    """
+    chords = analysis['chords']
+    if not chords:
+        return None
     
-    return chords
+    changes_per_line = analysis['changes'] / analysis['chord_lines'] if analysis['chord_lines'] else 0
+    raw = (weights['chords'] * len(chords)
+           + weights['hard_shapes'] * count_hard_shapes(chords)
+           + weights['changes_per_line'] * changes_per_line)
+    return max(MIN_DIFFICULTY, min(MAX_DIFFICULTY, round(raw)))
+
+def load_weights(weights_path):
+    """Load difficulty weights, filling in defaults for any that are missing"""
+    weights = dict(DEFAULT_DIFFICULTY_WEIGHTS)
+    if weights_path:
+        with open(weights_path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(weights)
+        if unknown:
+            raise ValueError(f"Unknown difficulty weight(s): {', '.join(sorted(unknown))}")
+        weights.update({k: float(v) for k, v in overrides.items()})
+    return weights
+
+def write_difficulty_file(output_path, scores, weights):
+    """
+    Write per-song difficulty scores for GenList.py.
+    Keys are song paths without extension, as GenList sees them.
+    """
+    data = {
+        'version': 1,
+        'min': MIN_DIFFICULTY,
+        'max': MAX_DIFFICULTY,
+        'weights': weights,
+        'songs': dict(sorted(scores.items())),
+    }
+    # Written atomically: GenList may read it while a build is running
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=1)
+        f.write('\n')
+    os.replace(temp_path, output_path)
 
 def has_easy_marker(chopro_file):
     """Check if a .easy marker file already exists for this ChordPro file"""
@@ -56,13 +227,54 @@ def create_easy_marker(chopro_file):
         print(f"Error creating {easy_file}: {e}")
         return False
 
+def remove_easy_marker(chopro_file):
+    """Remove the .easy marker file for the given ChordPro file"""
+    easy_file = chopro_file.with_suffix('.easy')
+    try:
+        easy_file.unlink()
+        return True
+    except Exception as e:
+        print(f"Error removing {easy_file}: {e}")
+        return False
+
 def main():
+    parser = argparse.ArgumentParser(
+        description='Mark ChordPro songs with few chords as easy (.easy marker files)'
+    )
+    parser.add_argument('--path', default='.',
+                        help='Directory to scan for .chopro files (default: current directory)')
+    parser.add_argument('--threshold', type=int, default=DEFAULT_THRESHOLD,
+                        help=f'Maximum unique chords for an easy song (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--reconcile', action='store_true',
+                        help='Also remove .easy markers from songs that exceed the threshold')
+    parser.add_argument('--no-markers', action='store_true',
+                        help='Analyze only; do not create or remove .easy markers (useful with --difficulty)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Ignore and do not update {CACHE_FILE} or the shared parse cache')
+    parser.add_argument('--difficulty', nargs='?', const=DEFAULT_DIFFICULTY_FILE, metavar='FILE',
+                        help=f'Also write difficulty scores for GenList.py (default file: {DEFAULT_DIFFICULTY_FILE})')
+    parser.add_argument('--weights', metavar='FILE',
+                        help='JSON file overriding the difficulty score weights')
+    args = parser.parse_args()
+    
     # Start from the ChordPro directory
-    chopro_dir = Path(".")
+    chopro_dir = Path(args.path)
+    threshold = args.threshold
     
     if not chopro_dir.exists():
         print(f"ChordPro directory not found: {chopro_dir}")
-        return
+        return 1
+    
+    try:
+        weights = load_weights(args.weights)
+    except (OSError, ValueError) as e:
+        print(f"Error loading difficulty weights: {e}")
+        return 1
+    
+    cache_path = chopro_dir / CACHE_FILE
+    cache = {} if args.no_cache else load_cache(cache_path)
+    parse_cache = ParseCache(None) if args.no_cache else ParseCache()
+    used_hashes = set()
     
     # Find all .chopro files recursively
     chopro_files = list(chopro_dir.rglob("*.chopro"))
@@ -71,19 +283,29 @@ def main():
     easy_candidates = []
     already_marked = []
     created_markers = []
+    removed_markers = []
     errors = []
+    cache_hits = 0
+    difficulty_scores = {}
     
     for chopro_file in chopro_files:
         try:
-            # Extract chords from the file
-            chords = extract_chords_from_chopro(chopro_file)
+            # Extract chords from the file (or reuse the cached result)
+            analysis, from_cache = get_analysis_cached(chopro_file, cache, used_hashes, parse_cache)
+            if from_cache:
+                cache_hits += 1
+            chords = set(analysis['chords'])
+            
+            score = difficulty_score(analysis, weights)
+            if score is not None:
+                difficulty_scores[chopro_file.with_suffix('').as_posix()] = score
             
-            # Check if it has 3 or fewer chords
-            if len(chords) <= 3 and len(chords) > 0:
+            # Check if it has few enough chords
+            if is_easy(chords, threshold):
                 easy_candidates.append((chopro_file, chords))
                 
                 # Check if .easy marker already exists
-                if has_easy_marker(chopro_file):
+                if args.no_markers or has_easy_marker(chopro_file):
                     already_marked.append(chopro_file)
                 else:
                     # Create .easy marker file
@@ -92,21 +314,45 @@ def main():
                         print(f"✅ Created .easy marker for: {chopro_file.name} ({len(chords)} chords: {', '.join(sorted(chords))})")
                     else:
                         errors.append(chopro_file)
+            elif args.reconcile and not args.no_markers and chords and has_easy_marker(chopro_file):
+                # Song gained chords since it was marked; drop the stale marker
+                if remove_easy_marker(chopro_file):
+                    removed_markers.append(chopro_file)
+                    print(f"🗑️ Removed .easy marker for: {chopro_file.name} ({len(chords)} chords)")
+                else:
+                    errors.append(chopro_file)
         
         except Exception as e:
             print(f"Error processing {chopro_file}: {e}")
             errors.append(chopro_file)
     
+    if not args.no_cache:
+        parse_cache.save()
+        # Drop entries for content that no longer exists in the tree
+        save_cache(cache_path, {h: c for h, c in cache.items() if h in used_hashes})
+    
+    difficulty_failed = False
+    if args.difficulty:
+        try:
+            write_difficulty_file(args.difficulty, difficulty_scores, weights)
+            print(f"📈 Wrote difficulty scores for {len(difficulty_scores)} songs to {args.difficulty}")
+        except OSError as e:
+            print(f"Error writing {args.difficulty}: {e}")
+            difficulty_failed = True
+    
     # Summary report
     print(f"\n📊 SUMMARY:")
     print(f"Total ChordPro files analyzed: {len(chopro_files)}")
-    print(f"Songs with 3 or fewer chords: {len(easy_candidates)}")
+    print(f"Reused cached chord analysis: {cache_hits}")
+    print(f"Songs with {threshold} or fewer chords: {len(easy_candidates)}")
     print(f"Already had .easy markers: {len(already_marked)}")
     print(f"New .easy markers created: {len(created_markers)}")
+    if args.reconcile:
+        print(f"Stale .easy markers removed: {len(removed_markers)}")
     print(f"Errors encountered: {len(errors)}")
     
     if easy_candidates:
-        print(f"\n🎵 EASY SONGS (3 or fewer chords):")
+        print(f"\n🎵 EASY SONGS ({threshold} or fewer chords):")
         for chopro_file, chords in sorted(easy_candidates, key=lambda x: len(x[1])):
             status = "✅ marked" if chopro_file in created_markers else "already marked"
             relative_path = chopro_file.relative_to(chopro_dir)
@@ -117,6 +363,8 @@ def main():
         for error_file in errors:
             relative_path = error_file.relative_to(chopro_dir)
             print(f"  {relative_path}")
+    
+    return 1 if errors or difficulty_failed else 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -7,218 +7,411 @@ This script combines functionality to:
 2. Replace problematic Unicode characters (especially U+2019 apostrophes) with ASCII equivalents
 3. Handle other special characters that cause issues in ChordPro processing
 
+Each file is read once: the encoding is sniffed from the raw bytes (BOM, UTF-16
+null-byte pattern, UTF-8 validity), the buffer is decoded once, and all
+character replacements are applied with a single str.translate call.
+
 Usage:
     python fix_encoding.py <file_path>     # Process a single file
     python fix_encoding.py                 # Process all .chopro files in music/ChordPro/
+    python fix_encoding.py --jobs 4        # Limit the number of worker processes
+    python fix_encoding.py --check         # List files that need fixing; exit 1 if any
+    python fix_encoding.py --staged        # Only process .chopro files staged for commit
+
+In batch mode, files are processed in a process pool, and files whose content
+hash is recorded in .fix_encoding_cache.json as already clean are skipped.
+Files are only rewritten when the normalized bytes differ from the original,
+so clean files keep their mtime and don't trigger PDF regeneration.
 
 Note: This script consolidates the functionality previously split between
 fix_encoding.py and fix_apostrophes.py for better maintainability.
 """
 
 import os
+import re
 import sys
-from pathlib import Path
+import json
+import hashlib
+import argparse
+import subprocess
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+CLEAN_CACHE_FILE = ".fix_encoding_cache.json"
+
+# Known-clean hashes, set once per worker process by init_worker
+known_clean_hashes = set()
+
+# Convert problematic characters using Unicode escape sequences for reliability
+REPLACEMENTS = {
+    '\u2019': "'",   # Right single quotation mark (U+2019) - causes VS Code yellow highlighting
+    '\u2018': "'",   # Left single quotation mark (U+2018)
+    '\u201C': '"',   # Left double quotation mark (U+201C)
+    '\u201D': '"',   # Right double quotation mark (U+201D)
+    '\u2013': '-',   # En dash (U+2013)
+    '\u2014': '--',  # Em dash (U+2014)
+    '\u2026': '...', # Horizontal ellipsis (U+2026)
+    '\uBFC3': '',    # UTF-16 conversion artifact (BOM remnant)
+    '\uBEC3': '',    # UTF-16 conversion artifact (BOM remnant)
+    '\u0A0D': '\n',  # UTF-16 line ending artifact (LF + CR combined)
+    '\u0D00': '',    # UTF-16 line ending artifact (CR + NULL)
+}
+
+CHAR_NAMES = {
+    '\u2019': 'right single quotes',
+    '\u2018': 'left single quotes',
+    '\u201C': 'left double quotes',
+    '\u201D': 'right double quotes',
+    '\u2013': 'en dashes',
+    '\u2014': 'em dashes',
+    '\u2026': 'ellipsis',
+}
+
+# All replacements in one table, plus a pattern to count them in one scan
+REPLACE_TABLE = str.maketrans(REPLACEMENTS)
+REPLACE_PATTERN = re.compile('[' + ''.join(REPLACEMENTS) + ']')
+
+# Artifacts that mark a UTF-8 file as needing cleanup
+BYTE_ARTIFACTS = (b'\x00', b'\xbf\xc3', b'\xbe\xc3')  # null bytes, BOM artifacts
+UTF16_ARTIFACTS = ('\uBFC3', '\uBEC3', '\u0A0D', '\u0D00')
+
+EXCESSIVE_LINES = re.compile(r'\n{3,}')
+UTF16_BLANK_RUN = re.compile(r'\n\s*\n\s*\n')
+OTHER_BLANK_RUN = re.compile(r'\n{4,}')
+
+UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
 
-def fix_encoding(file_path):
+def looks_like_utf16(raw_data):
+    """Check for UTF-16 patterns (null bytes between characters)"""
+    odd_bytes = raw_data[1::2]
+    return len(raw_data) > 10 and odd_bytes.count(0) > len(odd_bytes) * 0.3
+
+def decode_bytes(raw_data):
     """
-    Fix encoding issues in a file by trying different encodings and converting to UTF-8.
+    Decode a raw buffer once, choosing the encoding from the bytes themselves.
+    Returns (content, encoding_name); line endings are left as-is.
     """
-    encodings_to_try = [
-        'utf-8',
-        'utf-16-le',      # UTF-16 Little Endian (common on Windows)
-        'utf-16-be',      # UTF-16 Big Endian
-        'utf-16',         # UTF-16 with BOM detection
-        'windows-1252',
-        'iso-8859-1',
-        'cp1252'
-    ]
-    
-    content = None
-    original_encoding = None
-    
-    # First, check if this might be a UTF-16 file by examining raw bytes
+    if raw_data.startswith(UTF16_BOMS):
+        return raw_data.decode('utf-16'), 'utf-16'
+
+    if looks_like_utf16(raw_data):
+        for encoding in ('utf-16-le', 'utf-16-be'):
+            try:
+                return raw_data.decode(encoding), encoding
+            except UnicodeDecodeError:
+                continue
+
     try:
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            
-        # Check for UTF-16 patterns (null bytes between characters)
-        if len(raw_data) > 10 and raw_data[1::2].count(0) > len(raw_data[1::2]) * 0.3:
-            print(f"🔍 File appears to be UTF-16 encoded (detected null byte pattern)")
-            # Force UTF-16 detection first
-            encodings_to_try = ['utf-16-le', 'utf-16-be', 'utf-16'] + [e for e in encodings_to_try if not e.startswith('utf-16')]
-    except Exception as e:
-        print(f"⚠️ Could not examine raw bytes: {e}")
-    
-    # Try to read with different encodings
-    for encoding in encodings_to_try:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-                original_encoding = encoding
-                print(f"✅ Successfully read {file_path} with {encoding} encoding")
-                break
-        except UnicodeDecodeError as e:
-            print(f"❌ Failed to read with {encoding}: {e}")
-            continue
-    
-    if content is None:
-        print(f"⚠️ Could not read {file_path} with any encoding")
-        return False
-    
-    # Always convert to UTF-8 for consistency, even if originally UTF-8
-    needs_conversion = original_encoding != 'utf-8'
-    if not needs_conversion:
-        # Check if the file has any issues that need fixing anyway
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-        # Check for artifacts that need fixing
-        artifact_patterns = [b'\x00', b'\xbf\xc3', b'\xbe\xc3']  # null bytes, BOM artifacts
-        has_artifacts = any(pattern in raw_data for pattern in artifact_patterns)
-        
-        # Also check for UTF-16 line ending artifacts in the decoded content
-        utf16_artifacts = ['\uBFC3', '\uBEC3', '\u0A0D', '\u0D00']
-        has_content_artifacts = any(artifact in content for artifact in utf16_artifacts)
-        
-        # Check for excessive empty lines (3 or more consecutive newlines)
-        import re
-        has_excessive_lines = bool(re.search(r'\n{3,}', content))
-        
-        if has_artifacts or has_content_artifacts or has_excessive_lines:
-            reason = []
-            if has_artifacts: reason.append("byte artifacts")
-            if has_content_artifacts: reason.append("UTF-16 artifacts") 
-            if has_excessive_lines: reason.append("excessive empty lines")
-            print(f"⚠️ {file_path} contains {', '.join(reason)} - needs cleaning")
-            needs_conversion = True
-        else:
-            print(f"ℹ️ {file_path} is already clean UTF-8 encoded")
-    
-    if not needs_conversion:
-        return True
-    
-    # Convert problematic characters using Unicode escape sequences for reliability
-    replacements = {
-        '\u2019': "'",   # Right single quotation mark (U+2019) - causes VS Code yellow highlighting
-        '\u2018': "'",   # Left single quotation mark (U+2018)
-        '\u201C': '"',   # Left double quotation mark (U+201C)
-        '\u201D': '"',   # Right double quotation mark (U+201D)
-        '\u2013': '-',   # En dash (U+2013)
-        '\u2014': '--',  # Em dash (U+2014)
-        '\u2026': '...', # Horizontal ellipsis (U+2026)
-        '\uBFC3': '',    # UTF-16 conversion artifact (BOM remnant)
-        '\uBEC3': '',    # UTF-16 conversion artifact (BOM remnant)
-        '\u0A0D': '\n',  # UTF-16 line ending artifact (LF + CR combined)
-        '\u0D00': '',    # UTF-16 line ending artifact (CR + NULL)
-    }
-    
+        return raw_data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        return raw_data.decode('windows-1252'), 'windows-1252'
+    except UnicodeDecodeError:
+        # iso-8859-1 maps every byte, so this cannot fail
+        return raw_data.decode('iso-8859-1'), 'iso-8859-1'
+
+def cleaning_reasons(raw_data, content):
+    """List the reasons a UTF-8 file needs cleaning (empty if it is clean)"""
+    reasons = []
+    if any(pattern in raw_data for pattern in BYTE_ARTIFACTS):
+        reasons.append("byte artifacts")
+    if any(artifact in content for artifact in UTF16_ARTIFACTS):
+        reasons.append("UTF-16 artifacts")
+    if EXCESSIVE_LINES.search(content):
+        reasons.append("excessive empty lines")
+    return reasons
+
+def clean_content(content, original_encoding, log):
+    """Apply line-ending, character and blank-line fixes to decoded content"""
+    is_utf16 = original_encoding.startswith('utf-16')
+
     # Special handling for UTF-16 files - normalize line endings first
-    if original_encoding and original_encoding.startswith('utf-16'):
+    if is_utf16:
         # UTF-16 files often have messy line endings when converted
-        # First normalize all line ending variations
         content = content.replace('\r\n', '\n')  # Windows CRLF -> LF
         content = content.replace('\r', '\n')    # Mac CR -> LF
         # Remove any remaining null character artifacts
         content = content.replace('\x00', '')
-        print("🔧 Normalized UTF-16 line endings and removed null characters")
-    
-    total_replacements = 0
-    for old_char, new_char in replacements.items():
-        count = content.count(old_char)
-        if count > 0:
-            content = content.replace(old_char, new_char)
-            char_name = {
-                '\u2019': 'right single quotes',
-                '\u2018': 'left single quotes', 
-                '\u201C': 'left double quotes',
-                '\u201D': 'right double quotes',
-                '\u2013': 'en dashes',
-                '\u2014': 'em dashes',
-                '\u2026': 'ellipsis'
-            }.get(old_char, 'characters')
-            print(f"🔄 Replaced {count} {char_name} with '{new_char}'")
-            total_replacements += count
-    
-    if total_replacements > 0:
-        print(f"✨ Total Unicode characters replaced: {total_replacements}")
+        log("🔧 Normalized UTF-16 line endings and removed null characters")
+
+    counts = Counter(REPLACE_PATTERN.findall(content))
+    if counts:
+        content = content.translate(REPLACE_TABLE)
+        for old_char, count in counts.items():
+            log(f"🔄 Replaced {count} {CHAR_NAMES.get(old_char, 'characters')} with '{REPLACEMENTS[old_char]}'")
+        log(f"✨ Total Unicode characters replaced: {sum(counts.values())}")
     else:
-        print("ℹ️ No problematic Unicode characters found")
-    
-    # Clean up excessive empty lines 
-    import re
-    original_lines = len(content.split('\n'))
-    
-    # For UTF-16 converted files, be more aggressive with cleanup
-    if original_encoding and original_encoding.startswith('utf-16'):
-        # Remove all sequences of 2 or more empty lines, replace with single empty line
-        content = re.sub(r'\n{3,}', '\n\n', content)  # 3+ newlines -> 2 newlines
-        content = re.sub(r'\n\s*\n\s*\n', '\n\n', content)  # Remove whitespace-only lines between empty lines
+        log("ℹ️ No problematic Unicode characters found")
+
+    # Clean up excessive empty lines
+    original_lines = content.count('\n')
+
+    if is_utf16:
+        # For UTF-16 converted files, be more aggressive with cleanup
+        content = EXCESSIVE_LINES.sub('\n\n', content)  # 3+ newlines -> 2 newlines
+        content = UTF16_BLANK_RUN.sub('\n\n', content)  # Remove whitespace-only lines between empty lines
     else:
-        # For other files, just clean up excessive empty lines (3+ consecutive)
-        content = re.sub(r'\n{4,}', '\n\n\n', content)  # 4+ newlines -> 3 newlines max
-    
-    new_lines = len(content.split('\n'))
-    
-    if original_lines != new_lines:
-        lines_removed = original_lines - new_lines
-        print(f"🧹 Cleaned up excessive empty lines (removed {lines_removed} extra lines)")
-    
-    # Write back as UTF-8
+        # For other files, just clean up excessive empty lines (4+ consecutive)
+        content = OTHER_BLANK_RUN.sub('\n\n\n', content)  # 4+ newlines -> 3 newlines max
+
+    lines_removed = original_lines - content.count('\n')
+    if lines_removed:
+        log(f"🧹 Cleaned up excessive empty lines (removed {lines_removed} extra lines)")
+
+    return content
+
+# Results of checking/fixing one file
+CLEAN = 'clean'          # already clean UTF-8, nothing to do
+UNCHANGED = 'unchanged'  # cleanup ran but produced identical bytes
+FIXED = 'fixed'          # file was rewritten (or would be, in check mode)
+ERROR = 'error'
+
+def fix_encoding(file_path, log=print, raw_data=None, check=False):
+    """
+    Fix encoding issues in a file and convert it to UTF-8.
+    Pass raw_data if the file's bytes have already been read. The file is only
+    written when the normalized bytes differ from what is on disk; with
+    check=True it is never written.
+    Returns (status, digest); digest is the SHA-1 of the file's bytes when the
+    status is CLEAN or UNCHANGED, otherwise None.
+    """
+    if raw_data is None:
+        try:
+            with open(file_path, 'rb') as f:
+                raw_data = f.read()
+        except OSError as e:
+            log(f"⚠️ Could not read {file_path}: {e}")
+            return ERROR, None
+
+    content, original_encoding = decode_bytes(raw_data)
+    # Match text-mode reading: universal newlines
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    if original_encoding.startswith('utf-16'):
+        log(f"🔍 File appears to be UTF-16 encoded ({original_encoding})")
+    log(f"✅ Successfully read {file_path} with {original_encoding} encoding")
+
+    # Always convert to UTF-8 for consistency, even if originally UTF-8
+    if original_encoding == 'utf-8':
+        reasons = cleaning_reasons(raw_data, content)
+        if not reasons:
+            log(f"ℹ️ {file_path} is already clean UTF-8 encoded")
+            return CLEAN, hashlib.sha1(raw_data).hexdigest()
+        log(f"⚠️ {file_path} contains {', '.join(reasons)} - needs cleaning")
+
+    new_data = clean_content(content, original_encoding, log).encode('utf-8')
+
+    # Don't touch the file (and its mtime) when nothing would change
+    if new_data == raw_data:
+        log(f"ℹ️ {file_path} is unchanged after normalization - not rewritten")
+        return UNCHANGED, hashlib.sha1(raw_data).hexdigest()
+
+    if check:
+        return FIXED, None
+
+    # Write back as UTF-8, via a temp file so an interrupted run can't truncate it
+    tmp_path = f"{file_path}.tmp"
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"✅ Successfully converted {file_path} to UTF-8")
-        return True
+        with open(tmp_path, 'wb') as f:
+            f.write(new_data)
+        os.replace(tmp_path, file_path)
+        log(f"✅ Successfully converted {file_path} to UTF-8")
+        return FIXED, None
     except Exception as e:
-        print(f"❌ Failed to write {file_path}: {e}")
-        return False
+        log(f"❌ Failed to write {file_path}: {e}")
+        return ERROR, None
+
+def init_worker(known_clean):
+    global known_clean_hashes
+    known_clean_hashes = known_clean
+
+def process_file(file_path, check=False):
+    """
+    Pool worker: skip files whose hash is known clean, otherwise fix them.
+    Returns (file_path, status, digest, skipped, messages).
+    """
+    messages = []
+    try:
+        with open(file_path, 'rb') as f:
+            raw_data = f.read()
+    except OSError as e:
+        return file_path, ERROR, None, False, [f"⚠️ Could not read {file_path}: {e}"]
+
+    digest = hashlib.sha1(raw_data).hexdigest()
+    if digest in known_clean_hashes:
+        return file_path, CLEAN, digest, True, messages
+
+    status, digest = fix_encoding(file_path, log=messages.append, raw_data=raw_data, check=check)
+    return file_path, status, digest, False, messages
+
+def load_known_clean(cache_path):
+    """Load the set of content hashes known to need no fixing"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return set(json.load(f).get('clean', []))
+    except (OSError, ValueError):
+        return set()
+
+def save_known_clean(cache_path, hashes):
+    """Persist the known-clean hashes atomically"""
+    temp_path = cache_path + '.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'clean': sorted(hashes)}, f)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Could not write {cache_path}: {e}")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 def find_chopro_files():
     """Find all .chopro files in the music/ChordPro directory."""
     chopro_files = []
-    music_dir = os.path.join(os.getcwd(), 'music', 'ChordPro')
-    
+    music_dir = os.path.join('music', 'ChordPro')
+
     if not os.path.exists(music_dir):
         return chopro_files
-    
+
     for root, dirs, files in os.walk(music_dir):
         for file in files:
             if file.endswith('.chopro'):
                 chopro_files.append(os.path.join(root, file))
-    
+
     return chopro_files
 
+def staged_chopro_files():
+    """ChordPro files staged for commit, relative to the current directory"""
+    result = subprocess.run(
+        ["git", "diff", "--cached", "--name-only", "--relative", "--diff-filter=ACMR", "-z",
+         "--", "*.chopro"],
+        capture_output=True,
+        check=True,
+    )
+    return [name for name in result.stdout.decode('utf-8', 'surrogateescape').split('\0') if name]
+
+def run_batch(chopro_files, jobs, use_cache, check=False, full_catalog=False):
+    """
+    Process many files in a worker pool.
+    Returns (ok_count, needs_fix) where needs_fix lists files that were (or in
+    check mode, would be) rewritten. full_catalog means chopro_files is every
+    song, so cache entries for content no longer in the tree can be dropped.
+    """
+    known_clean = load_known_clean(CLEAN_CACHE_FILE) if use_cache else set()
+    still_clean = set()
+    ok_count = 0
+    skipped_count = 0
+    needs_fix = []
+
+    # The known-clean set goes to each worker once, not once per file
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(known_clean,)) as pool:
+        futures = [pool.submit(process_file, path, check) for path in chopro_files]
+        for future in futures:
+            file_path, status, digest, skipped, messages = future.result()
+            if skipped:
+                skipped_count += 1
+            elif check:
+                if status == FIXED:
+                    # Machine-readable: one path per line on stdout
+                    print(file_path)
+                elif status == ERROR:
+                    print('\n'.join(messages), file=sys.stderr)
+            elif status != CLEAN:
+                print(f"\n📄 Processing: {os.path.basename(file_path)}")
+                for message in messages:
+                    print(message)
+            if status != ERROR:
+                ok_count += 1
+            if status == FIXED:
+                needs_fix.append(file_path)
+            if digest:
+                still_clean.add(digest)
+
+    if use_cache and not check:
+        if full_catalog:
+            # Only keep hashes that still match a file in the tree
+            save_known_clean(CLEAN_CACHE_FILE, still_clean)
+        elif not still_clean <= known_clean:
+            # A partial run (--staged or a file list) cannot tell which
+            # hashes are stale, so it only adds to the cache
+            save_known_clean(CLEAN_CACHE_FILE, known_clean | still_clean)
+
+    if skipped_count:
+        print(f"\n⏩ Skipped {skipped_count} files already known to be clean",
+              file=sys.stderr if check else sys.stdout)
+    return ok_count, needs_fix
+
 def main():
-    import sys
-    
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description='Fix encoding issues and problematic Unicode characters in ChordPro files'
+    )
+    parser.add_argument('files', nargs='*',
+                        help='Files to process (default: all .chopro files in music/ChordPro/)')
+    parser.add_argument('--check', action='store_true',
+                        help='Only list files that need fixing (one per line); exit 1 if any do')
+    parser.add_argument('--staged', action='store_true',
+                        help='Only process .chopro files staged for commit')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Worker processes for batch mode (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Ignore and do not update {CLEAN_CACHE_FILE}')
+    args = parser.parse_args()
+
+    if len(args.files) == 1 and not args.check and not args.staged:
+        file_path = args.files[0]
         if os.path.exists(file_path):
             print(f"🔍 Analyzing encoding for: {file_path}")
-            if fix_encoding(file_path):
+            status, _ = fix_encoding(file_path)
+            if status != ERROR:
                 print(f"🎉 File encoding fixed successfully!")
             else:
-                print(f"� Failed to fix file encoding")
+                print(f"💥 Failed to fix file encoding")
                 sys.exit(1)
         else:
             print(f"❌ File not found: {file_path}")
             sys.exit(1)
+        return
+
+    # In check mode stdout is reserved for the list of files that need fixing
+    info = sys.stderr if args.check else sys.stdout
+
+    if args.files:
+        chopro_files = args.files
+    elif args.staged:
+        try:
+            chopro_files = staged_chopro_files()
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"❌ Could not list staged files: {e}", file=sys.stderr)
+            sys.exit(2)
     else:
-        # Find all .chopro files
         chopro_files = find_chopro_files()
-        if not chopro_files:
-            print("ℹ️ No .chopro files found in music/ChordPro/")
-            return
-        
-        print(f"� Found {len(chopro_files)} .chopro files")
+
+    missing = [path for path in chopro_files if not os.path.exists(path)]
+    if missing:
+        for path in missing:
+            print(f"❌ File not found: {path}", file=sys.stderr)
+        sys.exit(2)
+
+    if not chopro_files:
+        print("ℹ️ No .chopro files to process", file=info)
+        return
+
+    print(f"📂 Found {len(chopro_files)} .chopro files", file=info)
+    if not args.check:
         print("🔧 Processing encoding fixes and Unicode character replacements...")
-        
-        success_count = 0
-        for file_path in chopro_files:
-            print(f"\n� Processing: {os.path.basename(file_path)}")
-            if fix_encoding(file_path):
-                success_count += 1
-        
-        print(f"\n🎉 Successfully processed {success_count}/{len(chopro_files)} files")
+
+    ok_count, needs_fix = run_batch(chopro_files, args.jobs, not args.no_cache, args.check,
+                                   full_catalog=not args.files and not args.staged)
+
+    if args.check:
+        print(f"\n{len(needs_fix)} of {len(chopro_files)} files need fixing", file=sys.stderr)
+        sys.exit(1 if needs_fix else 0)
+
+    print(f"\n✏️ Rewrote {len(needs_fix)} files")
+    print(f"\n🎉 Successfully processed {ok_count}/{len(chopro_files)} files")
+    if ok_count != len(chopro_files):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import quote, unquote, urlsplit
 
+from pdf_dedupe import canonical_pdfs, pdf_preference
+
 
 BASE_URL = "https://tuesdayukes.org"
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -131,21 +133,20 @@ def resource_group_key(path: Path, resource_type: str) -> str:
 
 
 def resource_preference(path: Path, resource_type: str) -> tuple[int, str]:
-    relative_path = path.relative_to(SCRIPT_DIR).as_posix().lower()
+    relative_path = path.relative_to(SCRIPT_DIR).as_posix()
 
     if resource_type == "pdf":
-        if relative_path.startswith("music/chordpro/"):
-            return (0, relative_path)
-        if relative_path.startswith("music/pdfs/"):
-            return (1, relative_path)
+        return pdf_preference(relative_path)
 
-    return (2, relative_path)
+    return (2, relative_path.lower())
 
 
 def iter_internal_resource_files() -> dict[str, list[Path]]:
     resource_files: dict[str, dict[str, Path]] = {
         resource_type: {} for resource_type in RESOURCE_TYPES.values()
     }
+    # Byte-identical PDFs are listed once, under their canonical path
+    canonical = canonical_pdfs(SCRIPT_DIR)
 
     for html_path in iter_public_html_files():
         extractor = LinkExtractor()
@@ -164,6 +165,10 @@ def iter_internal_resource_files() -> dict[str, list[Path]]:
             if resource_type == "pdf" and "additional-version" in link.css_classes:
                 continue
 
+            if resource_type == "pdf":
+                relative_path = candidate.relative_to(SCRIPT_DIR).as_posix()
+                candidate = SCRIPT_DIR / canonical.get(relative_path, relative_path)
+
             group_key = resource_group_key(candidate, resource_type)
             existing = resource_files[resource_type].get(group_key)
 
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Single-pass extraction of selected tables from an HTML page.
+
+Used by extract_songs.py (cell text and links) and update_timestamps.py
+(source offsets) so index.html is parsed once by the stdlib HTMLParser
+instead of by BeautifulSoup or a regex per table.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+# Elements that never have a closing tag and so are never pushed on the stack.
+VOID_TAGS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+
+@dataclass
+class TableCell:
+    text: str = ""
+    links: list[str] = field(default_factory=list)
+
+
+@dataclass
+class HtmlTable:
+    """A table matched by id or by the heading that precedes it.
+
+    start and end are character offsets of "<table" and just past
+    "</table>"; end is None if the table is never closed.
+    """
+
+    table_id: str | None
+    heading: str | None
+    start: int
+    end: int | None = None
+    rows: list[list[TableCell]] = field(default_factory=list)
+
+
+class _TableCapture:
+    def __init__(self, table: HtmlTable, depth: int) -> None:
+        self.table = table
+        self.depth = depth
+        self.row: list[TableCell] | None = None
+        self.cell: TableCell | None = None
+        self.text: list[str] = []
+
+    def finish_cell(self) -> None:
+        if self.cell is not None:
+            self.cell.text = "".join(self.text)
+            self.cell = None
+            self.text = []
+
+
+class TableExtractor(HTMLParser):
+    """Collect tables whose id is in table_ids, plus each table that is the
+    next sibling of an h2/h3 whose text matches heading_pattern.
+
+    Cell text mirrors BeautifulSoup's get_text(strip=True): every text node
+    is stripped and the pieces are joined without a separator. Only <td>
+    cells are recorded; header rows keep their place as empty rows.
+    """
+
+    def __init__(self, html_content: str, table_ids=(), heading_pattern=None) -> None:
+        super().__init__(convert_charrefs=True)
+        self.table_ids = set(table_ids)
+        self.heading_pattern = heading_pattern
+        self.tables: list[HtmlTable] = []
+        self._seen_ids: set[str] = set()
+        self._line_starts = [0]
+        for match in re.finditer("\n", html_content):
+            self._line_starts.append(match.end())
+        self._html = html_content
+        self._stack: list[str] = []
+        self._captures: list[_TableCapture] = []
+        self._heading_text: list[str] | None = None
+        self._sibling_heading: tuple[str, int] | None = None
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self._line_starts[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        depth = len(self._stack)
+        heading = None
+
+        if self._sibling_heading and depth == self._sibling_heading[1]:
+            # Other siblings are skipped; another heading ends the search.
+            if tag == "table":
+                heading = self._sibling_heading[0]
+                self._sibling_heading = None
+            elif tag in HEADING_TAGS:
+                self._sibling_heading = None
+
+        if tag == "table":
+            table_id = dict(attrs).get("id")
+            if table_id in self.table_ids and table_id not in self._seen_ids:
+                self._seen_ids.add(table_id)
+            else:
+                table_id = None
+            if table_id is not None or heading is not None:
+                self._start_table(table_id, heading, depth)
+        elif tag in ("h2", "h3") and self.heading_pattern is not None:
+            self._heading_text = []
+
+        for capture in self._captures:
+            if tag == "tr":
+                capture.finish_cell()
+                capture.row = []
+                capture.table.rows.append(capture.row)
+            elif tag == "td" and capture.row is not None:
+                capture.finish_cell()
+                capture.cell = TableCell()
+                capture.row.append(capture.cell)
+            elif tag == "a" and capture.cell is not None:
+                href = dict(attrs).get("href")
+                if href is not None:
+                    capture.cell.links.append(href)
+
+        if tag not in VOID_TAGS:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing syntax opens and immediately closes the element.
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+
+        end = self._html.find(">", self._offset()) + 1
+        while self._stack:
+            closed = self._stack.pop()
+            depth = len(self._stack)
+            for capture in list(self._captures):
+                if closed == "td":
+                    capture.finish_cell()
+                elif closed == "tr":
+                    capture.finish_cell()
+                    capture.row = None
+                if closed == "table" and capture.depth == depth:
+                    capture.finish_cell()
+                    capture.table.end = end
+                    self._captures.remove(capture)
+            if closed in ("h2", "h3") and self._heading_text is not None:
+                text = "".join(self._heading_text)
+                self._heading_text = None
+                if text and self.heading_pattern.search(text):
+                    self._sibling_heading = (text, depth)
+            if closed == tag:
+                break
+
+        if self._sibling_heading and len(self._stack) < self._sibling_heading[1]:
+            self._sibling_heading = None
+
+    def handle_data(self, data):
+        stripped = data.strip()
+        if not stripped:
+            return
+        if self._heading_text is not None:
+            self._heading_text.append(stripped)
+        for capture in self._captures:
+            if capture.cell is not None:
+                capture.text.append(stripped)
+
+    def _start_table(self, table_id, heading, depth) -> None:
+        table = HtmlTable(table_id=table_id, heading=heading, start=self._offset())
+        self.tables.append(table)
+        self._captures.append(_TableCapture(table, depth))
+
+
+def extract_tables(html_content: str, table_ids=(), heading_pattern=None) -> list[HtmlTable]:
+    """Return the requested tables in document order from a single parse.
+
+    Only the first table with each id is returned. Tables inside HTML
+    comments are not part of the document and are never matched.
+    """
+    extractor = TableExtractor(html_content, table_ids, heading_pattern)
+    extractor.feed(html_content)
+    extractor.close()
+    return extractor.tables
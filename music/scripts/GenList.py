@@ -1,43 +1,81 @@
 #! python
 import subprocess
-from first import first
+import json
 from pathlib import Path
 from posixpath import basename, splitext
 import sys
 import os
 import argparse
+import importlib
 from re import M
 from datetime import datetime
 
-parser = argparse.ArgumentParser()
-parser.add_argument("musicFolder")
-parser.add_argument("outputFile")
-parser.add_argument("--intro", action=argparse.BooleanOptionalAction, default=True)
-parser.add_argument("--genPDF", action=argparse.BooleanOptionalAction, default=False)
-parser.add_argument("--forcePDF", action=argparse.BooleanOptionalAction, default=False)
-parser.add_argument("--filter", choices=["none", "hidden", "timestamp"], default="timestamp",
-                    help="Filter method: 'none' (show all files), 'hidden' (hide files with .hide), 'timestamp' (show newest versions only)")
-args = parser.parse_args()
-
-print("Generating Music List (this takes a few seconds)", file=sys.stderr)
-print(f"Using filter method: {args.filter}", file=sys.stderr)
-
-musicFolder = args.musicFolder
-outputFile = args.outputFile
-intro = args.intro
-forceNewPDF = args.forcePDF
-genPDF = args.genPDF
-filterMethod = args.filter
-
-now = datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
-
 # lambda filename accepts a path and returns just the filename without an extension
 filename = lambda p: str(os.path.splitext(os.path.basename(p))[0])
 
 # lambda ext is like lambda filename, except it returns the file extension
 ext = lambda p: str(os.path.splitext(os.path.basename(p))[1]).lower()
 
-def createPDFs():
+repoRoot = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+# Import a helper module from the repository root, or None if it (or one of
+# its optional dependencies) is unavailable.
+def importRepoModule(name):
+  if repoRoot not in sys.path:
+    sys.path.insert(0, repoRoot)
+  try:
+    return importlib.import_module(name)
+  except ImportError:
+    return None
+
+# The in-process renderer needs fpdf2; returns None when it cannot be used so
+# the Perl tool renders everything.
+def loadPythonRenderer():
+  chordpro_pdf = importRepoModule("chordpro_pdf")
+  if chordpro_pdf is None or chordpro_pdf.FPDF is None:
+    return None
+  return chordpro_pdf
+
+def localPath(p):
+  return Path(os.path.relpath(os.path.join(repoRoot, p))).as_posix()
+
+# Byte-identical PDFs (see pdf_dedupe.py) are linked through one canonical
+# copy. Returns duplicate -> canonical, as paths relative to the current folder.
+def loadCanonicalPDFs():
+  pdfDedupe = importRepoModule("pdf_dedupe")
+  if pdfDedupe is None:
+    return {}
+  try:
+    canonical = pdfDedupe.canonical_pdfs()
+  except OSError as e:
+    print(f"Skipping PDF deduplication: {e}", file=sys.stderr)
+    return {}
+  return {localPath(dup): localPath(canon) for dup, canon in canonical.items()}
+
+# A row links each group of identical PDFs once, so that link is hidden only
+# when every copy in the group is. Returns the canonical PDFs to hide.
+def hiddenPDFLinks(files, canonicalPDFs, hiddenFiles):
+  groups = {}
+  for file in files:
+    if ext(file) == ".pdf":
+      groups.setdefault(canonicalPDFs.get(file, file), []).append(file)
+  return {canonical for canonical, members in groups.items()
+          if all(member in hiddenFiles for member in members)}
+
+# First-page previews rendered by pdf_previews.py. Returns PDF -> preview
+# image, as paths relative to the current folder.
+def loadPDFPreviews():
+  pdfPreviews = importRepoModule("pdf_previews")
+  if pdfPreviews is None:
+    return {}
+  try:
+    previews = pdfPreviews.preview_paths()
+  except OSError as e:
+    print(f"Skipping PDF previews: {e}", file=sys.stderr)
+    return {}
+  return {localPath(pdf): localPath(preview) for pdf, preview in previews.items()}
+
+def createPDFs(musicFolder, forceNewPDF, renderer="auto"):
   linuxpath = ["perl",
                "/home/paul/chordpro/script/chordpro.pl",
                "--config=/home/paul/chordpro/lib/ChordPro/res/config/ukulele.json",
@@ -70,12 +108,25 @@ def createPDFs():
     chordproSettings = linuxpath + chordproSettings
 
   extensions = [".chopro", ".cho"]
+  todo = []
   for p in Path(musicFolder).rglob('*'):
     if ext(p) in (extension.lower() for extension in extensions):
       pdfFile = str(os.path.splitext(str(p))[0]) + ".pdf"
       if not os.path.exists(pdfFile) or forceNewPDF:
-        print("Generating " + pdfFile)
-        subprocess.run(chordproSettings + [str(p)])
+        todo.append(p)
+
+  # Songs the Python renderer cannot lay out yet still go through Perl
+  pythonRenderer = loadPythonRenderer() if renderer == "auto" else None
+  if pythonRenderer is not None and todo:
+    results = pythonRenderer.render_many(todo, force=True)
+    for p, _ in results["rendered"]:
+      print("Generated " + str(p.with_suffix(".pdf")))
+    todo = [p for p, _ in results["unsupported"] + results["error"]]
+
+  for p in todo:
+    pdfFile = str(os.path.splitext(str(p))[0]) + ".pdf"
+    print("Generating " + pdfFile)
+    subprocess.run(chordproSettings + [str(p)])
 
 # A file with the extension ".hide" will prevent other files within the same
 # folder with the same name (but all extensions) from being adding to the
@@ -90,6 +141,16 @@ def getEasySongs(allFiles):
   return {str(os.path.splitext(f)[0]).lower() 
           for f in allFiles if ext(f).lower() == ".easy"}
 
+# Difficulty scores (1 = easiest) are computed in a batch pass by
+# find_easy_songs.py --difficulty and keyed by song path without extension.
+def loadDifficultyScores(path):
+  try:
+    with open(path, "r", encoding="utf-8") as f:
+      data = json.load(f)
+  except (OSError, ValueError):
+    return {}
+  return {k.lower(): v for k, v in data.get("songs", {}).items()}
+
 def getAllGitTimestamps(files):
   """Get git timestamps for all files in one batch operation using a single git command"""
   timestamps = {}
@@ -239,9 +300,6 @@ def dictCompare(s):
   # Remove punctuation in one pass using translate
   return formattedS.translate(str.maketrans('', '', '\',\'')).lower()
 
-with open("HTMLheader.txt", "r") as headerText:
-  header = headerText.readlines()
-
 introduction = """
 <h1>Tuesday Ukes' Archive of Ukulele Songs and Chords</h1>
 
@@ -263,13 +321,27 @@ ukulele music. More-advanced ukulele music players can find finger-stretching
 chord changes and chord shapes applied to popular ukulele songs. </p>
 """
 
-searchControls = """
+# The search controls and script depend on the filter method chosen on the
+# command line, so they are built per run.
+def getSearchControls(filterMethod):
+  return """
 <div class="search-controls">
     <h2>Search & Filter</h2>
     <input type="text" id="searchInput" placeholder="🔍 Search songs by title...">
     <div class="filter-checkbox">
         <input type="checkbox" id="easyFilter">
         <label for="easyFilter">🎵 Show only easy songs (perfect for beginners!)</label>
+    </div>
+    <div class="difficulty-filter">
+        <label for="difficultyMin">📈 Difficulty from</label>
+        <input type="number" id="difficultyMin" min="1" max="10" value="1">
+        <label for="difficultyMax">to</label>
+        <input type="number" id="difficultyMax" min="1" max="10" value="10">
+        <label for="sortOrder">Sort by</label>
+        <select id="sortOrder">
+            <option value="title">Title</option>
+            <option value="difficulty">Difficulty (easiest first)</option>
+        </select>
     </div>""" + ("""
     <div class="filter-checkbox">
         <input type="checkbox" id="showAllVersions">
@@ -281,15 +353,21 @@ searchControls = """
 </div>
 """
 
-searchScript = """
+def getSearchScript(filterMethod):
+  return """
 </div>
 </section>
 <script>
     const searchInput = document.getElementById('searchInput');
     const easyFilter = document.getElementById('easyFilter');
     const showAllVersions = document.getElementById('showAllVersions');
+    const difficultyMin = document.getElementById('difficultyMin');
+    const difficultyMax = document.getElementById('difficultyMax');
+    const sortOrder = document.getElementById('sortOrder');
     const table = document.getElementById('dataTable');
-    const rows = table.getElementsByTagName('tbody')[0].getElementsByTagName('tr');
+    const tbody = table.getElementsByTagName('tbody')[0];
+    const rows = tbody.getElementsByTagName('tr');
+    const titleOrder = Array.from(rows);
     const searchStats = document.getElementById('searchStats');
     const visibleCountSpan = document.getElementById('visibleCount');
     const totalCountSpan = document.getElementById('totalCount');
@@ -297,14 +375,33 @@ searchScript = """
     // Set total count
     totalCountSpan.textContent = rows.length;
 
+    function difficultyRangeActive() {
+        return Number(difficultyMin.value) > Number(difficultyMin.min) ||
+               Number(difficultyMax.value) < Number(difficultyMax.max);
+    }
+
     function updateSearchStats(visibleCount) {
         visibleCountSpan.textContent = visibleCount;
-        searchStats.style.display = (searchInput.value || easyFilter.checked || (showAllVersions && showAllVersions.checked)) ? 'block' : 'none';
+        searchStats.style.display = (searchInput.value || easyFilter.checked || difficultyRangeActive() || (showAllVersions && showAllVersions.checked)) ? 'block' : 'none';
+    }
+
+    // Re-append rows in the chosen order; row numbers keep their title order
+    function sortRows() {
+        let ordered = titleOrder;
+        if (sortOrder.value === 'difficulty') {
+            // Array.prototype.sort is stable, so equal scores stay in title order
+            ordered = titleOrder.slice().sort((a, b) =>
+                Number(a.dataset.difficulty || 99) - Number(b.dataset.difficulty || 99));
+        }
+        ordered.forEach(row => tbody.appendChild(row));
     }
 
     function filterRows() {
         const searchFilter = searchInput.value.toLowerCase();
         const easyOnly = easyFilter.checked;
+        const minDifficulty = Number(difficultyMin.value);
+        const maxDifficulty = Number(difficultyMax.value);
+        const rangeActive = difficultyRangeActive();
         const showAll = showAllVersions ? showAllVersions.checked : true;
         let visibleCount = 0;
 
@@ -319,7 +416,12 @@ searchScript = """
                 let showBySearch = !searchFilter || rowText.includes(searchFilter);
                 let showByEasy = !easyOnly || isEasy;
 
-                const shouldShow = showBySearch && showByEasy;
+                // Songs without a score are only hidden once the range is narrowed
+                const difficulty = rows[i].dataset.difficulty;
+                let showByDifficulty = !rangeActive ||
+                    (difficulty !== undefined && Number(difficulty) >= minDifficulty && Number(difficulty) <= maxDifficulty);
+
+                const shouldShow = showBySearch && showByEasy && showByDifficulty;
                 rows[i].style.display = shouldShow ? '' : 'none';
 
                 if (shouldShow) {
@@ -346,6 +448,9 @@ searchScript = """
     });
 
     easyFilter.addEventListener('change', filterRows);
+    difficultyMin.addEventListener('change', filterRows);
+    difficultyMax.addEventListener('change', filterRows);
+    sortOrder.addEventListener('change', sortRows);
     if (showAllVersions) {
         showAllVersions.addEventListener('change', filterRows);
     }
@@ -366,136 +471,247 @@ searchScript = """
 </script>
 """
 
-if genPDF:
-  createPDFs()
-
-# Pre-convert extensions to lowercase for faster comparison
-extensions = {".pdf", ".chopro", ".cho", ".mscz", ".urltxt", ".hide", ".easy"}
-allFiles = []
-# Use a single rglob call and filter more efficiently
-for p in Path(musicFolder).rglob('*'):
-  if p.suffix.lower() in extensions:
-    allFiles.append(p.as_posix())
-
-# Determine which files should be filtered out for JavaScript handling
-# Always include all files in HTML, but mark filtered ones with CSS classes
-visibleFiles = allFiles
-
-# Determine which files would be filtered by timestamp filtering
-newestFiles = keepNewestVersionsOnly(allFiles)
-hiddenByTimestamp = set(allFiles) - set(newestFiles)
-
-# Determine which files would be filtered by .hide files  
-visibleByHide = removeHiddenFiles(allFiles)
-hiddenByHideFiles = set(allFiles) - set(visibleByHide)
-
-# Apply the selected filtering method for the default view state
-if filterMethod == "none":
-  defaultHiddenFiles = set()
-elif filterMethod == "hidden":
-  defaultHiddenFiles = hiddenByHideFiles
-elif filterMethod == "timestamp":
-  # Files hidden by timestamp OR by .hide files
-  defaultHiddenFiles = hiddenByTimestamp | hiddenByHideFiles
-else:
-  # Fallback to timestamp method if somehow an invalid value gets through
-  defaultHiddenFiles = hiddenByTimestamp | hiddenByHideFiles
-
-easySongs = getEasySongs(allFiles)
+# One floating <img> shared by every PDF link with a data-preview attribute.
+# The image is only requested when a link is hovered or focused, so the
+# archive page itself loads no preview bytes.
+previewScript = """
+<img id="pdf-preview" alt="" decoding="async" hidden>
+<script>
+(function() {
+    const preview = document.getElementById('pdf-preview');
+    const table = document.getElementById('dataTable');
+
+    function show(event) {
+        const link = event.target.closest('a[data-preview]');
+        if (!link) return;
+        const rect = link.getBoundingClientRect();
+        preview.src = link.dataset.preview;
+        // 240px wide like the images; A5 pages come out about 330px tall
+        const left = rect.right + 252 > window.innerWidth ? rect.left - 252 : rect.right + 12;
+        preview.style.left = Math.round(Math.max(8, left)) + 'px';
+        preview.style.top = Math.round(Math.max(8, Math.min(rect.top - 40, window.innerHeight - 340))) + 'px';
+        preview.hidden = false;
+    }
+
+    function hide(event) {
+        if (event.target.closest('a[data-preview]')) preview.hidden = true;
+    }
+
+    table.addEventListener('mouseover', show);
+    table.addEventListener('focusin', show);
+    table.addEventListener('mouseout', hide);
+    table.addEventListener('focusout', hide);
+})();
+</script>
+"""
 
 # return the first file that matches basename (there should be only zero or one
 # matches). Return None if no matches found.
 def findMatchingBasename(files, basename):
-  return first((f for f in files if dictCompare(f[0]) == dictCompare(filename(basename))))
-
-# allTitles will be an array of arrays. Each element's [0] entry will be the
-# song title. The other entries will be file paths that contain that title.
-# Use dictionary for faster lookup, then convert to list
-titleDict = {}
-for p in visibleFiles:
-  title = filename(p)
-  titleKey = dictCompare(title)
-  if titleKey in titleDict:
-    titleDict[titleKey].append(str(p))
+  return next((f for f in files if dictCompare(f[0]) == dictCompare(filename(basename))), None)
+
+def parseArgs(argv=None):
+  parser = argparse.ArgumentParser()
+  parser.add_argument("musicFolder")
+  parser.add_argument("outputFile")
+  parser.add_argument("--intro", action=argparse.BooleanOptionalAction, default=True)
+  parser.add_argument("--genPDF", action=argparse.BooleanOptionalAction, default=False)
+  parser.add_argument("--forcePDF", action=argparse.BooleanOptionalAction, default=False)
+  parser.add_argument("--renderer", choices=["auto", "perl"], default="auto",
+                      help="PDF renderer: 'auto' (in-process chordpro_pdf.py, Perl for unsupported songs), 'perl' (Perl chordpro only)")
+  parser.add_argument("--filter", choices=["none", "hidden", "timestamp"], default="timestamp",
+                      help="Filter method: 'none' (show all files), 'hidden' (hide files with .hide), 'timestamp' (show newest versions only)")
+  parser.add_argument("--html", action=argparse.BooleanOptionalAction, default=False,
+                      help="Include/exclude .html files found in the music folder as catalog links (default: exclude)")
+  parser.add_argument("--difficulty", default="song-difficulty.json",
+                      help="Difficulty scores written by find_easy_songs.py --difficulty (skipped if the file is missing)")
+  return parser.parse_args(argv)
+
+def main(argv=None):
+  """Write the archive table for a music folder; argv defaults to sys.argv."""
+  args = parseArgs(argv)
+
+  print("Generating Music List (this takes a few seconds)", file=sys.stderr)
+  print(f"Using filter method: {args.filter}", file=sys.stderr)
+
+  musicFolder = args.musicFolder
+  outputFile = args.outputFile
+  intro = args.intro
+  forceNewPDF = args.forcePDF
+  genPDF = args.genPDF
+  filterMethod = args.filter
+  difficultyFile = args.difficulty
+  includeHtml = args.html
+  now = datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
+
+  with open("HTMLheader.txt", "r") as headerText:
+    header = headerText.readlines()
+
+  if genPDF:
+    createPDFs(musicFolder, forceNewPDF, args.renderer)
+
+  # Pre-convert extensions to lowercase for faster comparison
+  extensions = {".pdf", ".chopro", ".cho", ".mscz", ".urltxt", ".hide", ".easy"}
+  if includeHtml:
+    extensions.add(".html")
+  allFiles = []
+  # Use a single rglob call and filter more efficiently
+  for p in Path(musicFolder).rglob('*'):
+    if p.suffix.lower() in extensions:
+      allFiles.append(p.as_posix())
+
+  # Determine which files should be filtered out for JavaScript handling
+  # Always include all files in HTML, but mark filtered ones with CSS classes
+  visibleFiles = allFiles
+
+  # Determine which files would be filtered by timestamp filtering
+  newestFiles = keepNewestVersionsOnly(allFiles)
+  hiddenByTimestamp = set(allFiles) - set(newestFiles)
+
+  # Determine which files would be filtered by .hide files  
+  visibleByHide = removeHiddenFiles(allFiles)
+  hiddenByHideFiles = set(allFiles) - set(visibleByHide)
+
+  # Apply the selected filtering method for the default view state
+  if filterMethod == "none":
+    defaultHiddenFiles = set()
+  elif filterMethod == "hidden":
+    defaultHiddenFiles = hiddenByHideFiles
+  elif filterMethod == "timestamp":
+    # Files hidden by timestamp OR by .hide files
+    defaultHiddenFiles = hiddenByTimestamp | hiddenByHideFiles
   else:
-    titleDict[titleKey] = [title, str(p)]
-
-allTitles = list(titleDict.values())
-
-downloadExtensions = [".cho", ".chopro"]
-sortedTitles = sorted(allTitles, key=(lambda e: dictCompare(e[0]).casefold()))
-with open(outputFile, "w", encoding='utf-8') as htmlOutput:
-  htmlOutput.writelines(header)
-  if intro:
-    htmlOutput.writelines(introduction)
-  htmlOutput.writelines(searchControls)
-  htmlOutput.write('<table id="dataTable">')
-  htmlOutput.write("<thead>\n")
-  htmlOutput.write("<tr><th>#</th><th>Song Title</th><th>Downloads</th></tr>\n")
-  htmlOutput.write("</thead>\n")
-  htmlOutput.write("<tbody>\n")
-  row_number = 1
-  for f in sortedTitles:
-    try:
-      # Check if this song is marked as easy
-      isEasy = any(str(os.path.splitext(file)[0]).lower() in easySongs for file in f[1:])
-      
-      # Check if this song has additional versions that were filtered out
-      # This means there are files available when "show all versions" is checked
-      hasAdditionalVersions = any(file in defaultHiddenFiles for file in f[1:])
-      
-      # Only mark as hidden-version if there are additional filtered versions available
-      # This helps users know they can see more by checking "show all versions"
-      isHiddenVersion = hasAdditionalVersions
-      
-      # Build CSS classes
-      cssClasses = []
-      if isEasy:
-        cssClasses.append("easy-song")
-      if isHiddenVersion:
-        cssClasses.append("hidden-version")
-      
-      classAttr = f' class="{" ".join(cssClasses)}"' if cssClasses else ''
-
-      htmlOutput.write(f"<tr{classAttr}>")
-      # first table column contains the row number
-      htmlOutput.write(f"  <td>{row_number}</td>")
-      # second table column contains the song title (f[0])
-      htmlOutput.write(f"  <td>{f[0]}</td>\n<td>")
-      # the remainder of f's elements are files that match the title in f[0]
-      # Sort the files to ensure consistent ordering across operating systems
-      # Sort by extension first, then by the complete normalized path
-      sorted_files = sorted(f[1:], key=lambda x: (ext(x), x.lower().replace('\\', '/')))
-      for i in sorted_files:
-        # Skip .easy and .hide marker files - they shouldn't appear as downloads
-        if ext(i) in [".easy", ".hide"]:
-          continue
-        
-        # Determine if this file is hidden by the current filter method
-        fileClass = ' class="additional-version"' if i in defaultHiddenFiles else ''
-        
-        if ext(i) == ".urltxt":
-          with open(i, "r") as urlFile:
-            label = urlFile.readline().strip()
-            address = urlFile.readline().strip()
-          htmlOutput.write(f"<a href=\"{address}\" target=\"_blank\"{fileClass}>{label}</a><br>\n")
-        elif ext(i) in downloadExtensions:
-          htmlOutput.write(f" <a href=\"{str(i).replace(' ','%20')}?v={now}\" download=\"{filename(i)}{ext(i)}\" target=\"_blank\"{fileClass}>{ext(i)}</a><br>\n")
-        else:
-          htmlOutput.write(f"  <a href=\"{str(i).replace(' ','%20')}?v={now}\" target=\"_blank\"{fileClass}>{ext(i)}</a><br>\n")
-
-      # close each table row (and the table data containing file links)
-      htmlOutput.write("</td></tr>\n")
-      row_number += 1
-    except:
-      print(f"failed to write {f[1:]}")
-
-  #close the table etc.
-  htmlOutput.write("</tbody>")
-  htmlOutput.write("</table>")
-  htmlOutput.write(searchScript)
-  htmlOutput.write("</div>\n")
-  htmlOutput.write("</div>\n")
-  htmlOutput.write("</body>\n")
-
-print("Done!", file=sys.stderr)
+    # Fallback to timestamp method if somehow an invalid value gets through
+    defaultHiddenFiles = hiddenByTimestamp | hiddenByHideFiles
+
+  canonicalPDFs = loadCanonicalPDFs()
+  if canonicalPDFs:
+    print(f"Linking {len(canonicalPDFs)} duplicate PDFs to their canonical copies", file=sys.stderr)
+  pdfPreviews = loadPDFPreviews()
+  if pdfPreviews:
+    print(f"Found previews for {len(pdfPreviews)} PDFs", file=sys.stderr)
+
+  easySongs = getEasySongs(allFiles)
+  difficultyScores = loadDifficultyScores(difficultyFile)
+  if difficultyScores:
+    print(f"Loaded difficulty scores for {len(difficultyScores)} songs", file=sys.stderr)
+
+  # allTitles will be an array of arrays. Each element's [0] entry will be the
+  # song title. The other entries will be file paths that contain that title.
+  # Use dictionary for faster lookup, then convert to list
+  titleDict = {}
+  for p in visibleFiles:
+    title = filename(p)
+    titleKey = dictCompare(title)
+    if titleKey in titleDict:
+      titleDict[titleKey].append(str(p))
+    else:
+      titleDict[titleKey] = [title, str(p)]
+
+  allTitles = list(titleDict.values())
+
+  downloadExtensions = [".cho", ".chopro"]
+  sortedTitles = sorted(allTitles, key=(lambda e: dictCompare(e[0]).casefold()))
+  with open(outputFile, "w", encoding='utf-8') as htmlOutput:
+    htmlOutput.writelines(header)
+    if intro:
+      htmlOutput.writelines(introduction)
+    htmlOutput.writelines(getSearchControls(filterMethod))
+    htmlOutput.write('<table id="dataTable">')
+    htmlOutput.write("<thead>\n")
+    htmlOutput.write("<tr><th>#</th><th>Song Title</th><th>Downloads</th></tr>\n")
+    htmlOutput.write("</thead>\n")
+    htmlOutput.write("<tbody>\n")
+    row_number = 1
+    for f in sortedTitles:
+      try:
+        # Check if this song is marked as easy
+        isEasy = any(str(os.path.splitext(file)[0]).lower() in easySongs for file in f[1:])
+
+        # Check if this song has additional versions that were filtered out
+        # This means there are files available when "show all versions" is checked
+        hasAdditionalVersions = any(file in defaultHiddenFiles for file in f[1:])
+
+        # Only mark as hidden-version if there are additional filtered versions available
+        # This helps users know they can see more by checking "show all versions"
+        isHiddenVersion = hasAdditionalVersions
+
+        # Build CSS classes
+        cssClasses = []
+        if isEasy:
+          cssClasses.append("easy-song")
+        if isHiddenVersion:
+          cssClasses.append("hidden-version")
+
+        classAttr = f' class="{" ".join(cssClasses)}"' if cssClasses else ''
+
+        # Use the score of a version shown by default, falling back to any version
+        rowScores = []
+        for file in f[1:]:
+          key = str(os.path.splitext(file)[0]).lower()
+          if key in difficultyScores:
+            rowScores.append((file in defaultHiddenFiles, difficultyScores[key]))
+        difficultyAttr = f' data-difficulty="{min(rowScores)[1]}"' if rowScores else ''
+
+        htmlOutput.write(f"<tr{classAttr}{difficultyAttr}>")
+        # first table column contains the row number
+        htmlOutput.write(f"  <td>{row_number}</td>")
+        # second table column contains the song title (f[0])
+        htmlOutput.write(f"  <td>{f[0]}</td>\n<td>")
+        # the remainder of f's elements are files that match the title in f[0]
+        # Sort the files to ensure consistent ordering across operating systems
+        # Sort by extension first, then by the complete normalized path
+        sorted_files = sorted(f[1:], key=lambda x: (ext(x), x.lower().replace('\\', '/')))
+        linkedPDFs = set()
+        hiddenPDFs = hiddenPDFLinks(sorted_files, canonicalPDFs, defaultHiddenFiles)
+        for i in sorted_files:
+          # Skip .easy and .hide marker files - they shouldn't appear as downloads
+          if ext(i) in [".easy", ".hide"]:
+            continue
+
+          # Identical PDFs get one link, to the canonical copy
+          if ext(i) == ".pdf":
+            canonicalPDF = canonicalPDFs.get(i, i)
+            if canonicalPDF in linkedPDFs:
+              continue
+            linkedPDFs.add(canonicalPDF)
+
+          # Determine if this file is hidden by the current filter method
+          hidden = canonicalPDF in hiddenPDFs if ext(i) == ".pdf" else i in defaultHiddenFiles
+          fileClass = ' class="additional-version"' if hidden else ''
+
+          if ext(i) == ".urltxt":
+            with open(i, "r") as urlFile:
+              label = urlFile.readline().strip()
+              address = urlFile.readline().strip()
+            htmlOutput.write(f"<a href=\"{address}\" target=\"_blank\"{fileClass}>{label}</a><br>\n")
+          elif ext(i) in downloadExtensions:
+            htmlOutput.write(f" <a href=\"{str(i).replace(' ','%20')}?v={now}\" download=\"{filename(i)}{ext(i)}\" target=\"_blank\"{fileClass}>{ext(i)}</a><br>\n")
+          elif ext(i) == ".pdf":
+            preview = pdfPreviews.get(canonicalPDF)
+            previewAttr = f' data-preview="{preview}"' if preview else ''
+            htmlOutput.write(f"  <a href=\"{canonicalPDF.replace(' ','%20')}?v={now}\" target=\"_blank\"{fileClass}{previewAttr}>{ext(i)}</a><br>\n")
+          else:
+            htmlOutput.write(f"  <a href=\"{str(i).replace(' ','%20')}?v={now}\" target=\"_blank\"{fileClass}>{ext(i)}</a><br>\n")
+
+        # close each table row (and the table data containing file links)
+        htmlOutput.write("</td></tr>\n")
+        row_number += 1
+      except:
+        print(f"failed to write {f[1:]}")
+
+    #close the table etc.
+    htmlOutput.write("</tbody>")
+    htmlOutput.write("</table>")
+    htmlOutput.write(getSearchScript(filterMethod))
+    if pdfPreviews:
+      htmlOutput.write(previewScript)
+    htmlOutput.write("</div>\n")
+    htmlOutput.write("</div>\n")
+    htmlOutput.write("</body>\n")
+
+  print("Done!", file=sys.stderr)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -1,43 +1,117 @@
-from pathlib import Path
-from posixpath import basename, splitext
-import re
+import argparse
 import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Converts OnSong "&blue:" line markers into ChordPro {textcolour} blocks.
+# Files are only rewritten (atomically) when the conversion changes them, so
+# unmarked songs keep their mtime and generate-pdfs.sh does not re-render them.
 
-allFiles = []
-for p in Path("./").rglob('*.chopro'):
-  allFiles.append(p)
-for p in Path("./").rglob('*.cho'):
-  allFiles.append(p)
+extensions = (".chopro", ".cho")
+skipDirs = {".git", "node_modules", "_site", "__pycache__"}
 
-startColor = re.compile('textcolour: *\w+')
-endColor = re.compile('textcolour *}')
 onsongColor = re.compile('.&blue:')
+onsongMarker = b'&blue:'
+
+def findSongs(paths):
+  songs = []
+  for path in paths:
+    if os.path.isfile(path):
+      songs.append(path)
+      continue
+    for root, dirs, files in os.walk(path):
+      dirs[:] = [d for d in dirs if d not in skipDirs]
+      songs.extend(os.path.join(root, f) for f in files if f.lower().endswith(extensions))
+  return sorted(songs)
+
+def patchText(text):
+  out = []
+  addColor = False
+  for l in text.splitlines(keepends=True):
+    if not addColor and onsongColor.search(l):
+      addColor = True
+      out.append("{textcolour: blue}\n")
+    elif addColor and not onsongColor.search(l):
+      addColor = False
+      out.append("{textcolour}\n")
 
-for p in allFiles:
+    if addColor:
+      out.append(l.replace('&blue:', ''))
+    else:
+      out.append(l)
+
+  if addColor:
+    if out and not out[-1].endswith("\n"):
+      out.append("\n")
+    out.append("{textcolour}\n")
+  return "".join(out)
+
+def writeAtomic(p, data):
+  tmp = p + ".tmp"
+  with open(tmp, mode="wb") as f:
+    f.write(data)
   try:
-    with open(p, mode="r", encoding="utf-8") as f:
-      srcLines = f.readlines()
+    os.chmod(tmp, os.stat(p).st_mode)
+  except OSError:
+    pass
+  os.replace(tmp, p)
+
+# Returns "unchanged", "patched" (or would be, with check) or "failed".
+def patchFile(p, check=False):
+  try:
+    with open(p, mode="rb") as f:
+      raw = f.read()
+    # Most songs have no markers; skip them without decoding
+    if onsongMarker not in raw:
+      return "unchanged"
+
+    # Same newline handling as reading the file in text mode
+    text = raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    patched = patchText(text).encode("utf-8")
+    if patched == raw:
+      return "unchanged"
+    if not check:
+      writeAtomic(p, patched)
+    return "patched"
+  except (OSError, UnicodeDecodeError):
+    return "failed"
 
-    addColor = False
-    with open(p, mode="w", encoding="utf-8") as f:
-      for l in srcLines:
-        if not addColor and onsongColor.search(l):
-          addColor = True
-          f.write("{textcolour: blue}\n")
-        elif addColor and not onsongColor.search(l):
-          addColor = False
-          f.write("{textcolour}\n")
+def parseArgs(argv=None):
+  parser = argparse.ArgumentParser(description="Convert OnSong &blue: markers to {textcolour} blocks")
+  parser.add_argument("paths", nargs="*", default=["./"],
+                      help="ChordPro files or folders to patch (default: current folder)")
+  parser.add_argument("--check", action="store_true",
+                      help="Only list files that would change; exit 1 if there are any")
+  parser.add_argument("--jobs", "-j", type=int, default=None,
+                      help="Worker processes (default: CPU count)")
+  return parser.parse_args(argv)
 
-        if addColor:
-          newL = l.replace('&blue:','')
-          f.write(newL)
-        else:
-          f.write(l)
+def main(argv=None):
+  args = parseArgs(argv)
+  allFiles = findSongs(args.paths)
 
-      if addColor:
-        f.write("{textcolour}\n")
+  if args.jobs == 1 or len(allFiles) < 2:
+    results = [patchFile(p, args.check) for p in allFiles]
+  else:
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+      results = list(pool.map(patchFile, allFiles, [args.check] * len(allFiles), chunksize=32))
 
+  patched = 0
+  failed = 0
+  for p, result in zip(allFiles, results):
+    if result == "patched":
+      patched += 1
+      print(("would patch " if args.check else "patched ") + p)
+    elif result == "failed":
+      failed += 1
+      print(f"failed on file {p}")
 
-  except:
-    print(f"failed on file {str(p)}")
+  verb = "need patching" if args.check else "patched"
+  print(f"{len(allFiles)} files scanned, {patched} {verb}, {failed} failed")
+  if failed or (args.check and patched):
+    return 1
+  return 0
 
+if __name__ == "__main__":
+  sys.exit(main())
@@ -1,15 +1,49 @@
-document.write('\
-<table>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=2m32s">2:32</a></td> <td>group</td> <td><a href=https://tuesdayukes.org/music/PDFs/TUG%20Archive/Achy%20Breaky%20Heart.pdf>Achy Breaky Heart</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=8m55s">8:55</a></td> <td>group</td> <td><a href=https://tuesdayukes.org/music/ChordPro/TUG%20Archive/Jambalaya.pdf>Jambalaya</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=14m04s">14:04</a></td> <td>Mary Jane</td> <td><a href=https://tuesdayukes.org/music/PDFs/Summer%202023/Down%20in%20Texas.pdf>Down in Texas</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=25m08s">25:08</a></td> <td>Daniel</td> <td><a href=https://tuesdayukes.org/music/PDFs/Summer%202023/I\'m%20Into%20Something%20Good.pdf>I\'m Into Something Good</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=28m03s">28:03</a></td> <td>Brenda</td> <td><a href=https://tuesdayukes.org/music/PDFs/Summer%202023/Walkin\'%20After%20Midnight.pdf>Walkin\' After Midnight</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=30m39s">30:39</a></td> <td>group</td> <td><a href=https://tuesdayukes.org/music/PDFs/Fall%202022/Some%20Beach.pdf>Some Beach</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=34m33s">34:33</a></td> <td>Gary and Paulette</td> <td><a href=https://tuesdayukes.org/music/PDFs/Spring%202022/Shake%20Sugaree.pdf>Shake Sugaree</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=41m04s">41:04</a></td> <td>Mary Jane</td> <td><a href=https://tuesdayukes.org/music/PDFs/Summer%202023/Bad%20Trick.pdf>Bad Trick</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=45m36s">45:36</a></td> <td>Charlie</td> <td>Mama Tried</td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=49m55s">49:55</a></td> <td>Paul</td> <td><a href=https://www.doctoruke.com/_player/ifionlyhadabrain.html>If I Only Had a Brain</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=55m40s">55:40</a></td> <td>Marty</td> <td><a href=https://tuesdayukes.org/music/PDFs/Summer%202023/Angeline%20The%20Baker.pdf>Angeline the Baker</a></td></tr>\
-<tr><td><a href="https://youtu.be/WniUDMmmK7Q?t=1h01m20s">1:01:20</a></td> <td>group</td> <td><a href=https://tuesdayukes.org/music/PDFs/Summer%202022/Happy%20Trails.pdf>Happy Trails</a></td></tr>\
-</table>')
\ No newline at end of file
+(function () {
+  var feed = new URL("VideoIndex.bff902be4d.json", document.currentScript.src).href;
+  var anchor = document.currentScript;
+  var table = document.getElementById("video-index");
+  if (!table) {
+    table = document.createElement("table");
+    table.id = "video-index";
+    anchor.parentNode.insertBefore(table, anchor.nextSibling);
+  }
+
+  function timeText(seconds) {
+    var h = Math.floor(seconds / 3600), m = Math.floor(seconds / 60) % 60, s = seconds % 60;
+    var mm = h ? String(m).padStart(2, "0") : String(m);
+    return (h ? h + ":" : "") + mm + ":" + String(s).padStart(2, "0");
+  }
+
+  function cell(row, text, href) {
+    var td = row.insertCell();
+    if (href) {
+      var a = document.createElement("a");
+      a.href = href;
+      a.textContent = text;
+      td.appendChild(a);
+    } else {
+      td.textContent = text;
+    }
+  }
+
+  function render(data) {
+    var body = document.createElement("tbody");
+    var link = data.link, sep = link.indexOf("?") < 0 ? "?" : "&";
+    data.rows.forEach(function (r) {
+      var row = body.insertRow();
+      if (r[0] === null) {
+        cell(row, "");
+      } else {
+        cell(row, timeText(r[0]), link + sep + "t=" + r[0] + "s");
+      }
+      cell(row, r[1]);
+      cell(row, r[2], r[3]);
+    });
+    table.appendChild(body);
+  }
+
+  var loaded = fetch(feed).then(function (response) { return response.json(); });
+  requestAnimationFrame(function () {
+    setTimeout(function () { loaded.then(render); }, 0);
+  });
+})();
@@ -1,53 +1,248 @@
 #! python
-from pathlib import Path
-from posixpath import basename, splitext
 import os
-import argparse
-
 import re
-
-parser = argparse.ArgumentParser()
-parser.add_argument("inputFilename")
-parser.add_argument("youtubeLink")
-args = parser.parse_args()
-
-inputFilename = args.inputFilename
-youtubeLink = args.youtubeLink
-HtmlFilename = "VideoIndex.html"
-
-with open(inputFilename, "r") as sourceText:
-  sourceLines = sourceText.readlines()
-
-with open(HtmlFilename, "w") as HtmlFile:
-  HtmlFile.write('<table style="font-family: Arial, Helvetica, sans-serif; font-size: large;">\n')
-  for l in sourceLines:
-    HtmlFile.write("<tr>")
-
-    newL = l
-
-    # Add <td></td> around player's name
-    newL = re.sub(r"(\d+ +)(.*?)( \()", r"\1<td>\2</td>\3", newL)
-
-    # For timestamps greater than an hour, look for three numbers separated by 2 colons
-    newL = re.sub(r"^(\d+):(\d+):(\d+)", f"<td><a href=\"{youtubeLink}?t=\\1h\\2m\\3s\">\\1:\\2:\\3</a></td>",newL)
-
-    # For timestamps less than an hour, there are only two time fields (minutes : seconds)
-    newL = re.sub(r"^(\d+):(\d+)", f"<td><a href=\"{youtubeLink}?t=\\1m\\2s\">\\1:\\2</a></td>",newL)
-
-    # reshape URL for sheet music into an HTML tag using the song title as the
-    # visible text
-    newL = re.sub(r"\((.*)\) (https?:\S+)", r'<td><a href="\2">\1</a></td>',newL)
-
-    # If song title wasn't used with a link, split it from the player name here:
-    newL = re.sub(r"\((.*)\)$", r"<td>\1</td>", newL)
-
-    HtmlFile.write(newL.rstrip())
-
-    # Add escape backslashes in front of single quotes (also used as apostrophe)
-    # for the sake of the .js document.write string
-    newL = re.sub(r"'", r"\\'",newL)
-
-
-    HtmlFile.write("</tr>\n")
-
-  HtmlFile.write("</table>")
+import sys
+import json
+import glob
+import hashlib
+import argparse
+from datetime import datetime
+
+# Each line of a session file looks like
+#   1:05:30 Player Name (Song Title) https://tuesdayukes.org/music/...pdf
+# and becomes one <tr> of the video index. The patterns are compiled once and
+# applied in this order for every line of every session.
+
+# Add <td></td> around player's name
+playerName = re.compile(r"(\d+ +)(.*?)( \()")
+
+# For timestamps greater than an hour, look for three numbers separated by 2 colons
+hourTimestamp = re.compile(r"^(\d+):(\d+):(\d+)")
+
+# For timestamps less than an hour, there are only two time fields (minutes : seconds)
+minuteTimestamp = re.compile(r"^(\d+):(\d+)")
+
+# reshape URL for sheet music into an HTML tag using the song title as the
+# visible text
+sheetMusicLink = re.compile(r"\((.*)\) (https?:\S+)")
+
+# If song title wasn't used with a link, split it from the player name here:
+bareTitle = re.compile(r"\((.*)\)$")
+
+# Fields for the JSON feed: timestamp, performer, (title) and optional sheet music URL
+feedLine = re.compile(r"^(?:(\d+):)?(\d+):(\d+) +(.*?)(?: \((.*)\))?(?: (https?:\S+))?\s*$")
+feedHashLength = 10
+
+tableStyle = '<table style="font-family: Arial, Helvetica, sans-serif; font-size: large;">'
+# A session is its heading, any markup before its table (such as a photo) and
+# the table. The markup cannot cross another heading, so a session without a
+# table cannot swallow the next one.
+historyHeading = re.compile(r"<h2>([^<]*)</h2>((?:(?!<h2>).)*?)<table>.*?</table>\s*", re.DOTALL)
+dateFormat = "%B %d, %Y"
+
+def formatRow(l, youtubeLink):
+  newL = playerName.sub(r"\1<td>\2</td>\3", l)
+  newL = hourTimestamp.sub(lambda m: f'<td><a href="{youtubeLink}?t={m[1]}h{m[2]}m{m[3]}s">{m[1]}:{m[2]}:{m[3]}</a></td>', newL)
+  newL = minuteTimestamp.sub(lambda m: f'<td><a href="{youtubeLink}?t={m[1]}m{m[2]}s">{m[1]}:{m[2]}</a></td>', newL)
+  newL = sheetMusicLink.sub(r'<td><a href="\2">\1</a></td>', newL)
+  newL = bareTitle.sub(r"<td>\1</td>", newL)
+  return "<tr>" + newL.rstrip() + "</tr>"
+
+def readSession(inputFilename):
+  with open(inputFilename, "r", encoding="utf-8") as sourceText:
+    return sourceText.readlines()
+
+# [seconds, performer, title, url] for one session line (url may be None)
+def feedRow(l):
+  m = feedLine.match(l.strip())
+  if not m:
+    return [None, l.strip(), "", None]
+  hours, minutes, seconds, performer, title, url = m.groups()
+  return [int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds), performer, title or "", url]
+
+def htmlFragment(rows):
+  return tableStyle + "\n" + "".join(r + "\n" for r in rows) + "</table>"
+
+# VideoIndex.js no longer writes the table itself: it fetches the session's
+# content-hashed JSON feed and renders the rows once the page has painted, in
+# a table inserted where the script tag is (or into #video-index if present).
+loaderTemplate = """(function () {
+  var feed = new URL(FEED_NAME, document.currentScript.src).href;
+  var anchor = document.currentScript;
+  var table = document.getElementById("video-index");
+  if (!table) {
+    table = document.createElement("table");
+    table.id = "video-index";
+    anchor.parentNode.insertBefore(table, anchor.nextSibling);
+  }
+
+  function timeText(seconds) {
+    var h = Math.floor(seconds / 3600), m = Math.floor(seconds / 60) % 60, s = seconds % 60;
+    var mm = h ? String(m).padStart(2, "0") : String(m);
+    return (h ? h + ":" : "") + mm + ":" + String(s).padStart(2, "0");
+  }
+
+  function cell(row, text, href) {
+    var td = row.insertCell();
+    if (href) {
+      var a = document.createElement("a");
+      a.href = href;
+      a.textContent = text;
+      td.appendChild(a);
+    } else {
+      td.textContent = text;
+    }
+  }
+
+  function render(data) {
+    var body = document.createElement("tbody");
+    var link = data.link, sep = link.indexOf("?") < 0 ? "?" : "&";
+    data.rows.forEach(function (r) {
+      var row = body.insertRow();
+      if (r[0] === null) {
+        cell(row, "");
+      } else {
+        cell(row, timeText(r[0]), link + sep + "t=" + r[0] + "s");
+      }
+      cell(row, r[1]);
+      cell(row, r[2], r[3]);
+    });
+    table.appendChild(body);
+  }
+
+  var loaded = fetch(feed).then(function (response) { return response.json(); });
+  requestAnimationFrame(function () {
+    setTimeout(function () { loaded.then(render); }, 0);
+  });
+})();
+"""
+
+def feedJson(date, youtubeLink, lines):
+  data = {"date": date, "link": youtubeLink, "rows": [feedRow(l) for l in lines if l.strip()]}
+  return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+# Write VideoIndex.<hash>.json next to the loader, drop superseded feeds and
+# point the loader at the new one. Returns the feed's filename.
+def writeFeed(jsFilename, feedText):
+  digest = hashlib.sha1(feedText.encode("utf-8")).hexdigest()[:feedHashLength]
+  jsDir = os.path.dirname(os.path.abspath(jsFilename))
+  stem = os.path.splitext(os.path.basename(jsFilename))[0]
+  feedName = f"{stem}.{digest}.json"
+  writeText(os.path.join(jsDir, feedName), feedText)
+  for old in glob.glob(os.path.join(glob.escape(jsDir), glob.escape(stem) + ".*.json")):
+    if os.path.basename(old) != feedName:
+      os.remove(old)
+  writeText(jsFilename, loaderTemplate.replace("FEED_NAME", json.dumps(feedName)))
+  return feedName
+
+def historyBlock(date, rows):
+  return f"<h2>{date}</h2>\n<table>\n" + "".join(r + "\n" for r in rows) + "</table>\n\n"
+
+def sessionDate(date):
+  try:
+    return datetime.strptime(date, dateFormat)
+  except ValueError:
+    return datetime.min
+
+# Replace the block for each session date already in the history page and
+# insert the others, newest first, above the existing sessions.
+def updateHistory(historyText, blocks):
+  pending = dict(blocks)
+  replaced = 0
+
+  def replaceBlock(m):
+    nonlocal replaced
+    if m[1] not in pending:
+      return m[0]
+    replaced += 1
+    # Keep the photo or note between the heading and the table
+    block = pending.pop(m[1])
+    return f"<h2>{m[1]}</h2>{m[2]}" + block[block.index("<table>"):]
+
+  updated = historyHeading.sub(replaceBlock, historyText)
+  added = sorted(pending.items(), key=lambda item: sessionDate(item[0]), reverse=True)
+  if added:
+    # Above the newest session, even one with a photo instead of a table
+    insertAt = updated.find("<h2>")
+    if insertAt < 0:
+      insertAt = updated.rfind("</div>")
+    if insertAt < 0:
+      insertAt = len(updated)
+    updated = updated[:insertAt] + "".join(b for _, b in added) + updated[insertAt:]
+  return updated, replaced, len(added)
+
+# A batch manifest is a JSON list of sessions, for example
+#   [{"input": "2026-08-18.txt", "link": "https://youtu.be/elqcUPaQW3g", "date": "August 18, 2026"}]
+# Input paths are relative to the manifest.
+def loadManifest(manifestFilename):
+  with open(manifestFilename, "r", encoding="utf-8") as f:
+    sessions = json.load(f)
+  baseDir = os.path.dirname(os.path.abspath(manifestFilename))
+  return [(os.path.join(baseDir, s["input"]), s["link"], s.get("date")) for s in sessions]
+
+def writeText(filename, text):
+  tmp = filename + ".tmp"
+  with open(tmp, "w", encoding="utf-8") as f:
+    f.write(text)
+  os.replace(tmp, filename)
+
+def parseArgs(argv=None):
+  parser = argparse.ArgumentParser(description="Format timestamped session files into the video index")
+  parser.add_argument("inputFilename", nargs="?")
+  parser.add_argument("youtubeLink", nargs="?")
+  parser.add_argument("--date", help='Session date for the history block, e.g. "August 18, 2026"')
+  parser.add_argument("--batch", metavar="MANIFEST",
+                      help="JSON list of sessions ({input, link, date}) to format in one run")
+  parser.add_argument("--output", default="VideoIndex.html",
+                      help="HTML table for the newest session (default: VideoIndex.html)")
+  parser.add_argument("--js", metavar="FILE",
+                      help="Also write the newest session as a JSON feed (FILE's name plus a content hash) and FILE as its deferred loader")
+  parser.add_argument("--history", metavar="FILE",
+                      help="Add or replace each dated session's block in this history page")
+  args = parser.parse_args(argv)
+  if not args.batch and not (args.inputFilename and args.youtubeLink):
+    parser.error("give inputFilename and youtubeLink, or --batch MANIFEST")
+  return args
+
+def main(argv=None):
+  args = parseArgs(argv)
+
+  if args.batch:
+    sessions = loadManifest(args.batch)
+  else:
+    sessions = [(args.inputFilename, args.youtubeLink, args.date)]
+
+  formatted = []
+  for inputFilename, youtubeLink, date in sessions:
+    lines = readSession(inputFilename)
+    formatted.append((date, youtubeLink, lines, [formatRow(l, youtubeLink) for l in lines]))
+  if not formatted:
+    print("No sessions to format", file=sys.stderr)
+    return 1
+
+  # The newest session feeds VideoIndex.html and VideoIndex.js
+  newestDate, newestLink, newestLines, newestRows = max(formatted, key=lambda s: sessionDate(s[0] or ""))
+  with open(args.output, "w", encoding="utf-8") as HtmlFile:
+    HtmlFile.write(htmlFragment(newestRows))
+
+  if args.js:
+    feedName = writeFeed(args.js, feedJson(newestDate, newestLink, newestLines))
+    print(f"{args.js}: loads {feedName}", file=sys.stderr)
+
+  if args.history:
+    blocks = [(date, historyBlock(date, rows)) for date, _, _, rows in formatted if date]
+    undated = len(formatted) - len(blocks)
+    if undated:
+      print(f"Skipping {undated} session(s) without a date for {args.history}", file=sys.stderr)
+    with open(args.history, "r", encoding="utf-8") as f:
+      historyText = f.read()
+    updated, replaced, added = updateHistory(historyText, blocks)
+    if updated != historyText:
+      writeText(args.history, updated)
+    print(f"{args.history}: {replaced} session(s) replaced, {added} added", file=sys.stderr)
+
+  print(f"Formatted {len(formatted)} session(s), {sum(len(s[3]) for s in formatted)} rows", file=sys.stderr)
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
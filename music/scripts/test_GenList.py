@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from GenList import hiddenPDFLinks
+
+class HiddenPDFLinksTest(unittest.TestCase):
+  def testVisibleTwinKeepsCanonicalLinkVisible(self):
+    # The older copy sorts first and is canonical, but its newer twin is shown
+    older = "../PDFs/Winter 2021-22/DREAM LOVER.pdf"
+    newer = "../PDFs/Winter 2022-23/Dream Lover.pdf"
+    canonical = {newer: older}
+    hidden = hiddenPDFLinks([older, newer], canonical, {older})
+    self.assertNotIn(older, hidden)
+
+  def testGroupHiddenWhenEveryCopyIsHidden(self):
+    older = "a/Song.pdf"
+    newer = "b/Song.pdf"
+    other = "c/Song.pdf"
+    hidden = hiddenPDFLinks([older, newer, other], {newer: older}, {older, newer})
+    self.assertEqual(hidden, {older})
+
+if __name__ == "__main__":
+  unittest.main()
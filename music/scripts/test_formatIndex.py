@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from formatIndex import historyBlock, updateHistory
+
+# Sessions may have a photo before their table, or a photo or note and no
+# table at all; neither may hide the next session's block from updateHistory.
+history = """<div>
+<h2>March 17, 2026</h2>
+<img src="visit.webp" alt="">
+<table>
+<tr><td>old March 17 row</td></tr>
+</table>
+
+<h2>March 10, 2026</h2>
+<img src="photo.webp" alt="">
+
+<h2>March 3, 2026</h2>
+<table>
+<tr><td>old March 3 row</td></tr>
+</table>
+
+<h2>December 5, 2025</h2>
+<p>No recording this week.</p>
+
+<h2>December 2, 2025</h2>
+<table>
+<tr><td>old December 2 row</td></tr>
+</table>
+
+</div>
+"""
+
+def newBlock(date):
+  return (date, historyBlock(date, ["<tr><td>new row</td></tr>"]))
+
+class UpdateHistoryTest(unittest.TestCase):
+  def testReplacesBlockAfterHeadingWithoutTable(self):
+    blocks = [newBlock("March 3, 2026"), newBlock("December 2, 2025")]
+    updated, replaced, added = updateHistory(history, blocks)
+    self.assertEqual((replaced, added), (2, 0))
+    self.assertNotIn("old March 3 row", updated)
+    self.assertNotIn("old December 2 row", updated)
+    self.assertEqual(updated.count("<h2>March 3, 2026</h2>"), 1)
+    self.assertIn('<h2>March 10, 2026</h2>\n<img src="photo.webp" alt="">', updated)
+    self.assertIn("<p>No recording this week.</p>", updated)
+
+  def testReplacesBlockWithPhotoBeforeTable(self):
+    updated, replaced, added = updateHistory(history, [newBlock("March 17, 2026")])
+    self.assertEqual((replaced, added), (1, 0))
+    self.assertEqual(updated.count("<h2>March 17, 2026</h2>"), 1)
+    self.assertIn('<h2>March 17, 2026</h2>\n<img src="visit.webp" alt="">\n<table>\n<tr><td>new row</td></tr>', updated)
+
+  def testAddsNewSessionAboveExistingOnes(self):
+    updated, replaced, added = updateHistory(history, [newBlock("March 24, 2026")])
+    self.assertEqual((replaced, added), (0, 1))
+    self.assertLess(updated.index("March 24, 2026"), updated.index("March 17, 2026"))
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Linearize and recompress song PDFs for fast first-page display on phones.
+
+Each PDF is rewritten with object streams, recompressed Flate streams and a
+linearized ("fast web view") layout, using qpdf when it is on PATH and
+pikepdf otherwise. The SHA-1 of every optimized (or already optimal) file
+is recorded in pdf-optimized.json, so later runs only hash the catalog and
+skip everything that has been handled. Commit the manifest alongside the
+PDFs so other checkouts and CI skip them too.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import pikepdf
+except ImportError:  # optional dependency: pip install pikepdf
+    pikepdf = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+MANIFEST_FILE = "pdf-optimized.json"
+MANIFEST_VERSION = 1
+DEFAULT_PATHS = ["music"]
+SKIP_DIRS = {".git", "node_modules", "_site", "__pycache__"}
+
+# Linearization adds hint tables; accept a little growth for small files that
+# cannot be compressed further, but never let a file get noticeably bigger.
+MAX_GROWTH = 1.02
+
+# Hashes from the manifest, set once per worker process by init_worker
+known_hashes = set()
+
+QPDF_ARGS = [
+    "--linearize",
+    "--object-streams=generate",
+    "--compress-streams=y",
+    "--recompress-flate",
+    "--compression-level=9",
+]
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if data.get("version") != MANIFEST_VERSION:
+        return set()
+    return set(data.get("hashes", []))
+
+
+def save_manifest(path, hashes):
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "hashes": sorted(hashes)}, f, indent=0)
+        f.write("\n")
+    os.replace(temp_path, path)
+
+
+def find_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if path.is_file():
+            if path.suffix.lower() == ".pdf":
+                pdfs.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            pdfs.extend(Path(root) / name for name in files if name.lower().endswith(".pdf"))
+    return sorted(pdfs)
+
+
+def optimizer_name():
+    if shutil.which("qpdf"):
+        return "qpdf"
+    if pikepdf is not None:
+        return "pikepdf"
+    return None
+
+
+def optimize_to(source, output, tool):
+    if tool == "qpdf":
+        # Exit status 3 means success with warnings (common with old generators)
+        result = subprocess.run(
+            ["qpdf", *QPDF_ARGS, str(source), str(output)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if result.returncode not in (0, 3):
+            raise RuntimeError(result.stderr.strip() or f"qpdf exited with {result.returncode}")
+        return
+
+    with pikepdf.open(source) as pdf:
+        pdf.remove_unreferenced_resources()
+        pdf.save(
+            output,
+            linearize=True,
+            object_stream_mode=pikepdf.ObjectStreamMode.generate,
+            compress_streams=True,
+            recompress_flate=True,
+        )
+
+
+def init_worker(known):
+    global known_hashes
+    known_hashes = known
+
+
+def optimize_file(path, tool, dry_run):
+    """
+    Optimize one PDF in place.
+
+    Returns (status, digest, before, after) where status is "skipped",
+    "optimized", "kept" (the original was already as small) or "error";
+    digest is the hash to record as optimized, or the error message.
+    """
+    digest = file_hash(path)
+    before = path.stat().st_size
+    if digest in known_hashes:
+        return "skipped", digest, before, before
+
+    temp_path = path.with_name(path.name + ".optimizing")
+    try:
+        optimize_to(path, temp_path, tool)
+        after = temp_path.stat().st_size
+        if after > before * MAX_GROWTH:
+            return "kept", digest, before, before
+        if dry_run:
+            return "optimized", None, before, after
+
+        # Keep the original mtime so "PDF newer than source" checks still hold
+        info = path.stat()
+        os.replace(temp_path, path)
+        os.utime(path, ns=(info.st_atime_ns, info.st_mtime_ns))
+        return "optimized", file_hash(path), before, after
+    except Exception as e:
+        return "error", str(e), before, before
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def format_bytes(count):
+    sign = "-" if count < 0 else ""
+    count = abs(count)
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{sign}{count:.0f} {unit}" if unit == "B" else f"{sign}{count:.1f} {unit}"
+        count /= 1024
+    return f"{sign}{count:.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Linearize and recompress PDFs, skipping ones already optimized"
+    )
+    parser.add_argument("paths", nargs="*", type=Path,
+                        help="PDF files or folders (default: music)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help=f"Ignore {MANIFEST_FILE} and process every PDF")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report the savings without replacing any file or the manifest")
+    parser.add_argument("--manifest", type=Path, default=SCRIPT_DIR / MANIFEST_FILE,
+                        help=f"Optimized-hash manifest (default: {MANIFEST_FILE})")
+    args = parser.parse_args()
+
+    tool = optimizer_name()
+    if tool is None:
+        print("❌ Neither qpdf nor pikepdf is available (apt install qpdf or pip install pikepdf)")
+        return 1
+
+    paths = args.paths or [SCRIPT_DIR / p for p in DEFAULT_PATHS]
+    pdfs = find_pdfs(paths)
+    known = set() if args.force else load_manifest(args.manifest)
+    print(f"🔍 Found {len(pdfs)} PDFs; optimizing with {tool}")
+
+    task_args = ([tool] * len(pdfs), [args.dry_run] * len(pdfs))
+    if args.jobs == 1 or len(pdfs) < 2:
+        init_worker(known)
+        results = map(optimize_file, pdfs, *task_args)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(known,))
+        results = executor.map(optimize_file, pdfs, *task_args, chunksize=8)
+
+    counts = {"skipped": 0, "optimized": 0, "kept": 0, "error": 0}
+    saved = 0
+    optimized_hashes = set(known)
+    try:
+        for path, (status, digest, before, after) in zip(pdfs, results):
+            counts[status] += 1
+            if status == "error":
+                print(f"  ❌ {path}: {digest}")
+                continue
+            if status == "optimized":
+                saved += before - after
+                print(f"  ✓ {path} {format_bytes(before)} → {format_bytes(after)}")
+            if digest:
+                optimized_hashes.add(digest)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if not args.dry_run and optimized_hashes != known:
+        # Hashes of PDFs no longer in the scanned folders are kept: they may
+        # live under a path this run was not pointed at.
+        save_manifest(args.manifest, optimized_hashes)
+
+    verb = "would save" if args.dry_run else "saved"
+    print(
+        f"\n📊 {counts['optimized']} optimized, {counts['kept']} already optimal, "
+        f"{counts['skipped']} skipped, {counts['error']} errors; {verb} {format_bytes(saved)}"
+    )
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Find byte-identical PDFs and pick one canonical path for each.
+
+The same song PDF often sits under both music/PDFs/<Season>/ and
+music/ChordPro/<Season>/. Every PDF under music/ is hashed once, with the
+hashes cached in .pdf_hash_cache.json by size and mtime, and identical
+files are grouped. GenList.py and generate_sitemap.py link to the
+canonical copy, and build_site.py publishes the others as hardlinks to it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+HASH_CACHE_FILE = ".pdf_hash_cache.json"
+HASH_CACHE_VERSION = 1
+DEFAULT_FOLDERS = ("music",)
+SKIP_DIRS = {".git", "node_modules", "_site", "__pycache__"}
+
+
+def pdf_preference(relative: str) -> tuple[int, str]:
+    """Sort key for choosing the canonical copy: ChordPro output, then music/PDFs."""
+    relative = relative.lower()
+    if relative.startswith("music/chordpro/"):
+        return (0, relative)
+    if relative.startswith("music/pdfs/"):
+        return (1, relative)
+    return (2, relative)
+
+
+def load_hash_cache(path: Path) -> dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != HASH_CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_hash_cache(path: Path, files: dict[str, dict]) -> None:
+    # A unique temp file, since build steps running side by side save too
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    except OSError as e:
+        print(f"⚠️ Could not write {path}: {e}", file=sys.stderr)
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": HASH_CACHE_VERSION, "files": files}, f, separators=(",", ":"), sort_keys=True)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not write {path}: {e}", file=sys.stderr)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+def in_folders(relative: str, folders) -> bool:
+    for folder in folders:
+        folder = Path(folder).as_posix().strip("/")
+        if folder == "." or relative == folder or relative.startswith(folder + "/"):
+            return True
+    return False
+
+
+def iter_pdfs(root: Path, folders=DEFAULT_FOLDERS):
+    """Yield (root-relative POSIX path, stat) for every PDF under folders."""
+    for folder in folders:
+        for directory, dirs, files in os.walk(root / folder):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for name in files:
+                if name.lower().endswith(".pdf"):
+                    path = Path(directory) / name
+                    yield path.relative_to(root).as_posix(), path.stat()
+
+
+def hash_pdfs(root: Path = SCRIPT_DIR, folders=DEFAULT_FOLDERS, use_cache: bool = True) -> dict[str, str]:
+    """Map each PDF's root-relative path to its SHA-1, rehashing only changed files."""
+    cache_path = root / HASH_CACHE_FILE
+    cached = load_hash_cache(cache_path) if use_cache else {}
+    files = {}
+    changed = False
+
+    for relative, info in iter_pdfs(root, folders):
+        entry = cached.get(relative)
+        if not entry or entry["size"] != info.st_size or entry["mtime_ns"] != info.st_mtime_ns:
+            digest = hashlib.sha1()
+            with open(root / relative, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            entry = {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "hash": digest.hexdigest()}
+            changed = True
+        files[relative] = entry
+
+    if use_cache:
+        # Entries outside the scanned folders are kept for the next full run
+        merged = {relative: entry for relative, entry in cached.items() if not in_folders(relative, folders)}
+        merged.update(files)
+        if changed or merged.keys() != cached.keys():
+            save_hash_cache(cache_path, merged)
+    return {relative: entry["hash"] for relative, entry in files.items()}
+
+
+def group_duplicates(hashes: dict[str, str]) -> dict[str, list[str]]:
+    """Content hash -> paths (canonical first) for hashes shared by several files."""
+    groups: dict[str, list[str]] = {}
+    for relative, digest in hashes.items():
+        groups.setdefault(digest, []).append(relative)
+    return {
+        digest: sorted(paths, key=pdf_preference)
+        for digest, paths in groups.items()
+        if len(paths) > 1
+    }
+
+
+def canonical_pdfs(root: Path = SCRIPT_DIR, folders=DEFAULT_FOLDERS, use_cache: bool = True) -> dict[str, str]:
+    """Map every duplicate PDF's root-relative path to its canonical copy.
+
+    PDFs without an identical twin are not in the result.
+    """
+    canonical = {}
+    for paths in group_duplicates(hash_pdfs(root, folders, use_cache)).values():
+        for relative in paths[1:]:
+            canonical[relative] = paths[0]
+    return canonical
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folders", nargs="*", default=list(DEFAULT_FOLDERS),
+                        help="Folders to scan, relative to the repository root (default: music)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"Rehash every PDF and leave {HASH_CACHE_FILE} untouched")
+    parser.add_argument("--list", action="store_true",
+                        help="List every duplicate group")
+    args = parser.parse_args()
+
+    hashes = hash_pdfs(SCRIPT_DIR, args.folders, not args.no_cache)
+    groups = group_duplicates(hashes)
+    duplicate_files = sum(len(paths) - 1 for paths in groups.values())
+    duplicate_bytes = sum(
+        (SCRIPT_DIR / paths[0]).stat().st_size * (len(paths) - 1) for paths in groups.values()
+    )
+
+    if args.list:
+        for paths in sorted(groups.values(), key=lambda p: pdf_preference(p[0])):
+            print(paths[0])
+            for relative in paths[1:]:
+                print(f"  = {relative}")
+
+    print(
+        f"📊 {len(hashes)} PDFs, {len(groups)} duplicate groups; "
+        f"{duplicate_files} redundant copies ({duplicate_bytes / (1024 * 1024):.1f} MB)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
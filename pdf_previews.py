@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Render a small WebP preview of the first page of every song PDF.
+
+Previews are named after the PDF's content hash (assets/previews/<hash>.webp),
+so a PDF is only rasterized when it is new or has changed, identical PDFs
+share one preview, and the hashes themselves come from pdf_dedupe.py's
+cache. Pages are rasterized with pdftoppm (poppler) when it is on PATH and
+PyMuPDF otherwise, across a worker pool, and encoded with Pillow.
+build_site.py runs this before GenList.py, which shows a preview when its
+PDF link is hovered or focused. assets/previews is gitignored; the Pages
+workflow restores it from the Actions cache, so each deploy renders only
+the previews that are missing.
+"""
+
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency: pip install Pillow
+    Image = None
+
+try:
+    import pymupdf
+except ImportError:  # optional dependency: pip install pymupdf
+    pymupdf = None
+
+from pdf_dedupe import DEFAULT_FOLDERS, hash_pdfs
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PREVIEW_DIR = "assets/previews"
+PREVIEW_WIDTH = 240
+WEBP_QUALITY = 60
+HASH_LENGTH = 16
+
+
+def preview_name(digest):
+    return f"{digest[:HASH_LENGTH]}.webp"
+
+
+def preview_paths(root=SCRIPT_DIR, folders=DEFAULT_FOLDERS):
+    """Map each PDF's root-relative path to its existing preview's root-relative path."""
+    previews = {}
+    for relative, digest in hash_pdfs(root, folders).items():
+        preview = f"{PREVIEW_DIR}/{preview_name(digest)}"
+        if (root / preview).is_file():
+            previews[relative] = preview
+    return previews
+
+
+def rasterizer_name():
+    if Image is None:
+        return None
+    if shutil.which("pdftoppm"):
+        return "pdftoppm"
+    if pymupdf is not None:
+        return "pymupdf"
+    return None
+
+
+def first_page(source, tool):
+    """The first page of source as an RGB image PREVIEW_WIDTH pixels wide."""
+    if tool == "pdftoppm":
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_root = os.path.join(temp_dir, "page")
+            result = subprocess.run(
+                ["pdftoppm", "-png", "-f", "1", "-l", "1", "-singlefile",
+                 "-scale-to-x", str(PREVIEW_WIDTH), "-scale-to-y", "-1",
+                 str(source), output_root],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or f"pdftoppm exited with {result.returncode}")
+            with Image.open(output_root + ".png") as image:
+                return image.convert("RGB")
+
+    with pymupdf.open(source) as document:
+        page = document[0]
+        zoom = PREVIEW_WIDTH / page.rect.width
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        return Image.open(io.BytesIO(pixmap.tobytes("png"))).convert("RGB")
+
+
+def render_preview(source, destination, tool):
+    """Write destination atomically; returns None or an error message."""
+    temp_path = destination.with_name(destination.name + ".tmp")
+    try:
+        first_page(source, tool).save(temp_path, "WEBP", quality=WEBP_QUALITY, method=6)
+        os.replace(temp_path, destination)
+        return None
+    except Exception as e:
+        return str(e)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render first-page WebP previews for new or changed PDFs"
+    )
+    parser.add_argument("folders", nargs="*", default=list(DEFAULT_FOLDERS),
+                        help="Folders to scan, relative to the repository root (default: music)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true",
+                        help="Render every preview again, even if it exists")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete previews that no PDF uses any more")
+    args = parser.parse_args()
+
+    preview_dir = SCRIPT_DIR / PREVIEW_DIR
+    hashes = hash_pdfs(SCRIPT_DIR, args.folders)
+
+    # One render per distinct PDF content
+    sources = {}
+    for relative, digest in sorted(hashes.items()):
+        sources.setdefault(preview_name(digest), SCRIPT_DIR / relative)
+    todo = [
+        (source, preview_dir / name)
+        for name, source in sources.items()
+        if args.force or not (preview_dir / name).is_file()
+    ]
+    print(f"🔍 {len(hashes)} PDFs, {len(sources)} distinct; {len(todo)} previews to render")
+
+    errors = 0
+    if todo:
+        tool = rasterizer_name()
+        if tool is None:
+            print("⚠️ Skipping previews: needs Pillow plus pdftoppm or PyMuPDF "
+                  "(apt install poppler-utils or pip install Pillow pymupdf)")
+            return 0
+        preview_dir.mkdir(parents=True, exist_ok=True)
+
+        sources_todo = [source for source, _ in todo]
+        destinations = [destination for _, destination in todo]
+        if args.jobs == 1 or len(todo) < 2:
+            results = map(render_preview, sources_todo, destinations, [tool] * len(todo))
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=args.jobs)
+            results = executor.map(render_preview, sources_todo, destinations,
+                                   [tool] * len(todo), chunksize=8)
+        try:
+            for source, error in zip(sources_todo, results):
+                if error:
+                    errors += 1
+                    print(f"  ❌ {source.relative_to(SCRIPT_DIR)}: {error}")
+        finally:
+            if executor:
+                executor.shutdown()
+
+    pruned = 0
+    if args.prune and preview_dir.is_dir():
+        # Previews stay as long as any PDF under the default folders uses them
+        used = {preview_name(digest) for digest in hash_pdfs(SCRIPT_DIR).values()} | sources.keys()
+        for preview in preview_dir.glob("*.webp"):
+            if preview.name not in used:
+                preview.unlink()
+                pruned += 1
+
+    print(f"\n📊 {len(todo) - errors} rendered, {len(sources) - len(todo)} cached, "
+          f"{pruned} pruned, {errors} errors")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
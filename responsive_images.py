@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Responsive image variants for the pictures the site's pages show.
+
+Every local raster image behind an <img> in the HTML pages is resized to
+the widths in VARIANT_WIDTHS (never upscaled) as WebP, plus AVIF when
+Pillow can encode it. Variants are named after the source image's content
+hash (assets/responsive/<name>-<hash>-<width>.<format>), so only new or
+changed images are encoded, across a process pool.
+
+Pages are then rewritten in place, and running again is a no-op:
+- a <picture> gets generated AVIF and WebP <source srcset> tags, built from
+  its <img> src, in place of its hand-made WebP source;
+- a bare <img> gets a WebP srcset;
+- both get sizes, explicit width/height and loading="lazy" (except the
+  header logo) unless the tag already sets them.
+Images with inline event handlers (such as the hover swap on the home page
+hero) are left alone, since those scripts replace src directly.
+"""
+
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image, features
+except ImportError:  # optional dependency: pip install Pillow
+    Image = None
+
+from update_asset_cache_bust import asset_hash, read_page, resolve_asset
+from update_css_cache_bust import iter_target_files
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+VARIANT_DIR = "assets/responsive"
+VARIANT_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+RASTER_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+QUALITY = {"webp": 80, "avif": 55}
+MIME_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+# Rendered widths for images whose CSS fixes their size; anything else is
+# assumed to be at most as wide as the viewport and its own pixel width.
+CLASS_SIZES = {
+    "header-logo": "165px",
+    "tribute-image": "200px",
+    "memorial-image": "200px",
+    "about-image": "(max-width: 600px) 100vw, 300px",
+}
+# Shown at the top of every page, so never lazy-loaded
+EAGER_CLASSES = {"header-logo"}
+
+PICTURE_OR_IMG_PATTERN = re.compile(r"<picture\b[^>]*>.*?</picture>|<img\b[^>]*>", re.IGNORECASE | re.DOTALL)
+IMG_PATTERN = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+GENERATED_SOURCE_PATTERN = re.compile(
+    r"[ \t]*<source\b[^>]*\btype\s*=\s*[\"']image/(?:webp|avif)[\"'][^>]*>[ \t]*\n?", re.IGNORECASE
+)
+HANDLER_PATTERN = re.compile(r"\son[a-z]+\s*=", re.IGNORECASE)
+TAG_END_PATTERN = re.compile(r"\s*/?>$")
+
+
+def attribute_pattern(name):
+    return re.compile(rf"(\s{name}\s*=\s*)([\"'])(.*?)\2", re.IGNORECASE | re.DOTALL)
+
+
+def get_attribute(tag, name):
+    match = attribute_pattern(name).search(tag)
+    return match.group(3) if match else None
+
+
+def set_attribute(tag, name, value, replace=True):
+    pattern = attribute_pattern(name)
+    if pattern.search(tag):
+        if not replace:
+            return tag
+        return pattern.sub(lambda m: f'{m.group(1)}{m.group(2)}{value}{m.group(2)}', tag, count=1)
+    end = TAG_END_PATTERN.search(tag)
+    return f'{tag[:end.start()]} {name}="{value}"{tag[end.start():]}'
+
+
+def output_formats():
+    if Image is None:
+        return []
+    return ["avif", "webp"] if features.check("avif") else ["webp"]
+
+
+def slug(path):
+    return re.sub(r"[^A-Za-z0-9]+", "-", Path(path).stem).strip("-") or "image"
+
+
+def plan_image(relative, root, formats):
+    """Size and variant list for one source image, or None if unreadable."""
+    try:
+        with Image.open(root / relative) as image:
+            width, height = image.size
+    except OSError:
+        return None
+    digest = asset_hash(root / relative, None)["hash"]
+    widths = [w for w in VARIANT_WIDTHS if w < width] + [width]
+    variants = {
+        fmt: [(w, f"{VARIANT_DIR}/{slug(relative)}-{digest}-{w}.{fmt}") for w in widths]
+        for fmt in formats
+    }
+    return {"width": width, "height": height, "variants": variants}
+
+
+def encode_variant(source, destination, width):
+    """Resize source to width and write destination atomically; returns None or an error."""
+    fmt = destination.suffix[1:]
+    temp_path = destination.with_name(destination.name + ".tmp")
+    try:
+        with Image.open(source) as image:
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            if width < image.width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+            image.save(temp_path, fmt.upper(), quality=QUALITY[fmt])
+        os.replace(temp_path, destination)
+        return None
+    except Exception as e:
+        return str(e)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+
+def page_url(variant, page, root):
+    return Path(os.path.relpath(root / variant, page.parent)).as_posix()
+
+
+def srcset(info, fmt, page, root):
+    return ", ".join(f"{page_url(variant, page, root)} {w}w" for w, variant in info["variants"][fmt])
+
+
+def sizes_for(img, info):
+    existing = get_attribute(img, "sizes")
+    if existing:
+        return existing
+    for css_class in (get_attribute(img, "class") or "").split():
+        if css_class in CLASS_SIZES:
+            return CLASS_SIZES[css_class]
+    return f"(max-width: {info['width']}px) 100vw, {info['width']}px"
+
+
+def image_source(img, page, root):
+    """Root-relative path of the raster image an <img> shows, or None to leave it alone."""
+    if HANDLER_PATTERN.search(img):
+        return None
+    src = get_attribute(img, "src")
+    relative = resolve_asset(src, page, root) if src else None
+    if relative is None or Path(relative).suffix.lower() not in RASTER_EXTENSIONS:
+        return None
+    return relative
+
+
+def sized_img(img, info):
+    img = set_attribute(img, "width", str(info["width"]))
+    img = set_attribute(img, "height", str(info["height"]))
+    if EAGER_CLASSES & set((get_attribute(img, "class") or "").split()):
+        return img
+    return set_attribute(img, "loading", "lazy", replace=False)
+
+
+def rewrite_picture(block, page, root, images):
+    if HANDLER_PATTERN.search(block):
+        return block
+    img_match = IMG_PATTERN.search(block)
+    if not img_match:
+        return block
+    info = images.get(image_source(img_match.group(0), page, root))
+    if info is None:
+        return block
+
+    img = img_match.group(0)
+    sizes = sizes_for(img, info)
+    # Each source goes on its own line at the <img>'s indent, unless the
+    # <img> shares its line with other markup
+    line_start = block.rfind("\n", 0, img_match.start()) + 1
+    prefix = block[line_start:img_match.start()]
+    separator = "" if prefix.strip() else "\n" + prefix
+    sources = "".join(
+        f'<source type="{MIME_TYPES[fmt]}" srcset="{srcset(info, fmt, page, root)}" sizes="{sizes}">{separator}'
+        for fmt in info["variants"]
+    )
+    head = GENERATED_SOURCE_PATTERN.sub("", block[:img_match.start()])
+    if separator and not head.endswith(prefix):
+        head += prefix
+    return head + sources + sized_img(img, info) + block[img_match.end():]
+
+
+def rewrite_img(img, page, root, images):
+    info = images.get(image_source(img, page, root))
+    if info is None or "webp" not in info["variants"]:
+        return img
+    sizes = sizes_for(img, info)
+    img = set_attribute(img, "srcset", srcset(info, "webp", page, root))
+    img = set_attribute(img, "sizes", sizes)
+    return sized_img(img, info)
+
+
+def rewrite_page(content, page, root, images):
+    def replace(match):
+        tag = match.group(0)
+        if tag[:8].lower() == "<picture":
+            return rewrite_picture(tag, page, root, images)
+        return rewrite_img(tag, page, root, images)
+
+    return PICTURE_OR_IMG_PATTERN.sub(replace, content)
+
+
+def referenced_images(pages, root):
+    """Root-relative paths of the raster images shown by <img> tags in pages."""
+    found = set()
+    for page in pages:
+        for img in IMG_PATTERN.findall(read_page(page)):
+            relative = image_source(img, page, root)
+            if relative:
+                found.add(relative)
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate responsive image variants and point <img> tags at them"
+    )
+    parser.add_argument("--root", default=SCRIPT_DIR, type=Path,
+                        help="Repository root to scan")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--prune", action="store_true",
+                        help=f"Delete files in {VARIANT_DIR} that no page uses any more")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Show what would change without writing files")
+    args = parser.parse_args()
+
+    formats = output_formats()
+    if not formats:
+        print("⚠️ Skipping responsive images: needs Pillow (pip install Pillow)")
+        return 0
+
+    root = args.root.resolve()
+    pages = list(iter_target_files(root, {".html"}))
+    images = {}
+    for relative in referenced_images(pages, root):
+        info = plan_image(relative, root, formats)
+        if info is not None:
+            images[relative] = info
+
+    todo = [
+        (root / relative, root / variant, width)
+        for relative, info in images.items()
+        for variants in info["variants"].values()
+        for width, variant in variants
+        if not (root / variant).is_file()
+    ]
+    print(f"🔍 {len(images)} images on {len(pages)} pages ({', '.join(formats)}); "
+          f"{len(todo)} variants to encode")
+
+    errors = 0
+    if todo and not args.dry_run:
+        (root / VARIANT_DIR).mkdir(parents=True, exist_ok=True)
+        task_args = [list(column) for column in zip(*todo)]
+        if args.jobs == 1 or len(todo) < 2:
+            results = map(encode_variant, *task_args)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=args.jobs)
+            results = executor.map(encode_variant, *task_args)
+        try:
+            for (source, destination, _), error in zip(todo, results):
+                if error:
+                    errors += 1
+                    print(f"  ❌ {destination.relative_to(root)}: {error}")
+        finally:
+            if executor:
+                executor.shutdown()
+    if errors:
+        # Never point a page at a variant that failed to encode
+        return 1
+
+    changed = []
+    for page in pages:
+        content = read_page(page)
+        updated = rewrite_page(content, page, root, images)
+        if updated != content:
+            changed.append(page.relative_to(root).as_posix())
+            if not args.dry_run:
+                page.write_text(updated, encoding="utf-8")
+
+    pruned = 0
+    if args.prune and not args.dry_run and (root / VARIANT_DIR).is_dir():
+        used = {
+            variant
+            for info in images.values()
+            for variants in info["variants"].values()
+            for _, variant in variants
+        }
+        for path in (root / VARIANT_DIR).iterdir():
+            if path.is_file() and path.relative_to(root).as_posix() not in used:
+                path.unlink()
+                pruned += 1
+
+    if args.dry_run:
+        print(f"\n📊 would encode {len(todo)} variants and rewrite {len(changed)} page(s)")
+    else:
+        print(f"\n📊 {len(todo)} variants encoded, {pruned} pruned; rewrote {len(changed)} page(s)")
+    for relative in changed:
+        print(f"  {relative}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Content-hash cache-busting for every static asset the site's pages reference.
+
+Pages are scanned once for href/src references to stylesheets, scripts and
+images. The page -> asset graph is kept in .asset_graph.json together with
+each asset's content hash, so later runs only re-read pages that changed on
+disk and only rewrite pages whose ?v= no longer matches an asset's hash.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from update_css_cache_bust import DEFAULT_EXTENSIONS, iter_target_files
+
+GRAPH_FILE = ".asset_graph.json"
+GRAPH_VERSION = 1
+HASH_LENGTH = 10
+
+ASSET_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".webp",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".ico",
+}
+
+REFERENCE_PATTERN = re.compile(r"(\b(?:href|src)\s*=\s*)([\"'])([^\"']*)\2", re.IGNORECASE)
+VERSION_PATTERN = re.compile(r"(^|&)v=([^&]*)")
+
+
+def load_graph(root):
+    try:
+        with open(root / GRAPH_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"pages": {}, "assets": {}}
+
+    if data.get("version") != GRAPH_VERSION:
+        return {"pages": {}, "assets": {}}
+    return {"pages": data.get("pages", {}), "assets": data.get("assets", {})}
+
+
+def save_graph(root, graph):
+    path = root / GRAPH_FILE
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": GRAPH_VERSION, **graph}, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def read_page(path):
+    try:
+        return path.read_text(encoding="utf-8")
+    except UnicodeDecodeError:
+        return path.read_text(encoding="iso-8859-1")
+
+
+def split_url(url):
+    """Split a raw URL into (path, query, fragment) without re-encoding anything."""
+    url, hash_mark, fragment = url.partition("#")
+    path, question_mark, query = url.partition("?")
+    return path, (query if question_mark else None), (fragment if hash_mark else None)
+
+
+def resolve_asset(url, page_path, root):
+    """Return the root-relative POSIX path of the asset url points at, or None."""
+    parsed = urlsplit(url)
+    if parsed.scheme or parsed.netloc or not parsed.path:
+        return None
+
+    decoded = unquote(parsed.path)
+    if os.path.splitext(decoded)[1].lower() not in ASSET_EXTENSIONS:
+        return None
+
+    if decoded.startswith("/"):
+        candidate = root / decoded.lstrip("/")
+    else:
+        candidate = page_path.parent / decoded
+    candidate = Path(os.path.normpath(candidate))
+
+    try:
+        relative = candidate.relative_to(root)
+    except ValueError:
+        return None
+
+    if not candidate.is_file():
+        return None
+    return relative.as_posix()
+
+
+def scan_page(path, root):
+    """Map each asset a page references to the v= values it currently carries."""
+    refs = {}
+    for match in REFERENCE_PATTERN.finditer(read_page(path)):
+        asset = resolve_asset(match.group(3), path, root)
+        if asset is None:
+            continue
+        _, query, _ = split_url(match.group(3))
+        version = VERSION_PATTERN.search(query) if query else None
+        refs.setdefault(asset, [])
+        value = version.group(2) if version else None
+        if value not in refs[asset]:
+            refs[asset].append(value)
+    return refs
+
+
+def page_entry(path, root):
+    info = path.stat()
+    return {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "refs": scan_page(path, root)}
+
+
+def asset_hash(path, cached):
+    """Content hash of an asset, reused while its size and mtime are unchanged."""
+    info = path.stat()
+    if cached and cached["size"] == info.st_size and cached["mtime_ns"] == info.st_mtime_ns:
+        return cached
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "hash": digest.hexdigest()[:HASH_LENGTH]}
+
+
+def versioned_url(url, version, add_missing):
+    path, query, fragment = split_url(url)
+    if query is not None and VERSION_PATTERN.search(query):
+        query = VERSION_PATTERN.sub(lambda m: f"{m.group(1)}v={version}", query, count=1)
+    elif add_missing:
+        query = f"{query}&v={version}" if query else f"v={version}"
+    else:
+        return url
+
+    url = f"{path}?{query}"
+    if fragment is not None:
+        url += f"#{fragment}"
+    return url
+
+
+def rewrite_page(path, root, hashes, add_missing, dry_run):
+    """Stamp every asset reference in a page with its content hash."""
+    content = read_page(path)
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        url = match.group(3)
+        asset = resolve_asset(url, path, root)
+        if asset not in hashes:
+            return match.group(0)
+        new_url = versioned_url(url, hashes[asset], add_missing)
+        if new_url == url:
+            return match.group(0)
+        count += 1
+        return f"{match.group(1)}{match.group(2)}{new_url}{match.group(2)}"
+
+    updated = REFERENCE_PATTERN.sub(replace, content)
+    if count and not dry_run:
+        path.write_text(updated, encoding="utf-8")
+    return count
+
+
+def is_stale(refs, hashes, add_missing):
+    for asset, versions in refs.items():
+        for version in versions:
+            if version is None:
+                if add_missing:
+                    return True
+            elif version != hashes[asset]:
+                return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stamp asset references in HTML/PHP pages with content hashes"
+    )
+    parser.add_argument(
+        "--root",
+        default=Path(__file__).resolve().parent,
+        type=Path,
+        help="Repository root to scan",
+    )
+    parser.add_argument(
+        "--add-missing",
+        action="store_true",
+        help="Also add ?v= to asset references that have no version yet",
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help=f"Ignore {GRAPH_FILE} and re-read every page",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would change without writing files",
+    )
+    parser.add_argument(
+        "--print-changed",
+        action="store_true",
+        help="Print changed file paths only",
+    )
+
+    args = parser.parse_args()
+    root = args.root.resolve()
+    graph = {"pages": {}, "assets": {}} if args.rescan else load_graph(root)
+
+    pages = {}
+    rescanned = 0
+    for path in iter_target_files(root, DEFAULT_EXTENSIONS):
+        relative = path.relative_to(root).as_posix()
+        entry = graph["pages"].get(relative)
+        info = path.stat()
+        if not entry or entry["size"] != info.st_size or entry["mtime_ns"] != info.st_mtime_ns:
+            entry = page_entry(path, root)
+            rescanned += 1
+        pages[relative] = entry
+
+    assets = {}
+    for entry in pages.values():
+        for asset in entry["refs"]:
+            if asset not in assets and (root / asset).is_file():
+                assets[asset] = asset_hash(root / asset, graph["assets"].get(asset))
+    hashes = {asset: cached["hash"] for asset, cached in assets.items()}
+
+    changed_files = []
+    total_updates = 0
+    for relative, entry in sorted(pages.items()):
+        refs = {asset: versions for asset, versions in entry["refs"].items() if asset in hashes}
+        if not is_stale(refs, hashes, args.add_missing):
+            continue
+        count = rewrite_page(root / relative, root, hashes, args.add_missing, args.dry_run)
+        if count:
+            total_updates += count
+            changed_files.append(relative)
+            if not args.dry_run:
+                pages[relative] = page_entry(root / relative, root)
+
+    if not args.dry_run:
+        save_graph(root, {"pages": pages, "assets": assets})
+
+    if args.print_changed:
+        for changed in changed_files:
+            print(changed)
+        return 0
+
+    print(f"Scanned {rescanned} of {len(pages)} page(s); {len(assets)} asset(s) referenced.")
+    if total_updates == 0:
+        print("All asset references are up to date.")
+        return 0
+
+    print(f"Updated {total_updates} asset reference(s) to content hashes.")
+    for changed in changed_files:
+        print(f"  {changed}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
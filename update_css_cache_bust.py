@@ -4,12 +4,16 @@ Update cache-busting v= params for main.css links in HTML/PHP files.
 """
 
 import argparse
+import os
 import re
 import subprocess
 from datetime import datetime
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 IGNORE_DIRS = {".git", ".venv", "__pycache__"}
+# Never hold hand-edited pages; only pruned when git is unavailable, since
+# git ls-files already leaves out ignored output such as _site.
+HEAVY_DIRS = {"_site", "node_modules"}
 DEFAULT_EXTENSIONS = {".html", ".php"}
 
 
@@ -17,28 +21,57 @@ def generate_timestamp():
     return datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
 
 
-def is_ignored_by_git(path, repo_root):
+def list_git_files(root):
+    """Return tracked and untracked, non-ignored files under root, or None outside git."""
     try:
         result = subprocess.run(
-            ["git", "check-ignore", "-q", path.as_posix()],
-            cwd=repo_root,
-            stdout=subprocess.DEVNULL,
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root,
+            stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
             check=False,
         )
     except OSError:
-        return False
+        return None
 
-    return result.returncode == 0
+    if result.returncode != 0:
+        return None
+
+    names = result.stdout.decode("utf-8", errors="surrogateescape").split("\0")
+    # Unmerged paths are listed once per stage; keep the first occurrence.
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def walk_files(root):
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORE_DIRS and entry.name not in HEAVY_DIRS:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    yield Path(entry.path)
 
 
 def iter_target_files(root, extensions):
-    for path in root.rglob("*"):
-        if any(part in IGNORE_DIRS for part in path.parts):
+    names = list_git_files(root)
+    if names is None:
+        for path in walk_files(root):
+            if path.suffix.lower() in extensions:
+                yield path
+        return
+
+    for name in names:
+        relative = PurePosixPath(name)
+        if relative.suffix.lower() not in extensions:
+            continue
+        if any(part in IGNORE_DIRS for part in relative.parts):
             continue
-        if path.is_file() and path.suffix.lower() in extensions:
-            if is_ignored_by_git(path.relative_to(root), root):
-                continue
+        path = root / relative
+        # Deleted-but-still-indexed files are listed by --cached.
+        if path.is_file():
             yield path
 
 
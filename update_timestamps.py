@@ -1,171 +1,274 @@
 #!/usr/bin/env python3
 """
 Enhanced script to update v= timestamps in URLs within HTML files.
-This script can update timestamps in specific tables or throughout the entire file.
+This script can update timestamps in specific tables or throughout the entire file,
+for one page or a batch of pages processed in parallel.
 """
 
 import re
 import os
+import glob
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+from html_tables import extract_tables
+
+# URLs with v= parameters, focusing on PDF links
+TIMESTAMP_PATTERN = re.compile(r'(href="[^"]*\.pdf\?v=)([^"]*)"')
+
+DEFAULT_TABLES = ['practice-songs-table', 'submitted-songs-table', 'open-mic']
+
 def generate_timestamp():
     """Generate a timestamp in the format YYYY.MM.DD.HH.MM.SS"""
     return datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
 
-def update_v_timestamps_in_content(content):
+def update_v_timestamps_in_content(content, new_timestamp=None, log=print):
     """
     Update v= timestamps in URLs within content.
     Only updates URLs that contain .pdf and have v= parameters.
     """
-    # Pattern to match URLs with v= parameters (focusing on PDF links)
-    pattern = r'(href="[^"]*\.pdf\?v=)([^"]*)"'
-    
-    new_timestamp = generate_timestamp()
+    if new_timestamp is None:
+        new_timestamp = generate_timestamp()
     updated_count = 0
-    
+
     def replace_timestamp(match):
         nonlocal updated_count
         url_start = match.group(1)  # Everything up to and including "v="
         old_timestamp = match.group(2)  # The old timestamp
-        
-        print(f"  Updating: {old_timestamp} -> {new_timestamp}")
+
+        log(f"  Updating: {old_timestamp} -> {new_timestamp}")
         updated_count += 1
         return f'{url_start}{new_timestamp}"'
-    
+
     # Replace all v= timestamps in PDF URLs
-    updated_content = re.sub(pattern, replace_timestamp, content)
-    
+    updated_content = TIMESTAMP_PATTERN.sub(replace_timestamp, content)
+
     return updated_content, updated_count
 
-def update_timestamps_in_tables(html_content, table_ids):
+def find_table_spans(html_content, table_ids):
+    """
+    Locate every requested table in a single parse of the document.
+
+    Tables inside HTML comments are not part of the page and are skipped.
+
+    Args:
+        html_content (str): The HTML content
+        table_ids (list): List of table IDs to find
+
+    Returns:
+        dict: table ID -> (start, end) offsets of the first matching table
+    """
+    return {
+        table.table_id: (table.start, table.end)
+        for table in extract_tables(html_content, table_ids)
+        if table.end is not None
+    }
+
+def update_timestamps_in_tables(html_content, table_ids, new_timestamp=None, log=print):
     """
     Update v= timestamps only within specific HTML tables.
-    
+
+    The tables are found in one parse and the document is rebuilt once from
+    the untouched text between them plus each rewritten table.
+
     Args:
         html_content (str): The HTML content
         table_ids (list): List of table IDs to update
-    
+        new_timestamp (str): Timestamp to write (default: now)
+        log (callable): Receives progress messages
+
     Returns:
         tuple: (updated_content, total_updates)
     """
-    updated_content = html_content
+    if new_timestamp is None:
+        new_timestamp = generate_timestamp()
+    spans = find_table_spans(html_content, table_ids)
+    pieces = []
+    position = 0
     total_updates = 0
-    
+
     for table_id in table_ids:
-        # Find the table with the specified ID
-        table_pattern = rf'(<table[^>]*id="{table_id}"[^>]*>.*?</table>)'
-        table_match = re.search(table_pattern, updated_content, re.DOTALL | re.IGNORECASE)
-        
-        if table_match:
-            table_content = table_match.group(1)
-            print(f"\nProcessing table: {table_id}")
-            
-            # Update timestamps within this table
-            updated_table, count = update_v_timestamps_in_content(table_content)
-            total_updates += count
-            
-            # Replace the table in the full content
-            updated_content = updated_content.replace(table_content, updated_table)
-            
-            if count == 0:
-                print(f"  No v= timestamps found in table '{table_id}'")
-            else:
-                print(f"  Updated {count} timestamp(s) in table '{table_id}'")
+        if table_id not in spans:
+            log(f"Warning: Table with ID '{table_id}' not found")
+
+    for table_id, (start, end) in sorted(spans.items(), key=lambda item: item[1]):
+        log(f"\nProcessing table: {table_id}")
+
+        # Update timestamps within this table
+        updated_table, count = update_v_timestamps_in_content(
+            html_content[start:end], new_timestamp, log)
+        total_updates += count
+
+        pieces.append(html_content[position:start])
+        pieces.append(updated_table)
+        position = end
+
+        if count == 0:
+            log(f"  No v= timestamps found in table '{table_id}'")
         else:
-            print(f"Warning: Table with ID '{table_id}' not found")
-    
-    return updated_content, total_updates
+            log(f"  Updated {count} timestamp(s) in table '{table_id}'")
+
+    pieces.append(html_content[position:])
+    return ''.join(pieces), total_updates
 
-def update_all_timestamps(html_content):
+def update_all_timestamps(html_content, new_timestamp=None, log=print):
     """
     Update all v= timestamps in the entire HTML content.
-    
+
     Args:
         html_content (str): The HTML content
-    
+        new_timestamp (str): Timestamp to write (default: now)
+        log (callable): Receives progress messages
+
     Returns:
         tuple: (updated_content, total_updates)
     """
-    print("\nProcessing entire file...")
-    return update_v_timestamps_in_content(html_content)
+    log("\nProcessing entire file...")
+    return update_v_timestamps_in_content(html_content, new_timestamp, log)
 
-def main():
-    """Main function to update timestamps in HTML file"""
-    parser = argparse.ArgumentParser(description='Update v= timestamps in HTML file URLs')
-    parser.add_argument('--file', '-f', default='index.html', 
-                       help='HTML file to process (default: index.html)')
-    parser.add_argument('--all', '-a', action='store_true',
-                       help='Update all v= timestamps in the entire file')
-    parser.add_argument('--tables', '-t', nargs='*', 
-                       default=['practice-songs-table', 'submitted-songs-table', 'open-mic'],
-                       help='Table IDs to update (default: practice-songs-table submitted-songs-table)')
-    parser.add_argument('--backup', action='store_true',
-                       help='Create backup file (default: no backup)')
-    parser.add_argument('--dry-run', '-n', action='store_true',
-                       help='Show what would be updated without making changes')
-    
-    args = parser.parse_args()
-    
-    script_dir = Path(__file__).parent
-    html_file = script_dir / args.file
-    
-    if not html_file.exists():
-        print(f"Error: {html_file} not found!")
-        return 1
-    
-    print(f"Reading {html_file}")
-    
-    # Read the HTML file
+def read_html(html_file):
+    """Read an HTML file as UTF-8, falling back to ISO-8859-1."""
     try:
         with open(html_file, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+            return f.read()
     except UnicodeDecodeError:
         # Try with different encoding if UTF-8 fails
-        try:
-            with open(html_file, 'r', encoding='iso-8859-1') as f:
-                html_content = f.read()
-        except Exception as e:
-            print(f"Error reading file: {e}")
-            return 1
-    
+        with open(html_file, 'r', encoding='iso-8859-1') as f:
+            return f.read()
+
+def process_file(html_file, tables, update_all, new_timestamp, backup, dry_run):
+    """
+    Update one HTML file.
+
+    Returns:
+        tuple: (updates, error, log_lines) so a worker's output can be
+        printed in one block by the parent process
+    """
+    lines = []
+    log = lines.append
+    log(f"Reading {html_file}")
+
+    try:
+        html_content = read_html(html_file)
+    except Exception as e:
+        log(f"Error reading file: {e}")
+        return 0, True, lines
+
     # Create backup only if --backup is specified
-    if args.backup and not args.dry_run:
+    if backup and not dry_run:
         backup_file = html_file.with_suffix(f'.html.backup.{generate_timestamp()}'[:19].replace(":", "-"))
-        print(f"Creating backup: {backup_file}")
+        log(f"Creating backup: {backup_file}")
         with open(backup_file, 'w', encoding='utf-8') as f:
             f.write(html_content)
-    
-    print(f"\nNew timestamp will be: {generate_timestamp()}")
-    
+
     # Update timestamps based on mode
-    if args.all:
-        updated_content, total_updates = update_all_timestamps(html_content)
+    if update_all:
+        updated_content, total_updates = update_all_timestamps(html_content, new_timestamp, log)
     else:
-        updated_content, total_updates = update_timestamps_in_tables(html_content, args.tables)
-    
+        updated_content, total_updates = update_timestamps_in_tables(
+            html_content, tables, new_timestamp, log)
+
     if total_updates == 0:
-        print("\nNo v= timestamps found to update.")
-        return 0
-    
-    print(f"\nTotal updates: {total_updates}")
-    
-    if args.dry_run:
-        print("\nDry run mode - no changes made to file.")
-        return 0
-    
+        log("\nNo v= timestamps found to update.")
+        return 0, False, lines
+
+    log(f"\nTotal updates: {total_updates}")
+
+    if dry_run:
+        log("\nDry run mode - no changes made to file.")
+        return total_updates, False, lines
+
     # Write the updated content back to the file
-    print(f"\nWriting updated content to {html_file}")
+    log(f"\nWriting updated content to {html_file}")
     try:
         with open(html_file, 'w', encoding='utf-8') as f:
             f.write(updated_content)
-        print("Timestamp update completed successfully!")
+        log("Timestamp update completed successfully!")
     except Exception as e:
-        print(f"Error writing file: {e}")
+        log(f"Error writing file: {e}")
+        return total_updates, True, lines
+
+    return total_updates, False, lines
+
+def expand_file_patterns(patterns, base_dir):
+    """Expand file names and glob patterns relative to base_dir, in order, without duplicates."""
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            full_pattern = os.path.join(glob.escape(str(base_dir)), pattern)
+            matches = sorted(glob.glob(full_pattern, recursive=True))
+        else:
+            matches = [os.path.join(str(base_dir), pattern)]
+        for match in matches:
+            path = Path(match)
+            if path not in seen:
+                seen.add(path)
+                files.append(path)
+    return files
+
+def main():
+    """Main function to update timestamps in HTML files"""
+    parser = argparse.ArgumentParser(description='Update v= timestamps in HTML file URLs')
+    parser.add_argument('files', nargs='*',
+                       help='HTML files or glob patterns such as "*.html" (default: --file)')
+    parser.add_argument('--file', '-f', default='index.html',
+                       help='HTML file to process when no files are given (default: index.html)')
+    parser.add_argument('--all', '-a', action='store_true',
+                       help='Update all v= timestamps in the entire file')
+    parser.add_argument('--tables', '-t', nargs='*',
+                       default=DEFAULT_TABLES,
+                       help='Table IDs to update (default: practice-songs-table submitted-songs-table open-mic)')
+    parser.add_argument('--backup', action='store_true',
+                       help='Create backup file (default: no backup)')
+    parser.add_argument('--dry-run', '-n', action='store_true',
+                       help='Show what would be updated without making changes')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                       help='Worker processes for multiple files (default: CPU count)')
+
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent
+    html_files = expand_file_patterns(args.files or [args.file], script_dir)
+
+    missing = [f for f in html_files if not f.is_file()]
+    for html_file in missing:
+        print(f"Error: {html_file} not found!")
+    if missing or not html_files:
+        if not html_files:
+            print(f"Error: no files match {' '.join(args.files)}")
         return 1
-    
-    return 0
+
+    # One timestamp for the whole batch so every page links the same version
+    new_timestamp = generate_timestamp()
+    print(f"New timestamp will be: {new_timestamp}\n")
+
+    task_args = (args.tables, args.all, new_timestamp, args.backup, args.dry_run)
+    if len(html_files) == 1 or args.jobs == 1:
+        results = (process_file(f, *task_args) for f in html_files)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        results = executor.map(process_file, html_files, *([arg] * len(html_files) for arg in task_args))
+
+    total_updates = 0
+    failures = 0
+    try:
+        for updates, error, lines in results:
+            print("\n".join(lines))
+            print()
+            total_updates += updates
+            failures += error
+    finally:
+        if executor:
+            executor.shutdown()
+
+    if len(html_files) > 1:
+        print(f"Processed {len(html_files)} files: {total_updates} timestamp(s) updated, {failures} error(s)")
+
+    return 1 if failures else 0
 
 if __name__ == "__main__":
     exit(main())
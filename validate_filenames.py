@@ -13,19 +13,26 @@ It flags filenames with:
 - Reserved Windows names (CON, PRN, AUX, NUL, etc.)
 - Case-only differences that could cause collisions
 - Path length issues (Windows has 260 character path limit)
+- With --duplicates: differently spelled names that GenList.py would merge into
+  one archive row (same title once leading articles, apostrophes and commas
+  are ignored), anywhere in the catalog
 
 Usage:
     python validate_filenames.py [--fix] [--path PATH]
+    python validate_filenames.py --staged
     
 Options:
     --fix           Suggest fixes for problematic filenames
     --path PATH     Specific path to check (default: entire repository)
     --extensions    Only check specific extensions (e.g., --extensions .pdf .chopro)
+    --staged        Only check files staged for commit (used by .githooks/pre-commit)
+    --duplicates    Also report cross-folder archive title collisions
 """
 
 import os
 import sys
 import re
+import subprocess
 import unicodedata
 from pathlib import Path
 from collections import defaultdict
@@ -65,39 +72,96 @@ PROBLEMATIC_UNICODE = {
 # Maximum path length for Windows
 WINDOWS_MAX_PATH = 260
 
+# Extensions that GenList.py lists as downloads in the archive table
+ARCHIVE_EXTENSIONS = {'.pdf', '.chopro', '.cho', '.mscz', '.urltxt'}
+
+# Mirrors GenList.py's dictCompare: leading articles and apostrophes/commas are
+# ignored when grouping files into archive rows
+ARCHIVE_ARTICLES = {'a', 'an', 'the'}
+ARCHIVE_STRIP_CHARS = str.maketrans('', '', "',")
+
+
+def archive_title_key(stem):
+    """Normalized archive row key for a filename stem (see GenList.dictCompare)"""
+    words = stem.split()
+    if words and words[0].lower() in ARCHIVE_ARTICLES:
+        stem = ' '.join(words[1:])
+    return stem.translate(ARCHIVE_STRIP_CHARS).lower()
+
+
+# Any character that could trigger a character-level issue: everything outside
+# printable ASCII plus the Windows invalid characters. Most names have none, so
+# a single search lets them skip all per-character work.
+SUSPECT_CHARS = re.compile('[^\x20-\x7e' + ']|[' + re.escape(WINDOWS_INVALID_CHARS) + ']')
+
+
+def _build_fix_table():
+    """Translate table for suggest_fix, applying every replacement rule at once.
+    
+    Equivalent to replacing problematic Unicode, then Windows invalid characters
+    (including any produced by the Unicode step), then dropping control characters.
+    """
+    invalid = {ord(c): '_' for c in WINDOWS_INVALID_CHARS}
+    table = {ord(bad): good.translate(invalid) for bad, good in PROBLEMATIC_UNICODE.items()}
+    table.update(invalid)
+    table.update({code: None for code in range(32)})
+    return table
+
+
+FIX_TABLE = _build_fix_table()
+
 
 class FilenameValidator:
     def __init__(self, root_path='.', extensions=None):
         self.root_path = Path(root_path)
-        self.extensions = extensions
+        self.extensions = tuple(extensions) if extensions else None
         self.issues = []
         self.case_map = defaultdict(list)  # Track case-insensitive duplicates
+        self.version_groups = 0  # Same-name copies resolved by GenList's git timestamps
+        # Resolve the working directory once instead of calling absolute() per file
+        self._cwd_length = len(os.getcwd())
         
     def is_ascii_printable(self, char):
         """Check if character is printable ASCII"""
         return 32 <= ord(char) <= 126
     
+    def classify_chars(self, filename):
+        """Find every character-level issue in one pass over the filename
+        
+        Returns a dict with 'control' (bool), 'invalid' (Windows invalid chars),
+        'unicode' (problematic Unicode details) and 'non_ascii' (all characters
+        outside printable ASCII), each in order of appearance.
+        """
+        found = {'control': False, 'invalid': [], 'unicode': [], 'non_ascii': []}
+        for match in SUSPECT_CHARS.finditer(filename):
+            char = match.group()
+            if char in WINDOWS_INVALID_CHARS:
+                found['invalid'].append(char)
+                continue
+            found['non_ascii'].append(char)
+            if ord(char) < 32:
+                found['control'] = True
+            elif char in PROBLEMATIC_UNICODE:
+                found['unicode'].append((char, PROBLEMATIC_UNICODE[char],
+                                         f"U+{ord(char):04X}",
+                                         unicodedata.name(char, "UNKNOWN")))
+        return found
+    
     def has_control_chars(self, filename):
         """Check for ASCII control characters (0-31)"""
-        return any(ord(c) < 32 for c in filename)
+        return self.classify_chars(filename)['control']
     
     def has_windows_invalid_chars(self, filename):
         """Check for Windows invalid characters"""
-        return any(c in WINDOWS_INVALID_CHARS for c in filename)
+        return bool(self.classify_chars(filename)['invalid'])
     
     def has_problematic_unicode(self, filename):
         """Check for common problematic Unicode characters"""
-        found = []
-        for char in filename:
-            if char in PROBLEMATIC_UNICODE:
-                found.append((char, PROBLEMATIC_UNICODE[char], 
-                            f"U+{ord(char):04X}", 
-                            unicodedata.name(char, "UNKNOWN")))
-        return found
+        return self.classify_chars(filename)['unicode']
     
     def has_non_ascii(self, filename):
         """Check for any non-ASCII characters"""
-        return [char for char in filename if not self.is_ascii_printable(char)]
+        return self.classify_chars(filename)['non_ascii']
     
     def has_trailing_space_or_period(self, filename):
         """Check for trailing spaces or periods (problematic on Windows)"""
@@ -109,24 +173,22 @@ class FilenameValidator:
         name_without_ext = os.path.splitext(filename)[0].upper()
         return name_without_ext in WINDOWS_RESERVED_NAMES
     
+    def absolute_path_length(self, filepath):
+        """Length of the absolute path, without touching the filesystem"""
+        path_str = str(filepath)
+        if filepath.is_absolute():
+            return len(path_str)
+        return self._cwd_length + 1 + len(path_str)
+    
     def exceeds_path_length(self, filepath):
         """Check if full path exceeds Windows path length limit"""
-        return len(str(filepath.absolute())) > WINDOWS_MAX_PATH
+        return self.absolute_path_length(filepath) > WINDOWS_MAX_PATH
     
     def suggest_fix(self, filename):
         """Suggest a fixed version of the filename"""
-        fixed = filename
-        
-        # Replace problematic Unicode characters
-        for bad_char, good_char in PROBLEMATIC_UNICODE.items():
-            fixed = fixed.replace(bad_char, good_char)
-        
-        # Replace Windows invalid characters with underscores
-        for char in WINDOWS_INVALID_CHARS:
-            fixed = fixed.replace(char, '_')
-        
-        # Remove control characters
-        fixed = ''.join(c for c in fixed if ord(c) >= 32)
+        # Replace problematic Unicode and Windows invalid characters, and
+        # remove control characters, in a single translate call
+        fixed = filename.translate(FIX_TABLE)
         
         # Remove trailing spaces and periods from name (but keep extension)
         name, ext = os.path.splitext(fixed)
@@ -139,18 +201,18 @@ class FilenameValidator:
         """Validate a single file and record any issues"""
         filename = filepath.name
         issues_found = []
+        chars = self.classify_chars(filename)
         
         # Check for control characters
-        if self.has_control_chars(filename):
+        if chars['control']:
             issues_found.append("Contains control characters")
         
         # Check for Windows invalid characters
-        if self.has_windows_invalid_chars(filename):
-            invalid = [c for c in filename if c in WINDOWS_INVALID_CHARS]
-            issues_found.append(f"Contains Windows invalid characters: {', '.join(repr(c) for c in invalid)}")
+        if chars['invalid']:
+            issues_found.append(f"Contains Windows invalid characters: {', '.join(repr(c) for c in chars['invalid'])}")
         
         # Check for problematic Unicode
-        unicode_issues = self.has_problematic_unicode(filename)
+        unicode_issues = chars['unicode']
         if unicode_issues:
             for char, replacement, code, name in unicode_issues:
                 issues_found.append(
@@ -158,7 +220,7 @@ class FilenameValidator:
                 )
         
         # Check for non-ASCII characters
-        non_ascii = self.has_non_ascii(filename)
+        non_ascii = chars['non_ascii']
         if non_ascii and not unicode_issues:  # Don't duplicate if already caught above
             chars_detail = ', '.join(f"{repr(c)} (U+{ord(c):04X})" for c in non_ascii[:5])
             if len(non_ascii) > 5:
@@ -175,7 +237,7 @@ class FilenameValidator:
         
         # Check path length
         if self.exceeds_path_length(filepath):
-            issues_found.append(f"Path length ({len(str(filepath.absolute()))}) exceeds Windows limit ({WINDOWS_MAX_PATH})")
+            issues_found.append(f"Path length ({self.absolute_path_length(filepath)}) exceeds Windows limit ({WINDOWS_MAX_PATH})")
         
         # Track for case-insensitive duplicates
         self.case_map[str(filepath.parent / filename.lower())].append(str(filepath))
@@ -188,11 +250,16 @@ class FilenameValidator:
                 'suggested_fix': self.suggest_fix(filename)
             })
     
-    def check_case_duplicates(self):
-        """Check for filenames that differ only in case"""
+    def check_case_duplicates(self, only_paths=None):
+        """Check for filenames that differ only in case
+        
+        If only_paths is given, only report groups that include one of those paths.
+        """
         duplicates = {k: v for k, v in self.case_map.items() if len(v) > 1}
         if duplicates:
             for paths in duplicates.values():
+                if only_paths is not None and not any(p in only_paths for p in paths):
+                    continue
                 for path in paths:
                     self.issues.append({
                         'path': Path(path),
@@ -201,20 +268,72 @@ class FilenameValidator:
                         'suggested_fix': None
                     })
     
-    def scan(self):
+    def check_archive_collisions(self, paths, only_paths=None):
+        """Find differently spelled files that collapse into one archive row
+        
+        Builds a single index of GenList's normalized title keys, so the whole
+        catalog is checked in one pass. Identically named copies in different
+        folders are expected (GenList keeps the newest by git timestamp) and are
+        only counted; only groups whose spellings differ beyond capitalization
+        are reported. If
+        only_paths is given, only groups touching those paths are reported.
+        """
+        by_title = defaultdict(list)
+        versions = defaultdict(int)
+        for path in paths:
+            stem, ext = os.path.splitext(os.path.basename(path))
+            ext = ext.lower()
+            if ext not in ARCHIVE_EXTENSIONS:
+                continue
+            key = archive_title_key(stem)
+            by_title[key].append(path)
+            versions[(key, ext)] += 1
+        
+        self.version_groups = sum(1 for count in versions.values() if count > 1)
+        
+        for key, group in by_title.items():
+            # Capitalization differences are common and harmless here
+            stems = {os.path.splitext(os.path.basename(p))[0].casefold() for p in group}
+            if len(stems) < 2:
+                continue
+            if only_paths is not None and not any(p in only_paths for p in group):
+                continue
+            for path in group:
+                stem = os.path.splitext(os.path.basename(path))[0].casefold()
+                others = sorted({p for p in group if os.path.splitext(os.path.basename(p))[0].casefold() != stem})
+                self.issues.append({
+                    'path': Path(path),
+                    'filename': os.path.basename(path),
+                    'issues': [f"Shares archive title '{key}' with differently named: {', '.join(others)}"],
+                    'suggested_fix': None
+                })
+    
+    def wants(self, name):
+        """Check if a filename matches the extension filter (if any)"""
+        return self.extensions is None or name.endswith(self.extensions)
+    
+    def iter_files(self):
+        """Walk the tree with os.scandir, pruning hidden directories as we go"""
+        stack = [str(self.root_path)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):
+                            continue  # Skip hidden files and directories
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file() and self.wants(entry.name):
+                            yield Path(entry.path)
+            except OSError as e:
+                print(f"Warning: cannot read {directory}: {e}")
+    
+    def scan(self, duplicates=False):
         """Scan all files in the repository"""
         print(f"Scanning files in: {self.root_path}")
         
-        # Find all files
-        if self.extensions:
-            files = []
-            for ext in self.extensions:
-                files.extend(self.root_path.rglob(f'*{ext}'))
-        else:
-            files = [f for f in self.root_path.rglob('*') if f.is_file()]
-        
-        # Skip hidden files and directories
-        files = [f for f in files if not any(part.startswith('.') for part in f.parts)]
+        files = list(self.iter_files())
         
         print(f"Found {len(files)} files to validate")
         
@@ -224,6 +343,53 @@ class FilenameValidator:
         # Check for case duplicates
         self.check_case_duplicates()
         
+        if duplicates:
+            self.check_archive_collisions([str(f) for f in files])
+        
+        return self.issues
+    
+    def scan_staged(self, duplicates=False):
+        """Validate only the files staged for commit in the git index"""
+        try:
+            result = subprocess.run(
+                ["git", "diff", "--cached", "--name-only", "--relative", "--diff-filter=ACR", "-z"],
+                cwd=self.root_path,
+                capture_output=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"Error: could not list staged files: {e}")
+            return None
+        
+        names = [n for n in result.stdout.decode('utf-8', 'surrogateescape').split('\0') if n]
+        files = [
+            self.root_path / name for name in names
+            if self.wants(name) and not any(part.startswith('.') for part in name.split('/'))
+        ]
+        print(f"Found {len(files)} staged files to validate")
+        
+        for filepath in files:
+            self.validate_file(filepath)
+        
+        # Compare against the rest of each touched folder for case-only collisions
+        staged = {str(f) for f in files}
+        for directory in {f.parent for f in files}:
+            try:
+                siblings = os.listdir(directory)
+            except OSError:
+                continue
+            for name in siblings:
+                sibling = str(directory / name)
+                if sibling not in staged and self.wants(name):
+                    self.case_map[str(directory / name.lower())].append(sibling)
+        
+        self.check_case_duplicates(only_paths=staged)
+        
+        if duplicates:
+            # Titles collide across the whole catalog, so index every file
+            catalog = {str(f) for f in self.iter_files()} | staged
+            self.check_archive_collisions(sorted(catalog), only_paths=staged)
+        
         return self.issues
     
     def report(self, show_fixes=False):
@@ -240,13 +406,14 @@ class FilenameValidator:
             by_path[str(issue['path'])].append(issue)
         
         for path in sorted(by_path.keys()):
-            issue_data = by_path[path][0]  # Get first (should only be one per path)
             print(f"📁 {path}")
-            for issue_text in issue_data['issues']:
-                print(f"   ⚠️  {issue_text}")
+            for issue_data in by_path[path]:
+                for issue_text in issue_data['issues']:
+                    print(f"   ⚠️  {issue_text}")
             
-            if show_fixes and issue_data['suggested_fix']:
-                print(f"   💡 Suggested fix: {issue_data['suggested_fix']}")
+            suggested_fix = by_path[path][0]['suggested_fix']
+            if show_fixes and suggested_fix:
+                print(f"   💡 Suggested fix: {suggested_fix}")
             print()
         
         return False
@@ -264,6 +431,10 @@ def main():
                        help='Path to scan (default: current directory)')
     parser.add_argument('--extensions', nargs='*',
                        help='Only check files with these extensions (e.g., .pdf .chopro)')
+    parser.add_argument('--staged', action='store_true',
+                       help='Only check files staged for commit (git diff --cached)')
+    parser.add_argument('--duplicates', action='store_true',
+                       help='Also report differently named files that share an archive title')
     
     args = parser.parse_args()
     
@@ -275,9 +446,17 @@ def main():
     
     # Run validation
     validator = FilenameValidator(scan_path, args.extensions)
-    validator.scan()
+    if args.staged:
+        if validator.scan_staged(duplicates=args.duplicates) is None:
+            return 1
+    else:
+        validator.scan(duplicates=args.duplicates)
     success = validator.report(show_fixes=args.fix)
     
+    if args.duplicates and validator.version_groups:
+        print(f"ℹ️  {validator.version_groups} title(s) have same-name copies in several folders; "
+              "GenList.py picks the newest by git timestamp")
+    
     return 0 if success else 1
 
 